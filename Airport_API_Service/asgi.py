@@ -3,6 +3,10 @@ ASGI config for Airport_API_Service project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Django rejects ASGI lifespan events, so they are answered here instead; on
+shutdown the pub/sub broker is closed, which ends any live seat stream
+(``airport.live``) still open.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
@@ -13,4 +17,24 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Airport_API_Service.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from ops.pubsub import get_broker  # noqa: E402  (needs the app registry)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            get_broker().close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+    else:
+        await django_application(scope, receive, send)
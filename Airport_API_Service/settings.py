@@ -42,14 +42,19 @@ INSTALLED_APPS = [
     "django.contrib.sessions",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     "rest_framework",
     "rest_framework_simplejwt",
     "drf_spectacular",
     "airport",
     "user",
+    "ops",
 ]
 
 MIDDLEWARE = [
+    "ops.middleware.ServerTimingMiddleware",
+    "ops.nplusone.NPlusOneMiddleware",
+    "ops.profiling.ProfilerMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -79,22 +84,172 @@ TEMPLATES = [
 
 WSGI_APPLICATION = "Airport_API_Service.wsgi.application"
 
+TEST_RUNNER = "ops.test_runner.NPlusOneDiscoverRunner"
+
+# Repeated query shapes per request: "off", "warn" (log) or "raise".
+# The test runner always raises.
+NPLUSONE_MODE = "warn" if DEBUG else "off"
+NPLUSONE_THRESHOLD = 5
+
+# Staff can profile requests under these paths with ?_profile=1.
+PROFILER_PATH_PREFIXES = ("/api/airport/",)
+PROFILER_BUFFER_SIZE = 50
+PROFILER_STATS_LIMIT = 60
+
+# Unfiltered lists of tables bigger than this use the planner's row estimate
+# instead of COUNT(*).
+ESTIMATED_COUNT_THRESHOLD = 10000
+# How long API listings reuse a count above that threshold.
+PAGINATION_COUNT_CACHE_SECONDS = 30
+
+# Leave ticket and route validation on save to database constraints instead
+# of running full_clean() first.
+VALIDATE_IN_DATABASE = True
+
 
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
 
+# DB_CONN_MODE selects how connections are managed:
+#   "direct"     - a new connection per request (development default)
+#   "persistent" - connections are kept for DB_CONN_MAX_AGE seconds
+#   "pool"       - an in-process pool of DB_POOL_MIN_SIZE..DB_POOL_MAX_SIZE;
+#                  requests wait up to DB_POOL_TIMEOUT seconds for a free one
+#   "pgbouncer"  - persistent connections to a transaction-mode PgBouncer
+DB_CONN_MODE = os.environ.get("DB_CONN_MODE", "direct")
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "ops.db",
         "NAME": os.environ.get("POSTGRES_DB"),
         "USER": os.environ.get("POSTGRES_USER"),
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD"),
         "HOST": os.environ.get("POSTGRES_HOST"),
-        "PORT": "5432",
+        "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": DB_CONN_MODE != "direct",
+        "OPTIONS": {},
     }
 }
 
+if DB_CONN_MODE in ("persistent", "pgbouncer"):
+    DATABASES["default"]["CONN_MAX_AGE"] = int(
+        os.environ.get("DB_CONN_MAX_AGE", 60)
+    )
+if DB_CONN_MODE == "pgbouncer":
+    DATABASES["default"]["DISABLE_SERVER_SIDE_CURSORS"] = True
+if DB_CONN_MODE == "pool":
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+        "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", 10)),
+        "timeout": float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+    }
+
+# Read replicas, as a comma-separated list of hosts. Safe requests to the
+# airport API read from them; see ops.routers.
+DATABASE_REPLICAS = []
+for index, host in enumerate(
+    filter(None, os.environ.get("POSTGRES_REPLICA_HOSTS", "").split(","))
+):
+    alias = f"replica_{index}"
+    DATABASES[alias] = {
+        **DATABASES["default"],
+        "HOST": host.strip(),
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["ops.routers.ReplicaRouter"]
+REPLICA_APPS = ("airport",)
+# How long a user reads from the primary after a write.
+REPLICA_PIN_SECONDS = 10
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
+# Responses to order creation replayed for retries with the same
+# Idempotency-Key (stored in the database, see ops.idempotency), how long a
+# request may hold a key before another one can take it over, and how long
+# a retry waits for the first attempt.
+IDEMPOTENCY_TTL_SECONDS = 24 * 60 * 60
+IDEMPOTENCY_LOCK_SECONDS = 30
+IDEMPOTENCY_WAIT_SECONDS = 5
+
+# Token buckets per throttle scope, for authenticated users and for client
+# addresses: "rate" refills the bucket, "burst" is its size. See
+# ops.throttling; use a shared CACHE_BACKEND when running several processes.
+THROTTLE_BUCKETS = {
+    "flight_search": {
+        "user": {"rate": "5/s", "burst": 30},
+        "ip": {"rate": "20/s", "burst": 100},
+    },
+    "order_create": {
+        "user": {"rate": "30/min", "burst": 10},
+        "ip": {"rate": "120/min", "burst": 40},
+    },
+    # Opening seat streams, see airport.live.
+    "live_stream": {
+        "user": {"rate": "20/min", "burst": 10},
+    },
+}
+
+# Background jobs, see ops.jobs and "manage.py run_worker". JOB_QUEUES caps
+# the jobs of a queue running at once across all workers; JOB_SCHEDULE
+# enqueues a task when it has not been enqueued for "every" seconds.
+JOB_QUEUES = {"default": 8, "maintenance": 1}
+JOB_SCHEDULE = {
+    "airport.tasks.archive_flights": {"every": 24 * 60 * 60, "kwargs": {"days": 365}},
+    "airport.tasks.compact_changes": {"every": 60 * 60},
+    "ops.tasks.prune_idempotency_keys": {"every": 60 * 60},
+}
+JOB_POLL_SECONDS = 1
+JOB_HOUSEKEEPING_SECONDS = 60
+# Workers touch their running jobs this often; a job that has not been
+# touched for JOB_TIMEOUT_SECONDS is queued again.
+JOB_HEARTBEAT_SECONDS = 15
+JOB_TIMEOUT_SECONDS = 5 * 60
+JOB_RETRY_BASE_SECONDS = 5
+JOB_RETRY_MAX_SECONDS = 60 * 60
+JOB_KEEP_DONE_SECONDS = 7 * 24 * 60 * 60
+
+# Change feed, see airport.changes. Entries are kept (apart from superseded
+# ones) for the retention.
+CHANGE_FEED_RETENTION_SECONDS = 7 * 24 * 60 * 60
+CHANGE_FEED_MAX_LIMIT = 1000
+
+# Live seat maps, see airport.live. Every process with open streams polls
+# the change feed for seat changes and passes them to its streams through
+# the broker, so writes committed by other processes reach them too.
+PUBSUB_BROKER = "ops.pubsub.InProcessBroker"
+LIVE_POLL_SECONDS = 1
+LIVE_HEARTBEAT_SECONDS = 15
+LIVE_MAX_STREAM_SECONDS = 5 * 60
+LIVE_MAX_STREAMS_PER_USER = 5
+
+# POST /api/batch/, see ops.batch.
+BATCH_MAX_REQUESTS = 20
+BATCH_PATH_PREFIXES = ("/api/airport/", "/api/user/")
+
+# Built into the image by the Dockerfile, see ops.schema. Generated on the
+# first request when missing.
+OPENAPI_SCHEMA_FILE = BASE_DIR / "openapi-schema.json"
+
+AVAILABILITY_CACHE_SECONDS = 60
+AVAILABILITY_MAX_IDS = 500
+AUTOCOMPLETE_MAX_LIMIT = 50
+# See airport.autocomplete: how often each process looks for airport and
+# route changes, and how long it uses an index at most.
+AUTOCOMPLETE_CHECK_SECONDS = 5
+AUTOCOMPLETE_INDEX_TTL_SECONDS = 10 * 60
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -143,8 +298,12 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
         "rest_framework_simplejwt.authentication.JWTAuthentication",
     ),
+    "DEFAULT_THROTTLE_CLASSES": (
+        "ops.throttling.UserTokenBucketThrottle",
+        "ops.throttling.IPTokenBucketThrottle",
+    ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "ops.pagination.ApproximateCountPagination",
     "PAGE_SIZE": 20,
 }
 
@@ -15,14 +15,18 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 from django.urls import path, include
 
+from ops.batch import batch_view
+from ops.schema import redoc_view, schema_view, swagger_view
+
 urlpatterns = [
+    path("", include("ops.urls")),
     path("admin/", admin.site.urls),
     path("api/airport/", include("airport.urls")),
     path("api/user/", include("user.urls")),
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path("api/doc/swagger/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
-    path("api/doc/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    path("api/batch/", batch_view, name="batch"),
+    path("api/schema/", schema_view, name="schema"),
+    path("api/doc/swagger/", swagger_view, name="swagger-ui"),
+    path("api/doc/redoc/", redoc_view, name="redoc"),
 ]
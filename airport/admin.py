@@ -1,4 +1,8 @@
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db import transaction
+from django.forms.models import BaseInlineFormSet
+from django.utils.html import format_html, format_html_join
 
 from airport.models import (
     Crew,
@@ -10,22 +14,194 @@ from airport.models import (
     Order,
     Ticket
 )
+from airport.deletion import count_dependents, format_counts
+from airport.tasks import delete_with_dependents
+from ops.counting import EstimatedCountPaginator
+
+FLIGHT_RELATED = ("route__source", "route__destination", "airplane")
+TICKET_FLIGHT_RELATED = tuple(f"flight__{name}" for name in FLIGHT_RELATED)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ChunkedDeleteMixin:
+    """
+    Replaces "delete selected", which loads every dependent row, with
+    ``airport.deletion`` run by a background job and a dry run that only
+    counts them.
+    """
+
+    actions = ("preview_chunked_delete", "chunked_delete")
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+    @admin.action(
+        description="Preview deleting selected %(verbose_name_plural)s with their flights",
+        permissions=("delete",),
+    )
+    def preview_chunked_delete(self, request, queryset):
+        for obj in queryset:
+            self.message_user(
+                request, f"Would delete {obj}: {format_counts(count_dependents(obj))}"
+            )
+
+    @admin.action(
+        description="Delete selected %(verbose_name_plural)s with their flights",
+        permissions=("delete",),
+    )
+    def chunked_delete(self, request, queryset):
+        with transaction.atomic():
+            for obj in queryset:
+                delete_with_dependents.enqueue(model=obj._meta.label, pk=obj.pk)
+                self.message_user(request, f"Queued deletion of {obj}")
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Edits the ``page``-th ``per_page`` related objects only."""
+
+    per_page = 20
+    page = 1
+
+    def get_queryset(self):
+        if not hasattr(self, "_queryset"):
+            queryset = super().get_queryset()
+            start = (self.page - 1) * self.per_page
+            self._queryset = queryset[start:start + self.per_page]
+        return self._queryset
 
 
 class TicketInLine(admin.TabularInline):
+    """Existing tickets of the order, a page at a time."""
+
+    model = Ticket
+    formset = PaginatedInlineFormSet
+    fields = ("flight", "row", "seat")
+    readonly_fields = ("flight",)
+    extra = 0
+    per_page = 20
+    verbose_name_plural = "tickets"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*TICKET_FLIGHT_RELATED)
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.page = ticket_page(request)
+        return formset
+
+
+class NewTicketInLine(admin.TabularInline):
     model = Ticket
+    fields = ("flight", "row", "seat")
+    autocomplete_fields = ("flight",)
     extra = 1
+    verbose_name_plural = "new tickets"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).none()
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+def ticket_page(request):
+    try:
+        return max(1, int(request.GET.get("tickets_page", 1)))
+    except ValueError:
+        return 1
 
 
 @admin.register(Order)
-class OrderAdmin(admin.ModelAdmin):
-    inlines = (TicketInLine,)
+class OrderAdmin(LargeTableAdmin):
+    inlines = (TicketInLine, NewTicketInLine)
+    list_display = ("id", "created_at", "user")
+    list_select_related = ("user",)
+    search_fields = ("user__email",)
+    raw_id_fields = ("user",)
+    date_hierarchy = "created_at"
+    readonly_fields = ("ticket_pages",)
+
+    @admin.display(description="Ticket pages")
+    def ticket_pages(self, obj):
+        if obj.pk is None:
+            return "-"
+        paginator = Paginator(obj.tickets.order_by("pk"), TicketInLine.per_page)
+        if paginator.num_pages < 2:
+            return f"{paginator.count} tickets"
+        return format_html(
+            "{} tickets: {}",
+            paginator.count,
+            format_html_join(
+                " ",
+                '<a href="?tickets_page={0}">{0}</a>',
+                ((number,) for number in paginator.page_range),
+            ),
+        )
+
+
+@admin.register(Crew)
+class CrewAdmin(admin.ModelAdmin):
+    list_display = ("id", "first_name", "last_name")
+    search_fields = ("first_name", "last_name")
+
+
+@admin.register(Airport)
+class AirportAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
+    list_display = ("id", "name", "closest_big_city")
+    search_fields = ("name", "closest_big_city")
+
+
+@admin.register(Route)
+class RouteAdmin(ChunkedDeleteMixin, LargeTableAdmin):
+    list_display = ("id", "source", "destination", "distance")
+    list_select_related = ("source", "destination")
+    search_fields = ("source__name", "destination__name")
+    autocomplete_fields = ("source", "destination")
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("source", "destination")
+
+
+@admin.register(AirplaneType)
+class AirplaneTypeAdmin(admin.ModelAdmin):
+    search_fields = ("name",)
+
+
+@admin.register(Airplane)
+class AirplaneAdmin(ChunkedDeleteMixin, admin.ModelAdmin):
+    list_display = ("id", "name", "airplane_type", "rows", "seats_in_row")
+    list_select_related = ("airplane_type",)
+    search_fields = ("name",)
+    autocomplete_fields = ("airplane_type",)
+
+
+@admin.register(Flight)
+class FlightAdmin(LargeTableAdmin):
+    list_display = ("id", "route", "airplane", "departure_time", "arrival_time")
+    list_select_related = FLIGHT_RELATED
+    search_fields = ("route__source__name", "route__destination__name", "airplane__name")
+    autocomplete_fields = ("route", "airplane", "crews")
+    date_hierarchy = "departure_time"
+
+    def get_queryset(self, request):
+        # Autocomplete results are rendered with Flight.__str__ as well.
+        return super().get_queryset(request).select_related(*FLIGHT_RELATED)
 
 
-admin.site.register(Crew)
-admin.site.register(Airport)
-admin.site.register(Route)
-admin.site.register(AirplaneType)
-admin.site.register(Airplane)
-admin.site.register(Flight)
-admin.site.register(Ticket)
+@admin.register(Ticket)
+class TicketAdmin(LargeTableAdmin):
+    list_display = ("id", "flight", "row", "seat", "order")
+    list_select_related = TICKET_FLIGHT_RELATED + ("order",)
+    search_fields = ("flight__route__source__name", "flight__route__destination__name")
+    autocomplete_fields = ("flight",)
+    raw_id_fields = ("order",)
@@ -0,0 +1,122 @@
+"""
+Moving finished flights and their tickets out of the hot tables.
+
+``Flight`` and ``Ticket`` only hold current data, so availability counts,
+seat uniqueness checks and listings never scan history. Archived rows live in
+``ArchivedFlight``/``ArchivedTicket``, which PostgreSQL partitions by
+departure month; order history reads them alongside live tickets.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+from airport.models import ArchivedFlight, ArchivedTicket, Flight, Ticket
+
+PARTITIONED_TABLES = (
+    ArchivedFlight._meta.db_table,
+    ArchivedTicket._meta.db_table,
+)
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def next_month(moment):
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1)
+    return moment.replace(month=moment.month + 1)
+
+
+def previous_month(moment):
+    if moment.month == 1:
+        return moment.replace(year=moment.year - 1, month=12)
+    return moment.replace(month=moment.month - 1)
+
+
+def ensure_partitions(months):
+    """
+    Create the monthly partitions starting at each of ``months`` (first-of-
+    month datetimes). Returns the names of the tables that were created; a
+    no-op on databases without declarative partitioning.
+    """
+    if connection.vendor != "postgresql":
+        return []
+    created = []
+    with connection.cursor() as cursor:
+        for start in sorted(set(months)):
+            end = next_month(start)
+            for table in PARTITIONED_TABLES:
+                name = f"{table}_p{start:%Y_%m}"
+                cursor.execute("SELECT to_regclass(%s)", [name])
+                if cursor.fetchone()[0] is not None:
+                    continue
+                cursor.execute(
+                    f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+                    f"FOR VALUES FROM (%s) TO (%s)",
+                    [start, end],
+                )
+                created.append(name)
+    return created
+
+
+def archivable_flights(cutoff):
+    return Flight.objects.filter(arrival_time__lt=cutoff)
+
+
+def archive_batch(flight_ids):
+    """Copy the given flights and their tickets to the archive and delete them."""
+    flights = Flight.objects.filter(id__in=flight_ids).select_related(
+        "route__source", "route__destination", "airplane"
+    )
+    archived_flights = [
+        ArchivedFlight(
+            id=flight.id,
+            route=str(flight.route),
+            airplane=str(flight.airplane),
+            departure_time=flight.departure_time,
+            arrival_time=flight.arrival_time,
+        )
+        for flight in flights
+    ]
+    departures = {flight.id: flight.departure_time for flight in archived_flights}
+    archived_tickets = [
+        ArchivedTicket(
+            id=ticket_id,
+            row=row,
+            seat=seat,
+            flight_id=flight_id,
+            departure_time=departures[flight_id],
+            order_id=order_id,
+        )
+        for ticket_id, row, seat, flight_id, order_id in Ticket.objects.filter(
+            flight_id__in=departures
+        ).values_list("id", "row", "seat", "flight_id", "order_id")
+    ]
+    with transaction.atomic():
+        ensure_partitions(month_start(moment) for moment in departures.values())
+        ArchivedFlight.objects.bulk_create(archived_flights)
+        ArchivedTicket.objects.bulk_create(archived_tickets, batch_size=1000)
+        Ticket.objects.filter(flight_id__in=departures).delete()
+        Flight.crews.through.objects.filter(flight_id__in=departures).delete()
+        Flight.objects.filter(id__in=departures).delete()
+    return len(archived_flights), len(archived_tickets)
+
+
+def archive_before(cutoff, batch_size=200, progress=None):
+    """
+    Archive every flight that arrived before ``cutoff``, ``batch_size``
+    flights per transaction. Returns the numbers of flights and tickets moved.
+    """
+    flights = archivable_flights(cutoff).order_by("id").values_list("id", flat=True)
+    total_flights = total_tickets = 0
+    while True:
+        batch = list(flights[:batch_size])
+        if not batch:
+            break
+        moved_flights, moved_tickets = archive_batch(batch)
+        total_flights += moved_flights
+        total_tickets += moved_tickets
+        if progress is not None:
+            progress(total_flights)
+    return total_flights, total_tickets
@@ -0,0 +1,135 @@
+"""
+In-process prefix index for airport type-ahead.
+
+Every word-boundary suffix of an airport's name and closest big city is kept
+in a sorted list, so a prefix lookup is a bisect plus a short scan. Matches
+are ranked by how many routes use the airport.
+
+Each process builds its own index from the primary. Its version is the
+position of the latest airport and route entries in the change feed
+(``airport.changes``), which every process sees, so a lookup at most
+``AUTOCOMPLETE_CHECK_SECONDS`` after the last check compares it and rebuilds
+the index when airports or routes changed anywhere. Changes made by this
+process are checked on the next lookup, and an index is never used for longer
+than ``AUTOCOMPLETE_INDEX_TTL_SECONDS``.
+"""
+import heapq
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models import Count
+
+from airport import changes
+from airport.models import Airport, Change
+from ops.routers import primary_only
+
+_lock = threading.Lock()
+_index = None
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join(
+        "".join(char for char in text if not unicodedata.combining(char)).split()
+    )
+
+
+def terms(text):
+    words = normalize(text).split()
+    return {" ".join(words[i:]) for i in range(len(words))}
+
+
+class AirportIndex:
+    def __init__(self, airports, version=None):
+        self.version = version
+        self.built_at = self.checked_at = time.monotonic()
+        self.airports = {}
+        keys = set()
+        for airport_id, name, city, route_count in airports:
+            self.airports[airport_id] = {
+                "id": airport_id,
+                "name": name,
+                "closest_big_city": city,
+                "route_count": route_count,
+            }
+            keys.update((term, airport_id) for term in terms(name) | terms(city))
+        self.keys = sorted(keys)
+
+    def search(self, query, limit=10):
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        matches = set()
+        for key, airport_id in self.keys[bisect_left(self.keys, (prefix,)):]:
+            if not key.startswith(prefix):
+                break
+            matches.add(airport_id)
+        return heapq.nsmallest(
+            limit,
+            (self.airports[airport_id] for airport_id in matches),
+            key=lambda airport: (-airport["route_count"], airport["name"]),
+        )
+
+
+def build_index(version=None):
+    airports = Airport.objects.annotate(
+        route_count=Count("departures", distinct=True)
+        + Count("arrivals", distinct=True)
+    ).values_list("id", "name", "closest_big_city", "route_count")
+    return AirportIndex(airports, version)
+
+
+def current_version():
+    changes.sequence()
+    return tuple(
+        Change.objects.filter(kind=kind, position__isnull=False)
+        .order_by("-position")
+        .values_list("position", flat=True)
+        .first()
+        for kind in (Change.AIRPORT, Change.ROUTE)
+    )
+
+
+def invalidate():
+    """Compare the version on the next lookup in this process."""
+    index = _index
+    if index is not None:
+        index.checked_at = None
+
+
+def is_fresh(index, now):
+    return (
+        index is not None
+        and index.checked_at is not None
+        and now - index.checked_at < settings.AUTOCOMPLETE_CHECK_SECONDS
+        and now - index.built_at < settings.AUTOCOMPLETE_INDEX_TTL_SECONDS
+    )
+
+
+def get_index():
+    global _index
+    index = _index
+    if is_fresh(index, time.monotonic()):
+        return index
+    with _lock:
+        now = time.monotonic()
+        if is_fresh(_index, now):
+            return _index
+        # Replicas may lag behind the change that triggered the rebuild.
+        with primary_only():
+            version = current_version()
+            if (
+                _index is None
+                or _index.version != version
+                or now - _index.built_at >= settings.AUTOCOMPLETE_INDEX_TTL_SECONDS
+            ):
+                _index = build_index(version)
+        _index.checked_at = now
+        return _index
+
+
+def search_airports(query, limit=10):
+    return get_index().search(query, limit)
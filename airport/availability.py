@@ -0,0 +1,80 @@
+"""
+Seat availability for many flights at once.
+
+Counts are cached per flight for ``AVAILABILITY_CACHE_SECONDS``; flights
+missing from the cache are counted in a single aggregate query on the
+primary, so a replica that has not applied the latest booking yet cannot put
+an old count back. Ticket, flight and airplane changes move the affected
+flights to a new cache key version once they commit (see ``airport.signals``),
+so a count taken before the change is stored under a key nobody reads.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F
+
+from airport.models import Flight
+from ops.routers import primary_only
+
+
+def version_key(flight_id):
+    return f"availability-version:{flight_id}"
+
+
+def cache_key(flight_id, version):
+    return f"availability:{flight_id}:{version}"
+
+
+def versions(flight_ids):
+    found = cache.get_many([version_key(flight_id) for flight_id in flight_ids])
+    return {flight_id: found.get(version_key(flight_id), 0) for flight_id in flight_ids}
+
+
+def invalidate(flight_ids):
+    # Outlives every count stored under the previous version.
+    cache.set_many(
+        {version_key(flight_id): time.time_ns() for flight_id in flight_ids},
+        settings.AVAILABILITY_CACHE_SECONDS * 10,
+    )
+
+
+def count_availability(flight_ids):
+    """``flight_availability`` straight from the database, in one query."""
+    counted = (
+        Flight.objects.filter(id__in=flight_ids)
+        .annotate(
+            capacity=F("airplane__rows") * F("airplane__seats_in_row"),
+            sold=Count("tickets"),
+        )
+        .values_list("id", "capacity", "sold")
+    )
+    return {
+        flight_id: (capacity, capacity - sold)
+        for flight_id, capacity, sold in counted
+    }
+
+
+def flight_availability(flight_ids):
+    """
+    Map each existing flight in ``flight_ids`` to a ``(capacity,
+    tickets_available)`` pair. Unknown ids are left out.
+    """
+    keys = {
+        flight_id: cache_key(flight_id, version)
+        for flight_id, version in versions(set(flight_ids)).items()
+    }
+    cached = cache.get_many(list(keys.values()))
+    availability = {
+        flight_id: tuple(cached[key]) for flight_id, key in keys.items() if key in cached
+    }
+    missing = keys.keys() - availability.keys()
+    if missing:
+        with primary_only():
+            fresh = count_availability(missing)
+        cache.set_many(
+            {keys[flight_id]: value for flight_id, value in fresh.items()},
+            settings.AVAILABILITY_CACHE_SECONDS,
+        )
+        availability.update(fresh)
+    return availability
@@ -0,0 +1,171 @@
+"""
+Change feed of flights, routes, airports and seat availability.
+
+Writes mark the objects they touch with ``record()``, which inserts a
+pending ``Change`` entry in the writing transaction: the entry commits, or
+rolls back, with the writes, and a crash after the commit cannot lose it.
+
+Pending entries have no position yet. ``sequence()`` runs before the feed is
+read: under a lock held until it commits, it gives the committed pending
+entries the next positions in id order, together with the state of their
+objects at that moment, an upsert with its data or a deletion if it is gone.
+The position is the cursor of ``/api/airport/changes/?since=``. Positions
+are assigned by one transaction at a time, after the entries committed, so a
+consumer never sees a higher one before a lower one and cannot skip entries
+however long a writer takes to commit. Since the data is read when the entry
+is sequenced, later positions of an object never carry older data.
+
+``compact()`` drops entries superseded by a newer one for the same object and
+everything older than ``CHANGE_FEED_RETENTION_SECONDS``. Cursors older than
+the last dropped entry have expired and need a full resync.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from airport import availability
+from airport.models import Airport, Change, ChangeCompaction, Flight, Route
+from ops.routers import primary_only
+
+
+FEED_LOCK = "airport_change_feed"
+SEQUENCE_BATCH_SIZE = 1000
+
+
+class CursorExpired(Exception):
+    pass
+
+
+def snapshot(kind, object_ids):
+    """Current data of the given objects of ``kind`` that still exist, by id."""
+    if kind == Change.FLIGHT:
+        rows = Flight.objects.filter(id__in=object_ids).values(
+            "id", "route_id", "airplane_id", "departure_time", "arrival_time"
+        )
+    elif kind == Change.ROUTE:
+        rows = Route.objects.filter(id__in=object_ids).values(
+            "id", "source_id", "destination_id", "distance"
+        )
+    elif kind == Change.AIRPORT:
+        rows = Airport.objects.filter(id__in=object_ids).values(
+            "id", "name", "closest_big_city"
+        )
+    else:
+        return {
+            flight_id: {"capacity": capacity, "tickets_available": available}
+            for flight_id, (capacity, available) in availability.count_availability(
+                object_ids
+            ).items()
+        }
+    return {row["id"]: row for row in rows}
+
+
+def record(kind, object_ids):
+    """
+    Mark ``object_ids`` as changed. The entries are written by the current
+    transaction, so they commit or roll back together with the writes.
+    """
+    Change.objects.bulk_create(
+        [Change(kind=kind, object_id=object_id) for object_id in sorted(set(object_ids))]
+    )
+
+
+def lock_feed(using):
+    """Serialize sequencing; SQLite already serializes every writer."""
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [FEED_LOCK])
+
+
+def sequence(batch_size=SEQUENCE_BATCH_SIZE):
+    """
+    Give committed entries without a position the next positions, with the
+    current data of their objects. Returns how many were sequenced.
+    """
+    using = router.db_for_write(Change)
+    sequenced = 0
+    with primary_only():
+        while True:
+            with transaction.atomic(using=using):
+                lock_feed(using)
+                pending = list(
+                    Change.objects.using(using)
+                    .filter(position__isnull=True)
+                    .order_by("id")[:batch_size]
+                )
+                if not pending:
+                    break
+                # Entries marked again before being sequenced get one position.
+                latest = {(entry.kind, entry.object_id): entry for entry in pending}
+                Change.objects.using(using).filter(
+                    id__in=[entry.id for entry in pending]
+                ).exclude(id__in=[entry.id for entry in latest.values()]).delete()
+                last = Change.objects.using(using).aggregate(last=Max("position"))["last"]
+                position = max(last or 0, horizon())
+                entries = sorted(latest.values(), key=lambda entry: entry.id)
+                current = {}
+                for kind in {entry.kind for entry in entries}:
+                    current[kind] = snapshot(
+                        kind, [entry.object_id for entry in entries if entry.kind == kind]
+                    )
+                for entry in entries:
+                    position += 1
+                    entry.position = position
+                    entry.data = current[entry.kind].get(entry.object_id)
+                    entry.action = Change.DELETE if entry.data is None else Change.UPSERT
+                Change.objects.using(using).bulk_update(
+                    entries, ["position", "action", "data"]
+                )
+                sequenced += len(entries)
+            if len(pending) < batch_size:
+                break
+    return sequenced
+
+
+def horizon():
+    return ChangeCompaction.objects.aggregate(horizon=Max("horizon"))["horizon"] or 0
+
+
+def head():
+    """The cursor to resume from after a full resync."""
+    sequence()
+    return Change.objects.aggregate(head=Max("position"))["head"] or horizon()
+
+
+def changes_since(cursor, limit):
+    """
+    Up to ``limit`` entries after ``cursor`` and whether more are ready.
+    Raises ``CursorExpired`` when entries after it were dropped.
+    """
+    sequence()
+    if cursor < horizon():
+        raise CursorExpired
+    entries = list(Change.objects.filter(position__gt=cursor).order_by("position")[:limit + 1])
+    return entries[:limit], len(entries) > limit
+
+
+def compact():
+    """Drop superseded and expired entries. Returns the ``ChangeCompaction``."""
+    sequence()
+    now = timezone.now()
+    sequenced = Change.objects.filter(position__isnull=False)
+    newer = sequenced.filter(
+        kind=OuterRef("kind"),
+        object_id=OuterRef("object_id"),
+        position__gt=OuterRef("position"),
+    )
+    superseded = sequenced.filter(Exists(newer)).delete()[0]
+    expired = sequenced.filter(
+        created_at__lt=now - timedelta(seconds=settings.CHANGE_FEED_RETENTION_SECONDS)
+    )
+    last_expired = expired.aggregate(last=Max("position"))["last"]
+    expired = expired.delete()[0]
+    return ChangeCompaction.objects.create(
+        superseded=superseded,
+        expired=expired,
+        horizon=max(last_expired or 0, horizon()),
+    )
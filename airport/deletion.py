@@ -0,0 +1,165 @@
+"""
+Deleting airports, routes and airplanes without Django's collector.
+
+``Model.delete()`` loads every dependent route, flight and ticket and sends
+signals for each. Here the dependents are removed bottom-up (tickets, then
+crew assignments and flights, then routes) with plain ``DELETE``
+statements, ``chunk_size`` rows per transaction, so memory stays flat and
+locks are held briefly. The caches the skipped signals would have cleared
+are cleared, and the change feed entries they would have written are
+recorded, explicitly.
+
+Writes can add tickets, flights and routes while this runs. Each chunk locks
+the rows it deletes so nothing new can point at them, rows that gained
+dependents are left for the next round, and the object itself is only
+deleted, locked, once nothing depends on it.
+"""
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+
+from airport import autocomplete, availability, changes
+from airport.models import Airplane, Airport, Change, Flight, Route, Ticket
+
+FlightCrew = Flight.crews.through
+
+
+def raw_delete(queryset):
+    """``DELETE`` the rows of ``queryset`` without loading them or sending signals."""
+    return queryset._raw_delete(queryset.db)
+
+
+def dependents(obj):
+    """The flights and routes that have to go before ``obj``."""
+    if isinstance(obj, Airport):
+        return (
+            Flight.objects.filter(Q(route__source=obj) | Q(route__destination=obj)),
+            Route.objects.filter(Q(source=obj) | Q(destination=obj)),
+        )
+    if isinstance(obj, Route):
+        return Flight.objects.filter(route=obj), Route.objects.none()
+    if isinstance(obj, Airplane):
+        return Flight.objects.filter(airplane=obj), Route.objects.none()
+    raise TypeError(f"Chunked deletion does not support {type(obj).__name__}")
+
+
+def count_dependents(obj):
+    """Rows that ``delete_in_chunks(obj)`` would remove, by model label."""
+    flights, routes = dependents(obj)
+    return {
+        Ticket._meta.label: Ticket.objects.filter(flight__in=flights).count(),
+        FlightCrew._meta.label: FlightCrew.objects.filter(flight__in=flights).count(),
+        Flight._meta.label: flights.count(),
+        Route._meta.label: routes.count(),
+        obj._meta.label: 1,
+    }
+
+
+def format_counts(counts):
+    return ", ".join(f"{label}: {count}" for label, count in counts.items())
+
+
+def delete_tickets(tickets):
+    """Delete tickets given as ``(id, flight_id)`` pairs."""
+    ticket_ids = [ticket_id for ticket_id, _ in tickets]
+    flight_ids = sorted({flight_id for _, flight_id in tickets})
+    with transaction.atomic():
+        deleted = {Ticket._meta.label: raw_delete(Ticket.objects.filter(id__in=ticket_ids))}
+        transaction.on_commit(lambda: availability.invalidate(flight_ids))
+        changes.record(Change.AVAILABILITY, flight_ids)
+    return deleted
+
+
+def delete_flights(flight_ids):
+    with transaction.atomic():
+        # Locked rows take no new tickets or crew assignments.
+        flight_ids = list(
+            Flight.objects.select_for_update()
+            .filter(id__in=flight_ids)
+            .values_list("id", flat=True)
+        )
+        deleted = {
+            Ticket._meta.label: raw_delete(Ticket.objects.filter(flight_id__in=flight_ids)),
+            FlightCrew._meta.label: raw_delete(
+                FlightCrew.objects.filter(flight_id__in=flight_ids)
+            ),
+            Flight._meta.label: raw_delete(Flight.objects.filter(id__in=flight_ids)),
+        }
+        transaction.on_commit(lambda: availability.invalidate(flight_ids))
+        changes.record(Change.FLIGHT, flight_ids)
+        changes.record(Change.AVAILABILITY, flight_ids)
+    return deleted
+
+
+def delete_routes(routes, chunk_size, add):
+    """Delete a chunk of ``routes`` without flights. Returns whether any went."""
+    with transaction.atomic():
+        # Locked rows take no new flights.
+        route_ids = list(
+            routes.select_for_update()
+            .filter(~Exists(Flight.objects.filter(route=OuterRef("pk"))))
+            .order_by("id")
+            .values_list("id", flat=True)[:chunk_size]
+        )
+        # Flights committed while the lock was awaited are only visible to a
+        # new statement.
+        route_ids = list(
+            Route.objects.filter(id__in=route_ids)
+            .filter(~Exists(Flight.objects.filter(route=OuterRef("pk"))))
+            .values_list("id", flat=True)
+        )
+        if not route_ids:
+            return False
+        add({Route._meta.label: raw_delete(Route.objects.filter(id__in=route_ids))})
+        changes.record(Change.ROUTE, route_ids)
+    return True
+
+
+def delete_in_chunks(obj, chunk_size=500, progress=None):
+    """
+    Delete ``obj`` and everything depending on it. Returns the deleted row
+    counts by model label; ``progress`` is called with them after each chunk.
+    """
+    flights, routes = dependents(obj)
+    totals = dict.fromkeys(
+        (model._meta.label for model in (Ticket, FlightCrew, Flight, Route, type(obj))),
+        0,
+    )
+
+    def add(deleted):
+        for label, count in deleted.items():
+            totals[label] += count
+        if progress is not None:
+            progress(totals)
+
+    tickets = Ticket.objects.filter(flight__in=flights)
+    while True:
+        while True:
+            chunk = list(
+                tickets.order_by("id").values_list("id", "flight_id")[:chunk_size]
+            )
+            if not chunk:
+                break
+            add(delete_tickets(chunk))
+        while True:
+            flight_ids = list(
+                flights.order_by("id").values_list("id", flat=True)[:chunk_size]
+            )
+            if not flight_ids:
+                break
+            add(delete_flights(flight_ids))
+        while delete_routes(routes, chunk_size, add):
+            pass
+        with transaction.atomic():
+            list(type(obj).objects.select_for_update().filter(pk=obj.pk).values("pk"))
+            if flights.exists() or routes.exists():
+                # Added since the loops above; nothing new can be added now.
+                continue
+            add({obj._meta.label: raw_delete(type(obj).objects.filter(pk=obj.pk))})
+            if isinstance(obj, Airport):
+                changes.record(Change.AIRPORT, [obj.pk])
+            elif isinstance(obj, Route):
+                changes.record(Change.ROUTE, [obj.pk])
+        break
+    if isinstance(obj, (Airport, Route)):
+        autocomplete.invalidate()
+    return totals
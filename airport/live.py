@@ -0,0 +1,257 @@
+"""
+Seat availability pushed to seat-selection pages over Server-Sent Events.
+
+``GET /api/airport/flights/<id>/seats/stream/`` sends the flight's seat map
+right away and again whenever a transaction that sold or released its seats
+commits. The view is async: an idle client is one open socket and one
+``ops.pubsub`` subscription on the event loop, not a thread. Streams end
+after ``LIVE_MAX_STREAM_SECONDS`` and clients reconnect, which spreads them
+over restarted or new processes. It needs an ASGI server
+(``Airport_API_Service.asgi``); under WSGI the stream would never finish.
+
+Writes can commit in any process, so seat changes are not taken from the
+committing process. While a process has open streams, ``ChangePoller``
+follows the change feed (``airport.changes``) from its position when the
+first stream opened, every ``LIVE_POLL_SECONDS``, builds the seat map of
+each changed flight somebody streams once, and publishes it to that
+process's broker. The database sees one small query per process and
+interval, however many clients are connected.
+
+Opening streams takes a token from the ``live_stream`` bucket of
+``THROTTLE_BUCKETS``, and a user can hold at most
+``LIVE_MAX_STREAMS_PER_USER`` streams per process. The view reserves the
+slot when it accepts the request; ``SeatStream`` gives it back when the
+events end or the response is closed without being iterated.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import Counter
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import APIException
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from airport import availability, changes
+from airport.models import Change, Flight, Ticket
+from ops.pubsub import CLOSED, get_broker
+from ops.throttling import throttle_wait
+
+logger = logging.getLogger(__name__)
+
+# Tells EventSource clients how long to wait before reconnecting, in ms.
+RETRY_MILLISECONDS = 3000
+
+
+def channel(flight_id):
+    return f"flight-seats:{flight_id}"
+
+
+def seat_maps(flight_ids):
+    """Capacity, free seats and taken seats of each existing flight, by id."""
+    maps = {
+        flight_id: {
+            "flight": flight_id,
+            "capacity": capacity,
+            "tickets_available": available,
+            "taken_place": [],
+        }
+        for flight_id, (capacity, available) in availability.count_availability(
+            flight_ids
+        ).items()
+    }
+    taken = Ticket.objects.filter(flight_id__in=maps).order_by("row", "seat")
+    for flight_id, row, seat in taken.values_list("flight_id", "row", "seat"):
+        maps[flight_id]["taken_place"].append({"row": row, "seat": seat})
+    return maps
+
+
+def deleted(flight_id):
+    return {"flight": flight_id, "deleted": True}
+
+
+class ChangePoller:
+    """Publishes seat maps from the change feed while streams are open."""
+
+    def __init__(self):
+        self.streams = 0
+        self.task = None
+        self.cursor = None
+        self.ready = None
+
+    def start(self):
+        """Count a new stream and run the poller on its loop."""
+        self.streams += 1
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.cursor = None
+            self.ready = asyncio.Event()
+            self.task = loop.create_task(self.run())
+
+    def stop(self):
+        self.streams -= 1
+
+    async def wait_ready(self):
+        """Wait until changes from now on will be published."""
+        await self.ready.wait()
+
+    async def run(self):
+        try:
+            self.cursor = await sync_to_async(changes.head)()
+        finally:
+            self.ready.set()
+        while self.streams > 0:
+            await asyncio.sleep(settings.LIVE_POLL_SECONDS)
+            try:
+                await sync_to_async(self.poll)()
+            except Exception:
+                # Streams keep their last state until the next poll works.
+                logger.exception("Polling seat changes failed")
+
+    def poll(self):
+        broker = get_broker()
+        if self.cursor is None:
+            self.cursor = changes.head()
+            return
+        changes.sequence()
+        entries = list(
+            Change.objects.filter(position__gt=self.cursor)
+            .order_by("position")
+            .values_list("position", "kind", "object_id")[:settings.CHANGE_FEED_MAX_LIMIT]
+        )
+        if not entries:
+            return
+        self.cursor = entries[-1][0]
+        flight_ids = sorted({
+            flight_id
+            for _, kind, flight_id in entries
+            if kind == Change.AVAILABILITY and broker.has_subscribers(channel(flight_id))
+        })
+        if not flight_ids:
+            return
+        maps = seat_maps(flight_ids)
+        for flight_id in flight_ids:
+            broker.publish(channel(flight_id), maps.get(flight_id) or deleted(flight_id))
+
+
+poller = ChangePoller()
+
+# Open streams per user id in this process.
+_user_streams = Counter()
+_user_streams_lock = threading.Lock()
+
+
+def sse_event(data):
+    return f"event: seats\ndata: {json.dumps(data)}\n\n"
+
+
+def authenticated_user(request):
+    result = JWTAuthentication().authenticate(request)
+    return None if result is None else result[0]
+
+
+def reserve_stream(user_id):
+    """Take one of the user's stream slots; False when all are taken."""
+    with _user_streams_lock:
+        if _user_streams[user_id] >= settings.LIVE_MAX_STREAMS_PER_USER:
+            return False
+        _user_streams[user_id] += 1
+        return True
+
+
+def release_stream(user_id):
+    with _user_streams_lock:
+        _user_streams[user_id] -= 1
+        if _user_streams[user_id] <= 0:
+            del _user_streams[user_id]
+
+
+class SeatStream:
+    """
+    The events of one stream, holding a reserved slot of its user. The slot
+    is released once: when the events end, or when the response is closed,
+    which Django also does for responses that were never iterated.
+    """
+
+    def __init__(self, flight_id, user_id):
+        self.flight_id = flight_id
+        self.user_id = user_id
+        self.released = False
+        self.lock = threading.Lock()
+
+    def __aiter__(self):
+        return seat_events(self.flight_id, self)
+
+    def close(self):
+        with self.lock:
+            if self.released:
+                return
+            self.released = True
+        release_stream(self.user_id)
+
+
+async def seat_events(flight_id, stream):
+    subscription = get_broker().subscribe(channel(flight_id))
+    poller.start()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.LIVE_MAX_STREAM_SECONDS
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        await poller.wait_ready()
+        maps = await sync_to_async(seat_maps)([flight_id])
+        message = maps.get(flight_id) or deleted(flight_id)
+        while True:
+            yield sse_event(message)
+            if message.get("deleted"):
+                return
+            message = None
+            while message is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return
+                try:
+                    message = await asyncio.wait_for(
+                        subscription.get(),
+                        min(remaining, settings.LIVE_HEARTBEAT_SECONDS),
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection.
+                    yield ": keep-alive\n\n"
+            if message is CLOSED:
+                return
+    finally:
+        subscription.close()
+        poller.stop()
+        stream.close()
+
+
+def too_many_requests(detail, wait):
+    return JsonResponse(
+        {"detail": detail}, status=429, headers={"Retry-After": str(max(1, round(wait)))}
+    )
+
+
+async def flight_seats_stream(request, pk):
+    try:
+        user = await sync_to_async(authenticated_user)(request)
+    except APIException as error:
+        return JsonResponse({"detail": str(error.detail)}, status=error.status_code)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."}, status=401
+        )
+    wait = await sync_to_async(throttle_wait)("live_stream", "user", user.pk)
+    if wait:
+        return too_many_requests("Request was throttled.", wait)
+    if not await Flight.objects.filter(pk=pk).aexists():
+        return JsonResponse({"detail": "Not found."}, status=404)
+    if not reserve_stream(user.pk):
+        return too_many_requests("Too many open streams.", RETRY_MILLISECONDS / 1000)
+    return StreamingHttpResponse(
+        SeatStream(pk, user.pk),
+        content_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from airport.archive import archivable_flights, archive_before
+from airport.models import Ticket
+
+
+class Command(BaseCommand):
+    """Move flights that arrived before a cutoff, with their tickets, to the archive"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="Archive flights that arrived more than this many days ago.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=200,
+            help="Flights moved per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many flights and tickets would be moved.",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        flights = archivable_flights(cutoff)
+        if options["dry_run"]:
+            self.stdout.write(
+                f"Would archive {flights.count()} flights and "
+                f"{Ticket.objects.filter(flight__in=flights).count()} tickets "
+                f"that arrived before {cutoff:%Y-%m-%d %H:%M}"
+            )
+            return
+
+        total_flights, total_tickets = archive_before(
+            cutoff,
+            batch_size=options["batch_size"],
+            progress=lambda moved: self.stdout.write(f"Archived {moved} flights..."),
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Archived {total_flights} flights and {total_tickets} tickets"
+            )
+        )
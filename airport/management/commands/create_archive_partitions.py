@@ -0,0 +1,39 @@
+from django.core.management import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from airport.archive import ensure_partitions, month_start, next_month, previous_month
+
+
+class Command(BaseCommand):
+    """Create monthly archive partitions ahead of time"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=3,
+            help="Number of months to create, starting with the current one.",
+        )
+        parser.add_argument(
+            "--back",
+            type=int,
+            default=0,
+            help="Also create this many past months (before archiving history).",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            self.stdout.write("Partitioning is only used on PostgreSQL, nothing to do.")
+            return
+        month = month_start(timezone.now())
+        for _ in range(options["back"]):
+            month = previous_month(month)
+        months = []
+        for _ in range(options["back"] + options["months"]):
+            months.append(month)
+            month = next_month(month)
+        created = ensure_partitions(months)
+        for name in created:
+            self.stdout.write(f"Created {name}")
+        self.stdout.write(self.style.SUCCESS(f"{len(created)} partitions created"))
@@ -0,0 +1,47 @@
+from django.core.management import BaseCommand, CommandError
+
+from airport.deletion import count_dependents, delete_in_chunks, format_counts
+from airport.models import Airplane, Airport, Route
+
+MODELS = {"airport": Airport, "route": Route, "airplane": Airplane}
+
+
+class Command(BaseCommand):
+    """Delete airports, routes or airplanes with their flights and tickets, chunk by chunk"""
+
+    def add_arguments(self, parser):
+        parser.add_argument("model", choices=sorted(MODELS))
+        parser.add_argument("ids", nargs="+", type=int)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows of each model would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        model = MODELS[options["model"]]
+        objects = model.objects.in_bulk(options["ids"])
+        missing = sorted(set(options["ids"]) - objects.keys())
+        if missing:
+            raise CommandError(
+                f"No {options['model']} with id {', '.join(map(str, missing))}"
+            )
+        for obj in objects.values():
+            name = str(obj)
+            if options["dry_run"]:
+                self.stdout.write(f"Would delete {name}: {format_counts(count_dependents(obj))}")
+                continue
+            totals = delete_in_chunks(
+                obj,
+                chunk_size=options["chunk_size"],
+                progress=lambda counts: self.stdout.write(
+                    f"Deleted {format_counts(counts)}..."
+                ),
+            )
+            self.stdout.write(self.style.SUCCESS(f"Deleted {name}: {format_counts(totals)}"))
@@ -1,20 +1,61 @@
 import time
+
+from django.core.management import BaseCommand, CommandError
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management import BaseCommand
 
 
 class Command(BaseCommand):
     """Django command to pause execution until db is available"""
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--database",
+            default="default",
+            help="Database alias to wait for.",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=60,
+            help="Give up after this many seconds.",
+        )
+        parser.add_argument(
+            "--max-delay",
+            type=float,
+            default=5,
+            help="Upper bound for the delay between attempts.",
+        )
+
+    def check_database(self, alias):
+        connection = connections[alias]
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+        except OperationalError:
+            connection.close()
+            raise
+
     def handle(self, *args, **options):
         self.stdout.write("Waiting for database...")
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options["timeout"]
+        delay = 0.1
+        while True:
             try:
-                db_conn = connections["default"]
+                self.check_database(options["database"])
+                break
             except OperationalError:
-                self.stdout.write("Database unavailable, waiting 1 second...")
-                time.sleep(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        f"Database unavailable after {options['timeout']} seconds"
+                    )
+                delay = min(delay, remaining)
+                self.stdout.write(
+                    f"Database unavailable, waiting {delay:.1f} seconds..."
+                )
+                time.sleep(delay)
+                delay = min(delay * 2, options["max_delay"])
 
         self.stdout.write(self.style.SUCCESS("Database available!"))
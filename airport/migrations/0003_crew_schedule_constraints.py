@@ -0,0 +1,126 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX airport_flight_period_gist
+    ON airport_flight USING gist (tstzrange(departure_time, arrival_time))
+    """,
+    """
+    CREATE FUNCTION airport_check_crew_overlap() RETURNS trigger AS $$
+    BEGIN
+        IF TG_TABLE_NAME = 'airport_flight_crews' THEN
+            PERFORM pg_advisory_xact_lock(NEW.crew_id);
+            IF EXISTS (
+                SELECT 1
+                FROM airport_flight_crews other
+                JOIN airport_flight f ON f.id = other.flight_id
+                JOIN airport_flight assigned ON assigned.id = NEW.flight_id
+                WHERE other.crew_id = NEW.crew_id
+                  AND other.flight_id <> NEW.flight_id
+                  AND tstzrange(f.departure_time, f.arrival_time)
+                      && tstzrange(assigned.departure_time, assigned.arrival_time)
+            ) THEN
+                RAISE EXCEPTION 'crew_double_booked' USING ERRCODE = '23P01';
+            END IF;
+        ELSIF EXISTS (
+            SELECT 1
+            FROM airport_flight_crews mine
+            JOIN airport_flight_crews other
+              ON other.crew_id = mine.crew_id AND other.flight_id <> mine.flight_id
+            JOIN airport_flight f ON f.id = other.flight_id
+            WHERE mine.flight_id = NEW.id
+              AND tstzrange(f.departure_time, f.arrival_time)
+                  && tstzrange(NEW.departure_time, NEW.arrival_time)
+        ) THEN
+            RAISE EXCEPTION 'crew_double_booked' USING ERRCODE = '23P01';
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER airport_flight_crews_no_overlap
+    BEFORE INSERT OR UPDATE ON airport_flight_crews
+    FOR EACH ROW EXECUTE FUNCTION airport_check_crew_overlap()
+    """,
+    """
+    CREATE TRIGGER airport_flight_crew_no_overlap
+    BEFORE UPDATE OF departure_time, arrival_time ON airport_flight
+    FOR EACH ROW EXECUTE FUNCTION airport_check_crew_overlap()
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP TRIGGER IF EXISTS airport_flight_crew_no_overlap ON airport_flight",
+    "DROP TRIGGER IF EXISTS airport_flight_crews_no_overlap ON airport_flight_crews",
+    "DROP FUNCTION IF EXISTS airport_check_crew_overlap()",
+    "DROP INDEX IF EXISTS airport_flight_period_gist",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE TRIGGER airport_flight_crews_no_overlap
+    BEFORE INSERT ON airport_flight_crews
+    WHEN EXISTS (
+        SELECT 1
+        FROM airport_flight_crews other
+        JOIN airport_flight f ON f.id = other.flight_id
+        JOIN airport_flight assigned ON assigned.id = NEW.flight_id
+        WHERE other.crew_id = NEW.crew_id
+          AND other.flight_id <> NEW.flight_id
+          AND f.departure_time < assigned.arrival_time
+          AND assigned.departure_time < f.arrival_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'crew_double_booked');
+    END
+    """,
+    """
+    CREATE TRIGGER airport_flight_crew_no_overlap
+    BEFORE UPDATE OF departure_time, arrival_time ON airport_flight
+    WHEN EXISTS (
+        SELECT 1
+        FROM airport_flight_crews mine
+        JOIN airport_flight_crews other
+          ON other.crew_id = mine.crew_id AND other.flight_id <> mine.flight_id
+        JOIN airport_flight f ON f.id = other.flight_id
+        WHERE mine.flight_id = NEW.id
+          AND f.departure_time < NEW.arrival_time
+          AND NEW.departure_time < f.arrival_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'crew_double_booked');
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS airport_flight_crew_no_overlap",
+    "DROP TRIGGER IF EXISTS airport_flight_crews_no_overlap",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+    "sqlite": (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run(direction):
+    def operation(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        if statements:
+            for sql in statements[direction]:
+                schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0002_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
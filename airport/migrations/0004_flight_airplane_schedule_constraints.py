@@ -0,0 +1,97 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:18
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+# SQLite rebuilds airport_flight to add the check constraint, which fails
+# while triggers from 0003 refer to it, so they are dropped around it.
+crew_triggers = import_module("airport.migrations.0003_crew_schedule_constraints")
+
+POSTGRESQL_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    """
+    ALTER TABLE airport_flight
+    ADD CONSTRAINT airport_flight_airplane_no_overlap
+    EXCLUDE USING gist (
+        airplane_id WITH =,
+        tstzrange(departure_time, arrival_time) WITH &&
+    )
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    """
+    ALTER TABLE airport_flight
+    DROP CONSTRAINT IF EXISTS airport_flight_airplane_no_overlap
+    """,
+]
+
+SQLITE_AIRPLANE_OVERLAP = """
+    WHEN EXISTS (
+        SELECT 1
+        FROM airport_flight other
+        WHERE other.airplane_id = NEW.airplane_id
+          AND other.id <> NEW.id
+          AND other.departure_time < NEW.arrival_time
+          AND NEW.departure_time < other.arrival_time
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'airplane_double_booked');
+    END
+"""
+
+SQLITE_FORWARD = [
+    "CREATE TRIGGER airport_flight_airplane_no_overlap_insert "
+    "BEFORE INSERT ON airport_flight" + SQLITE_AIRPLANE_OVERLAP,
+    "CREATE TRIGGER airport_flight_airplane_no_overlap_update "
+    "BEFORE UPDATE OF airplane_id, departure_time, arrival_time "
+    "ON airport_flight" + SQLITE_AIRPLANE_OVERLAP,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS airport_flight_airplane_no_overlap_update",
+    "DROP TRIGGER IF EXISTS airport_flight_airplane_no_overlap_insert",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+    "sqlite": (
+        crew_triggers.SQLITE_FORWARD + SQLITE_FORWARD,
+        SQLITE_BACKWARD + crew_triggers.SQLITE_BACKWARD,
+    ),
+}
+
+
+def execute(statements):
+    def operation(apps, schema_editor):
+        for sql in statements.get(schema_editor.connection.vendor, ()):
+            schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0003_crew_schedule_constraints"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            execute({"sqlite": crew_triggers.SQLITE_BACKWARD}),
+            execute({"sqlite": crew_triggers.SQLITE_FORWARD}),
+        ),
+        migrations.AddConstraint(
+            model_name="flight",
+            constraint=models.CheckConstraint(
+                check=models.Q(("arrival_time__gt", models.F("departure_time"))),
+                name="flight_arrival_after_departure",
+                violation_error_message="Arrival time must be later than departure time",
+            ),
+        ),
+        migrations.RunPython(
+            execute({vendor: sql[0] for vendor, sql in STATEMENTS.items()}),
+            execute({vendor: sql[1] for vendor, sql in STATEMENTS.items()}),
+        ),
+    ]
@@ -0,0 +1,125 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# On PostgreSQL both archive tables are range-partitioned by departure month.
+# A partitioned table's primary key has to include the partition key, hence
+# (id, departure_time). Monthly partitions are added by airport.archive; rows
+# outside of them land in the DEFAULT partition.
+POSTGRESQL_FORWARD = [
+    """
+    CREATE TABLE "airport_archivedflight" (
+        "id" bigint NOT NULL,
+        "route" varchar(511) NOT NULL,
+        "airplane" varchar(255) NOT NULL,
+        "departure_time" timestamp with time zone NOT NULL,
+        "arrival_time" timestamp with time zone NOT NULL,
+        PRIMARY KEY ("id", "departure_time")
+    ) PARTITION BY RANGE ("departure_time")
+    """,
+    """
+    CREATE TABLE "airport_archivedflight_default"
+    PARTITION OF "airport_archivedflight" DEFAULT
+    """,
+    """
+    CREATE TABLE "airport_archivedticket" (
+        "id" bigint NOT NULL,
+        "row" integer NOT NULL,
+        "seat" integer NOT NULL,
+        "departure_time" timestamp with time zone NOT NULL,
+        "flight_id" bigint NOT NULL,
+        "order_id" bigint NOT NULL
+            REFERENCES "airport_order" ("id") DEFERRABLE INITIALLY DEFERRED,
+        PRIMARY KEY ("id", "departure_time")
+    ) PARTITION BY RANGE ("departure_time")
+    """,
+    """
+    CREATE TABLE "airport_archivedticket_default"
+    PARTITION OF "airport_archivedticket" DEFAULT
+    """,
+    """
+    CREATE INDEX "airport_archivedticket_flight_id"
+    ON "airport_archivedticket" ("flight_id")
+    """,
+    """
+    CREATE INDEX "airport_archivedticket_order_id"
+    ON "airport_archivedticket" ("order_id")
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    'DROP TABLE "airport_archivedticket"',
+    'DROP TABLE "airport_archivedflight"',
+]
+
+MODELS = ("ArchivedFlight", "ArchivedTicket")
+
+
+def create_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRESQL_FORWARD:
+            schema_editor.execute(sql)
+        return
+    for name in MODELS:
+        schema_editor.create_model(apps.get_model("airport", name))
+
+
+def drop_tables(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        for sql in POSTGRESQL_BACKWARD:
+            schema_editor.execute(sql)
+        return
+    for name in reversed(MODELS):
+        schema_editor.delete_model(apps.get_model("airport", name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0004_flight_airplane_schedule_constraints"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name="ArchivedFlight",
+                    fields=[
+                        ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                        ("route", models.CharField(max_length=511)),
+                        ("airplane", models.CharField(max_length=255)),
+                        ("departure_time", models.DateTimeField()),
+                        ("arrival_time", models.DateTimeField()),
+                    ],
+                ),
+                migrations.CreateModel(
+                    name="ArchivedTicket",
+                    fields=[
+                        ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                        ("row", models.IntegerField()),
+                        ("seat", models.IntegerField()),
+                        ("departure_time", models.DateTimeField()),
+                        (
+                            "flight",
+                            models.ForeignKey(
+                                db_constraint=False,
+                                on_delete=django.db.models.deletion.DO_NOTHING,
+                                related_name="tickets",
+                                to="airport.archivedflight",
+                            ),
+                        ),
+                        (
+                            "order",
+                            models.ForeignKey(
+                                on_delete=django.db.models.deletion.CASCADE,
+                                related_name="archived_tickets",
+                                to="airport.order",
+                            ),
+                        ),
+                    ],
+                ),
+            ],
+        ),
+        migrations.RunPython(create_tables, drop_tables),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.3 on 2026-10-19 01:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+# Trigram indexes back the admin's icontains searches on PostgreSQL.
+TRIGRAM_INDEXES = {
+    "airport_airport_name_trgm": ("airport_airport", "name"),
+    "airport_airport_city_trgm": ("airport_airport", "closest_big_city"),
+    "airport_airplane_name_trgm": ("airport_airplane", "name"),
+    "airport_crew_first_name_trgm": ("airport_crew", "first_name"),
+    "airport_crew_last_name_trgm": ("airport_crew", "last_name"),
+}
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    for name in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0005_archive"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="flight",
+            index=models.Index(
+                fields=["departure_time"], name="airport_flight_departure_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(fields=["created_at"], name="airport_order_created_idx"),
+        ),
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,120 @@
+from django.db import migrations
+
+# Ticket seat bounds and Route source <> destination, enforced by the
+# database so Ticket.save() and Route.save() can skip full_clean(). The
+# messages are translated back to validation errors in airport.models.
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE airport_route
+    ADD CONSTRAINT airport_route_source_not_destination
+    CHECK (source_id <> destination_id)
+    """,
+    """
+    CREATE FUNCTION airport_check_ticket_seat() RETURNS trigger AS $$
+    DECLARE
+        plane RECORD;
+    BEGIN
+        SELECT a.rows, a.seats_in_row INTO plane
+        FROM airport_flight f
+        JOIN airport_airplane a ON a.id = f.airplane_id
+        WHERE f.id = NEW.flight_id;
+        IF FOUND AND NOT (
+            NEW."row" BETWEEN 1 AND plane.rows
+            AND NEW.seat BETWEEN 1 AND plane.seats_in_row
+        ) THEN
+            RAISE EXCEPTION 'ticket_out_of_range rows=% seats_in_row=%',
+                plane.rows, plane.seats_in_row
+                USING ERRCODE = '23514';
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER airport_ticket_seat_in_range
+    BEFORE INSERT OR UPDATE OF "row", seat, flight_id ON airport_ticket
+    FOR EACH ROW EXECUTE FUNCTION airport_check_ticket_seat()
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    "DROP TRIGGER IF EXISTS airport_ticket_seat_in_range ON airport_ticket",
+    "DROP FUNCTION IF EXISTS airport_check_ticket_seat()",
+    """
+    ALTER TABLE airport_route
+    DROP CONSTRAINT IF EXISTS airport_route_source_not_destination
+    """,
+]
+
+# SQLite cannot add a CHECK to an existing table without rebuilding it and
+# RAISE() only takes a constant message, so the bounds are looked up when
+# the error is translated.
+SQLITE_TICKET_OUT_OF_RANGE = """
+    WHEN EXISTS (
+        SELECT 1
+        FROM airport_flight f
+        JOIN airport_airplane a ON a.id = f.airplane_id
+        WHERE f.id = NEW.flight_id
+          AND NOT (
+              NEW."row" BETWEEN 1 AND a.rows
+              AND NEW.seat BETWEEN 1 AND a.seats_in_row
+          )
+    )
+    BEGIN
+        SELECT RAISE(ABORT, 'ticket_out_of_range');
+    END
+"""
+
+SQLITE_ROUTE_SOURCE_IS_DESTINATION = """
+    WHEN NEW.source_id = NEW.destination_id
+    BEGIN
+        SELECT RAISE(ABORT, 'airport_route_source_not_destination');
+    END
+"""
+
+SQLITE_FORWARD = [
+    "CREATE TRIGGER airport_ticket_seat_in_range_insert "
+    "BEFORE INSERT ON airport_ticket" + SQLITE_TICKET_OUT_OF_RANGE,
+    "CREATE TRIGGER airport_ticket_seat_in_range_update "
+    'BEFORE UPDATE OF "row", seat, flight_id '
+    "ON airport_ticket" + SQLITE_TICKET_OUT_OF_RANGE,
+    "CREATE TRIGGER airport_route_source_not_destination_insert "
+    "BEFORE INSERT ON airport_route" + SQLITE_ROUTE_SOURCE_IS_DESTINATION,
+    "CREATE TRIGGER airport_route_source_not_destination_update "
+    "BEFORE UPDATE OF source_id, destination_id "
+    "ON airport_route" + SQLITE_ROUTE_SOURCE_IS_DESTINATION,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS airport_route_source_not_destination_update",
+    "DROP TRIGGER IF EXISTS airport_route_source_not_destination_insert",
+    "DROP TRIGGER IF EXISTS airport_ticket_seat_in_range_update",
+    "DROP TRIGGER IF EXISTS airport_ticket_seat_in_range_insert",
+]
+
+STATEMENTS = {
+    "postgresql": (POSTGRESQL_FORWARD, POSTGRESQL_BACKWARD),
+    "sqlite": (SQLITE_FORWARD, SQLITE_BACKWARD),
+}
+
+
+def run(direction):
+    def operation(apps, schema_editor):
+        statements = STATEMENTS.get(schema_editor.connection.vendor)
+        if statements:
+            for sql in statements[direction]:
+                schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0006_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(0), run(1)),
+    ]
@@ -0,0 +1,79 @@
+from importlib import import_module
+
+from django.db import migrations
+
+crew_triggers = import_module("airport.migrations.0003_crew_schedule_constraints")
+
+# Assignments and time changes both lock the crew rows involved before
+# checking for overlaps, so two transactions touching the same crew member
+# queue up instead of both passing the check on their own snapshot. The
+# error names the crew member for the API.
+POSTGRESQL_FORWARD = [
+    """
+    CREATE OR REPLACE FUNCTION airport_check_crew_overlap() RETURNS trigger AS $$
+    DECLARE
+        conflict bigint;
+    BEGIN
+        IF TG_TABLE_NAME = 'airport_flight_crews' THEN
+            PERFORM 1 FROM airport_crew WHERE id = NEW.crew_id FOR UPDATE;
+            SELECT other.crew_id INTO conflict
+            FROM airport_flight_crews other
+            JOIN airport_flight f ON f.id = other.flight_id
+            JOIN airport_flight assigned ON assigned.id = NEW.flight_id
+            WHERE other.crew_id = NEW.crew_id
+              AND other.flight_id <> NEW.flight_id
+              AND tstzrange(f.departure_time, f.arrival_time)
+                  && tstzrange(assigned.departure_time, assigned.arrival_time)
+            LIMIT 1;
+        ELSE
+            PERFORM 1 FROM airport_crew
+            WHERE id IN (
+                SELECT crew_id FROM airport_flight_crews WHERE flight_id = NEW.id
+            )
+            ORDER BY id
+            FOR UPDATE;
+            SELECT mine.crew_id INTO conflict
+            FROM airport_flight_crews mine
+            JOIN airport_flight_crews other
+              ON other.crew_id = mine.crew_id AND other.flight_id <> mine.flight_id
+            JOIN airport_flight f ON f.id = other.flight_id
+            WHERE mine.flight_id = NEW.id
+              AND tstzrange(f.departure_time, f.arrival_time)
+                  && tstzrange(NEW.departure_time, NEW.arrival_time)
+            LIMIT 1;
+        END IF;
+        IF conflict IS NOT NULL THEN
+            RAISE EXCEPTION 'crew_double_booked crew=%', conflict
+                USING ERRCODE = '23P01';
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+POSTGRESQL_BACKWARD = [
+    crew_triggers.POSTGRESQL_FORWARD[1].replace(
+        "CREATE FUNCTION", "CREATE OR REPLACE FUNCTION", 1
+    ),
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == "postgresql":
+            for sql in statements:
+                schema_editor.execute(sql)
+
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0008_change_feed"),
+    ]
+
+    operations = [
+        migrations.RunPython(run(POSTGRESQL_FORWARD), run(POSTGRESQL_BACKWARD)),
+    ]
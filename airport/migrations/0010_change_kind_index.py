@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0009_crew_overlap_row_locks"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(fields=["kind", "id"], name="airport_change_kind_idx"),
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.0.3 on 2026-10-19 09:12
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def sequence_existing(apps, schema_editor):
+    # Entries written so far were committed with their data, in id order.
+    Change = apps.get_model("airport", "Change")
+    Change.objects.update(position=F("id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("airport", "0010_change_kind_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="change",
+            name="action",
+            field=models.CharField(
+                blank=True,
+                choices=[("upsert", "Upsert"), ("delete", "Delete")],
+                max_length=10,
+            ),
+        ),
+        migrations.AddField(
+            model_name="change",
+            name="position",
+            field=models.BigIntegerField(blank=True, null=True, unique=True),
+        ),
+        migrations.RunPython(sequence_existing, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name="change",
+            name="airport_change_kind_idx",
+        ),
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(fields=["kind", "position"], name="airport_change_kind_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="change",
+            index=models.Index(
+                condition=models.Q(("position__isnull", True)),
+                fields=["id"],
+                name="airport_change_pending_idx",
+            ),
+        ),
+    ]
@@ -1,6 +1,57 @@
+import re
+from types import SimpleNamespace
+
 from django.conf import settings
-from django.core.exceptions import ValidationError
-from django.db import models
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, connections, models, router
+from django.db.models.functions import Concat
+from django.utils import timezone
+
+ROUTE_LABEL_SEPARATOR = " -> "
+
+# Names the database uses in errors raised by the constraints and triggers of
+# migration 0007.
+ROUTE_SOURCE_CONSTRAINT = "airport_route_source_not_destination"
+TICKET_OUT_OF_RANGE = re.compile(
+    r"ticket_out_of_range(?: rows=(\d+) seats_in_row=(\d+))?"
+)
+
+
+# SQLSTATE of a unique violation on PostgreSQL, and SQLite's message prefix.
+UNIQUE_VIOLATION = "23505"
+SQLITE_UNIQUE_FAILED = "UNIQUE constraint failed: "
+
+
+def is_unique_violation(error, model, fields, using=None):
+    """
+    Whether ``error`` was raised by the ``unique_together`` constraint of
+    ``model`` on ``fields``. PostgreSQL reports the constraint by name, which
+    is the one Django generated for it; SQLite lists its columns.
+    """
+    using = using or router.db_for_write(model)
+    table = model._meta.db_table
+    columns = [model._meta.get_field(field).column for field in fields]
+    cause = error.__cause__
+    if getattr(cause, "pgcode", None) is not None:
+        if cause.pgcode != UNIQUE_VIOLATION:
+            return False
+        editor = connections[using].SchemaEditorClass(connections[using])
+        name = editor._create_index_name(table, columns, suffix="_uniq")
+        return cause.diag.constraint_name == name
+    return str(error) == SQLITE_UNIQUE_FAILED + ", ".join(
+        f"{table}.{column}" for column in columns
+    )
+
+
+def route_label(prefix=""):
+    """SQL expression rendering the route label like ``Route.__str__``."""
+    return Concat(
+        f"{prefix}source__name",
+        models.Value(ROUTE_LABEL_SEPARATOR),
+        f"{prefix}destination__name",
+        output_field=models.CharField(),
+    )
 
 
 class Crew(models.Model):
@@ -23,11 +74,22 @@ class Airport(models.Model):
         return self.name
 
 
+class RouteQuerySet(models.QuerySet):
+    def with_labels(self):
+        return self.annotate(
+            source_name=models.F("source__name"),
+            destination_name=models.F("destination__name"),
+            label=route_label(),
+        )
+
+
 class Route(models.Model):
     source = models.ForeignKey(Airport, related_name="departures", on_delete=models.CASCADE)
     destination = models.ForeignKey(Airport, related_name="arrivals", on_delete=models.CASCADE)
     distance = models.IntegerField()
 
+    objects = RouteQuerySet.as_manager()
+
     class Meta:
         unique_together = ("source", "destination", "distance")
         ordering = ("distance",)
@@ -43,13 +105,26 @@ class Route(models.Model):
             using=None,
             update_fields=None,
     ):
-        self.full_clean()
-        return super(Route, self).save(
-            force_insert, force_update, using, update_fields
-        )
+        if not settings.VALIDATE_IN_DATABASE:
+            self.full_clean()
+        try:
+            return super(Route, self).save(
+                force_insert, force_update, using, update_fields
+            )
+        except IntegrityError as error:
+            if ROUTE_SOURCE_CONSTRAINT in str(error):
+                raise ValidationError(
+                    "Source and destination names should be difference"
+                ) from error
+            unique = ("source", "destination", "distance")
+            if is_unique_violation(error, Route, unique, using):
+                raise ValidationError({
+                    NON_FIELD_ERRORS: [self.unique_error_message(Route, unique)]
+                }) from error
+            raise
 
     def __str__(self):
-        return f"{self.source} -> {self.destination}"
+        return f"{self.source}{ROUTE_LABEL_SEPARATOR}{self.destination}"
 
 
 class AirplaneType(models.Model):
@@ -73,6 +148,16 @@ class Airplane(models.Model):
         return self.rows * self.seats_in_row
 
 
+class FlightQuerySet(models.QuerySet):
+    def with_labels(self):
+        return self.annotate(
+            source_name=models.F("route__source__name"),
+            destination_name=models.F("route__destination__name"),
+            route_label=route_label("route__"),
+            airplane_name=models.F("airplane__name"),
+        )
+
+
 class Flight(models.Model):
     route = models.ForeignKey(Route, related_name="flights", on_delete=models.CASCADE)
     airplane = models.ForeignKey(Airplane, related_name="flights", on_delete=models.CASCADE)
@@ -80,6 +165,20 @@ class Flight(models.Model):
     departure_time = models.DateTimeField()
     arrival_time = models.DateTimeField()
 
+    objects = FlightQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(arrival_time__gt=models.F("departure_time")),
+                name="flight_arrival_after_departure",
+                violation_error_message="Arrival time must be later than departure time",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=("departure_time",), name="airport_flight_departure_idx"),
+        ]
+
     def __str__(self):
         return f"Flight {self.route} on {self.airplane}"
 
@@ -88,6 +187,11 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="user", on_delete=models.CASCADE)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=("created_at",), name="airport_order_created_idx"),
+        ]
+
     def __str__(self):
         return str(self.created_at)
 
@@ -133,12 +237,142 @@ class Ticket(models.Model):
             using=None,
             update_fields=None,
     ):
-        self.full_clean()
-        return super(Ticket, self).save(
-            force_insert, force_update, using, update_fields
+        """
+        With ``VALIDATE_IN_DATABASE`` an insert is a single statement: seat
+        bounds and uniqueness are checked by the database and its errors are
+        raised as the ``ValidationError`` that ``full_clean()`` would give.
+        As with any ``IntegrityError``, the surrounding transaction on
+        PostgreSQL has to be rolled back afterwards.
+        """
+        if not settings.VALIDATE_IN_DATABASE:
+            self.full_clean()
+        try:
+            return super(Ticket, self).save(
+                force_insert, force_update, using, update_fields
+            )
+        except IntegrityError as error:
+            self.raise_validation_error(error, using)
+
+    def raise_validation_error(self, error, using=None):
+        match = TICKET_OUT_OF_RANGE.search(str(error))
+        if match:
+            if match.group(1):
+                airplane = SimpleNamespace(
+                    rows=int(match.group(1)), seats_in_row=int(match.group(2))
+                )
+            else:
+                # SQLite only reports the violation, take the bounds from
+                # the flight the ticket was built with.
+                airplane = self.flight.airplane
+            try:
+                Ticket.validate_ticket(self.row, self.seat, airplane, ValidationError)
+            except ValidationError as validation_error:
+                raise validation_error from error
+        unique = ("flight", "row", "seat")
+        if is_unique_violation(error, Ticket, unique, using):
+            raise ValidationError({
+                NON_FIELD_ERRORS: [self.unique_error_message(Ticket, unique)]
+            }) from error
+        raise error
+
+    def __str__(self):
+        return (
+            f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
         )
 
+
+class ArchivedFlight(models.Model):
+    """
+    A flight moved out of the hot tables by ``archive_flights``. Route and
+    airplane are kept as display strings so the row outlives them. On
+    PostgreSQL the table is range-partitioned by departure month.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    route = models.CharField(max_length=511)
+    airplane = models.CharField(max_length=255)
+    departure_time = models.DateTimeField()
+    arrival_time = models.DateTimeField()
+
+    def __str__(self):
+        return f"Flight {self.route} on {self.airplane}"
+
+
+class ArchivedTicket(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    row = models.IntegerField()
+    seat = models.IntegerField()
+    flight = models.ForeignKey(
+        ArchivedFlight,
+        related_name="tickets",
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+    )
+    departure_time = models.DateTimeField()
+    order = models.ForeignKey(Order, related_name="archived_tickets", on_delete=models.CASCADE)
+
     def __str__(self):
         return (
             f"{str(self.flight)} (row: {self.row}, seat: {self.seat})"
         )
+
+
+class Change(models.Model):
+    """
+    An entry of the change feed: the state of a flight, route, airport or of
+    a flight's seat availability after a committed write, or its deletion.
+    Written without ``position``, ``action`` and ``data`` by the writing
+    transaction; ``changes.sequence()`` fills them in. The position is the
+    feed cursor.
+    """
+
+    FLIGHT = "flight"
+    ROUTE = "route"
+    AIRPORT = "airport"
+    AVAILABILITY = "availability"
+    KINDS = (
+        (FLIGHT, "Flight"),
+        (ROUTE, "Route"),
+        (AIRPORT, "Airport"),
+        (AVAILABILITY, "Availability"),
+    )
+    UPSERT = "upsert"
+    DELETE = "delete"
+    ACTIONS = ((UPSERT, "Upsert"), (DELETE, "Delete"))
+
+    kind = models.CharField(max_length=20, choices=KINDS)
+    object_id = models.BigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTIONS, blank=True)
+    data = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    position = models.BigIntegerField(null=True, blank=True, unique=True)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ("id",)
+        indexes = [
+            models.Index(fields=("kind", "object_id"), name="airport_change_object_idx"),
+            models.Index(fields=("kind", "position"), name="airport_change_kind_idx"),
+            models.Index(
+                fields=("id",),
+                condition=models.Q(position__isnull=True),
+                name="airport_change_pending_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.action or 'pending'} {self.kind} {self.object_id}"
+
+
+class ChangeCompaction(models.Model):
+    """A compaction run; cursors below ``horizon`` have expired."""
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    superseded = models.PositiveIntegerField()
+    expired = models.PositiveIntegerField()
+    horizon = models.BigIntegerField()
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"Compaction at {self.created_at}, horizon {self.horizon}"
@@ -0,0 +1,85 @@
+"""
+Per-action query plans for the airport viewsets.
+
+A plan shapes the viewset's base queryset for one action so it selects the
+columns, joins, prefetches and annotations that action's serializer reads
+and nothing else. Actions without a plan (create, update, destroy and the
+custom actions) fetch bare rows.
+"""
+from django.db.models import Count, F, Prefetch
+
+from airport.models import ArchivedTicket, Ticket
+
+
+class QueryPlanMixin:
+    """Applies ``query_plans[self.action]`` to the viewset's queryset."""
+
+    query_plans = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        plan = self.query_plans.get(self.action)
+        return plan(queryset) if plan else queryset
+
+
+def tickets_available():
+    return F("airplane__rows") * F("airplane__seats_in_row") - Count("tickets")
+
+
+def route_list(queryset):
+    return queryset.with_labels().only("id", "distance")
+
+
+def airplane_list(queryset):
+    return queryset.select_related("airplane_type").only(
+        "id", "name", "rows", "seats_in_row", "airplane_type__name"
+    )
+
+
+def flight_list(queryset):
+    return (
+        queryset.with_labels()
+        .annotate(tickets_available=tickets_available())
+        .only("id", "departure_time", "arrival_time")
+    )
+
+
+def flight_detail(queryset):
+    return (
+        queryset.select_related(
+            "route__source", "route__destination", "airplane__airplane_type"
+        )
+        .only(
+            "id",
+            "route__id",
+            "route__distance",
+            "route__source__name",
+            "route__destination__name",
+            "airplane__id",
+            "airplane__name",
+            "airplane__rows",
+            "airplane__seats_in_row",
+            "airplane__airplane_type__name",
+        )
+        .prefetch_related(
+            Prefetch("crews"),
+            Prefetch("tickets", Ticket.objects.only("id", "row", "seat", "flight_id")),
+        )
+    )
+
+
+def order_list(queryset):
+    return queryset.prefetch_related(
+        Prefetch(
+            "tickets",
+            queryset=Ticket.objects.select_related(
+                "flight__route__source",
+                "flight__route__destination",
+                "flight__airplane",
+            ),
+        ),
+        Prefetch(
+            "archived_tickets",
+            queryset=ArchivedTicket.objects.select_related("flight"),
+        ),
+    )
@@ -0,0 +1,98 @@
+"""
+Primary-key fields resolved in bulk.
+
+Before a root serializer validates, ``BulkRelatedMixin`` walks the incoming
+payload, nested serializers and lists included, collects the primary keys
+aimed at every ``BulkPrimaryKeyRelatedField`` and loads them with one
+``in_bulk()`` per distinct queryset. The fields then look their objects up
+in that map instead of running a query per key, so a write costs the same
+number of lookups whether it names one crew member or twelve.
+
+Fields built on the same queryset object, like every field ``ModelSerializer``
+generates for one model and the copies of a list's child, share a lookup.
+"""
+from collections import defaultdict
+from collections.abc import Mapping
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework import serializers
+from rest_framework.fields import empty
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+class BulkPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    def resolution_key(self):
+        if self.queryset is None or type(self).get_queryset is not RelatedField.get_queryset:
+            # Built per call, nothing to share it with.
+            return self
+        return self.queryset.model, id(self.queryset)
+
+    def to_pk(self, data):
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def to_internal_value(self, data):
+        resolved = getattr(self.root, "_resolved_pks", {}).get(self.resolution_key())
+        if resolved is None:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            pk = self.to_pk(data)
+        except (TypeError, DjangoValidationError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in resolved:
+            self.fail("does_not_exist", pk_value=data)
+        return resolved[pk]
+
+
+def collect_pks(serializer, data, found):
+    if isinstance(serializer, serializers.ListSerializer):
+        if isinstance(data, list):
+            for item in data:
+                collect_pks(serializer.child, item, found)
+        return
+    if not isinstance(data, Mapping):
+        return
+    for field in serializer._writable_fields:
+        value = data.get(field.field_name, empty)
+        if value is empty or value is None:
+            continue
+        if isinstance(field, ManyRelatedField):
+            relation, values = field.child_relation, value
+            if not isinstance(values, list):
+                continue
+        else:
+            relation, values = field, [value]
+        if isinstance(relation, BulkPrimaryKeyRelatedField):
+            lookup = found[relation.resolution_key()]
+            if lookup[0] is None:
+                lookup[0] = relation.get_queryset()
+            for item in values:
+                try:
+                    lookup[1].add(relation.to_pk(item))
+                except (TypeError, DjangoValidationError, serializers.ValidationError):
+                    pass
+        elif isinstance(field, serializers.BaseSerializer):
+            collect_pks(field, value, found)
+
+
+class BulkRelatedMixin:
+    """
+    For ``ModelSerializer``s: generated relations become
+    ``BulkPrimaryKeyRelatedField`` and, at the root, every key in the
+    payload is loaded up front.
+    """
+
+    serializer_related_field = BulkPrimaryKeyRelatedField
+
+    def run_validation(self, data=empty):
+        if self.parent is None and data is not empty:
+            found = defaultdict(lambda: [None, set()])
+            collect_pks(self, data, found)
+            self._resolved_pks = {
+                key: queryset.in_bulk(pks) if pks else {}
+                for key, (queryset, pks) in found.items()
+            }
+        return super().run_validation(data)
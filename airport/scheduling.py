@@ -0,0 +1,98 @@
+"""
+Time-range queries over flights.
+
+On PostgreSQL a flight occupies ``tstzrange(departure_time, arrival_time)``,
+which is covered by a GiST index (see migration 0003), so overlap lookups are
+answered from the index. Other databases fall back to comparing the two
+columns, which gives the same half-open ``[departure, arrival)`` semantics.
+"""
+from django.contrib.postgres.fields import DateTimeRangeField
+from django.contrib.postgres.fields.ranges import DateTimeTZRange
+from django.db import connections
+from django.db.models import F, Func
+
+from airport.models import Flight
+
+FlightCrew = Flight.crews.through
+
+# Raised by the crew overlap triggers (migrations 0003 and 0009).
+CREW_DOUBLE_BOOKED = "crew_double_booked"
+# The airplane exclusion constraint on PostgreSQL and the SQLite trigger
+# standing in for it (migration 0004).
+AIRPLANE_DOUBLE_BOOKED = ("airport_flight_airplane_no_overlap", "airplane_double_booked")
+
+
+class TsTzRange(Func):
+    function = "TSTZRANGE"
+    output_field = DateTimeRangeField()
+
+
+def overlapping(queryset, start, end, prefix=""):
+    """Filter ``queryset`` to flights (reached via ``prefix``) overlapping [start, end)."""
+    departure, arrival = f"{prefix}departure_time", f"{prefix}arrival_time"
+    if connections[queryset.db].vendor == "postgresql":
+        return queryset.annotate(
+            _period=TsTzRange(F(departure), F(arrival))
+        ).filter(_period__overlap=DateTimeTZRange(start, end))
+    return queryset.filter(**{f"{departure}__lt": end, f"{arrival}__gt": start})
+
+
+def airplane_conflicts(airplane_id, departure_time, arrival_time, exclude_flight=None):
+    """Flights of ``airplane_id`` overlapping the given times."""
+    conflicts = overlapping(
+        Flight.objects.filter(airplane_id=airplane_id), departure_time, arrival_time
+    )
+    if exclude_flight is not None:
+        conflicts = conflicts.exclude(id=exclude_flight)
+    return conflicts
+
+
+def airplane_timeline(airplane_id, start, end):
+    """
+    Flights of ``airplane_id`` touching [start, end) in departure order. On
+    PostgreSQL this is an index scan of the airplane overlap constraint.
+    """
+    return overlapping(
+        Flight.objects.filter(airplane_id=airplane_id), start, end
+    ).order_by("departure_time")
+
+
+def crew_conflicts(crew_ids, departure_time, arrival_time, exclude_flight=None):
+    """
+    Assignments of any of ``crew_ids`` to flights overlapping the given
+    times, fetched in a single query.
+    """
+    conflicts = overlapping(
+        FlightCrew.objects.filter(crew_id__in=crew_ids),
+        departure_time,
+        arrival_time,
+        prefix="flight__",
+    )
+    if exclude_flight is not None:
+        conflicts = conflicts.exclude(flight_id=exclude_flight)
+    return conflicts.select_related("crew", "flight")
+
+
+def crew_conflicts_in_window(start, end):
+    """
+    Pairs of overlapping flights sharing a crew member, for flights that
+    touch [start, end). Each pair is reported once, lower flight id first.
+    """
+    return (
+        overlapping(FlightCrew.objects.all(), start, end, prefix="flight__")
+        .filter(
+            crew__flights__departure_time__lt=F("flight__arrival_time"),
+            crew__flights__arrival_time__gt=F("flight__departure_time"),
+            crew__flights__id__gt=F("flight_id"),
+        )
+        .values(
+            "crew_id",
+            "flight_id",
+            "flight__departure_time",
+            "flight__arrival_time",
+            conflicting_flight_id=F("crew__flights__id"),
+            conflicting_departure_time=F("crew__flights__departure_time"),
+            conflicting_arrival_time=F("crew__flights__arrival_time"),
+        )
+        .order_by("flight__departure_time", "crew_id")
+    )
@@ -1,8 +1,49 @@
-from django.db import transaction
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
-from airport.models import Crew, Airport, Route, AirplaneType, Airplane, Flight, Order, Ticket
+from airport.models import (
+    Crew,
+    Airport,
+    Route,
+    AirplaneType,
+    Airplane,
+    Flight,
+    Order,
+    Ticket,
+    ArchivedFlight,
+    ArchivedTicket,
+    Change,
+)
+from airport.relations import BulkPrimaryKeyRelatedField, BulkRelatedMixin
+from airport.scheduling import (
+    AIRPLANE_DOUBLE_BOOKED,
+    CREW_DOUBLE_BOOKED,
+    airplane_conflicts,
+    crew_conflicts,
+)
+
+
+class AnnotatedField(serializers.ReadOnlyField):
+    """
+    Reads ``annotation`` when the queryset computed it in SQL and falls back
+    to ``source`` on plain instances.
+    """
+
+    def __init__(self, annotation, **kwargs):
+        self.annotation = annotation
+        super(AnnotatedField, self).__init__(**kwargs)
+
+    def get_attribute(self, instance):
+        if hasattr(instance, self.annotation):
+            return getattr(instance, self.annotation)
+        return super(AnnotatedField, self).get_attribute(instance)
 
 
 class CrewSerializer(serializers.ModelSerializer):
@@ -11,12 +52,29 @@ class CrewSerializer(serializers.ModelSerializer):
         fields = ("id", "first_name", "last_name")
 
 
+class CrewConflictSerializer(serializers.Serializer):
+    crew = serializers.IntegerField(source="crew_id")
+    flight = serializers.IntegerField(source="flight_id")
+    departure_time = serializers.DateTimeField(source="flight__departure_time")
+    arrival_time = serializers.DateTimeField(source="flight__arrival_time")
+    conflicting_flight = serializers.IntegerField(source="conflicting_flight_id")
+    conflicting_departure_time = serializers.DateTimeField()
+    conflicting_arrival_time = serializers.DateTimeField()
+
+
 class AirportSerializer(serializers.ModelSerializer):
     class Meta:
         model = Airport
         fields = ("id", "name", "closest_big_city")
 
 
+class AirportAutocompleteSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    closest_big_city = serializers.CharField()
+    route_count = serializers.IntegerField()
+
+
 class RouteSerializer(serializers.ModelSerializer):
     class Meta:
         model = Route
@@ -24,12 +82,13 @@ class RouteSerializer(serializers.ModelSerializer):
 
 
 class RouteListSerializer(serializers.ModelSerializer):
-    source = serializers.StringRelatedField(read_only=True)
-    destination = serializers.StringRelatedField(read_only=True)
+    source = AnnotatedField("source_name", source="source.name")
+    destination = AnnotatedField("destination_name", source="destination.name")
+    label = AnnotatedField("label", source="__str__")
 
     class Meta:
         model = Route
-        fields = ("id", "source", "destination", "distance")
+        fields = ("id", "source", "destination", "distance", "label")
 
 
 class AirplaneTypeSerializer(serializers.ModelSerializer):
@@ -52,23 +111,139 @@ class AirplaneListSerializer(AirplaneSerializer):
         fields = ("id", "name", "airplane_type", "capacity")
 
 
-class FlightSerializer(serializers.ModelSerializer):
+class FlightSerializer(BulkRelatedMixin, serializers.ModelSerializer):
     class Meta:
         model = Flight
         fields = ("id", "route", "airplane", "departure_time", "arrival_time", "crews")
 
+    def validate(self, attrs):
+        data = super(FlightSerializer, self).validate(attrs=attrs)
+        instance = self.instance
+        airplane = attrs.get("airplane", getattr(instance, "airplane", None))
+        departure_time = attrs.get("departure_time", getattr(instance, "departure_time", None))
+        arrival_time = attrs.get("arrival_time", getattr(instance, "arrival_time", None))
+        crews = attrs.get("crews")
+        if crews is None and instance is not None:
+            crews = list(instance.crews.all())
+        exclude_flight = getattr(instance, "id", None)
+
+        if arrival_time <= departure_time:
+            raise ValidationError(
+                {"arrival_time": "Arrival time must be later than departure time"}
+            )
+        if airplane_conflicts(airplane.id, departure_time, arrival_time, exclude_flight).exists():
+            raise ValidationError(
+                {"airplane": f"{airplane} is already scheduled for an overlapping flight"}
+            )
+        if crews:
+            errors = self.crew_errors(crews, departure_time, arrival_time, exclude_flight)
+            if errors:
+                raise ValidationError({"crews": errors})
+        return data
+
+    @staticmethod
+    def crew_errors(crews, departure_time, arrival_time, exclude_flight):
+        conflicts = crew_conflicts(
+            [crew.id for crew in crews],
+            departure_time,
+            arrival_time,
+            exclude_flight=exclude_flight,
+        )
+        return [
+            f"{conflict.crew} is already assigned to flight {conflict.flight_id}"
+            for conflict in conflicts
+        ]
+
+    def create(self, validated_data):
+        return self.save_checked(super(FlightSerializer, self).create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_checked(
+            lambda data: super(FlightSerializer, self).update(instance, data),
+            validated_data,
+        )
+
+    def save_checked(self, save, validated_data):
+        """
+        Run ``save`` in its own transaction and report the database's schedule
+        checks, which catch concurrent writes that passed ``validate``, as 400s.
+        """
+        try:
+            with transaction.atomic():
+                # ModelSerializer pops the crews out of the data it is given.
+                return save(dict(validated_data))
+        except IntegrityError as error:
+            instance = self.instance
+            if any(name in str(error) for name in AIRPLANE_DOUBLE_BOOKED):
+                airplane = validated_data.get("airplane", getattr(instance, "airplane", None))
+                raise ValidationError(
+                    {"airplane": [f"{airplane} is already scheduled for an overlapping flight"]}
+                ) from error
+            if CREW_DOUBLE_BOOKED not in str(error):
+                raise
+            crews = validated_data.get("crews")
+            if crews is None:
+                crews = list(instance.crews.all())
+            errors = self.crew_errors(
+                crews,
+                validated_data.get("departure_time", getattr(instance, "departure_time", None)),
+                validated_data.get("arrival_time", getattr(instance, "arrival_time", None)),
+                getattr(instance, "id", None),
+            )
+            raise ValidationError(
+                {"crews": errors or ["A crew member is already assigned to an overlapping flight"]}
+            ) from error
+
+
+class FlightTimelineSerializer(serializers.ModelSerializer):
+    route = AnnotatedField("route_label", source="route.__str__")
+
+    class Meta:
+        model = Flight
+        fields = ("id", "route", "departure_time", "arrival_time")
+
+
+class FlightAvailabilityQuerySerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.AVAILABILITY_MAX_IDS,
+    )
+
+
+class FlightAvailabilitySerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    capacity = serializers.IntegerField()
+    tickets_available = serializers.IntegerField()
+
 
 class FlightListSerializer(FlightSerializer):
-    route = serializers.StringRelatedField(read_only=True)
-    airplane = serializers.CharField(source="airplane.name", read_only=True)
+    route = AnnotatedField("route_label", source="route.__str__")
+    source_name = AnnotatedField("source_name", source="route.source.name")
+    destination_name = AnnotatedField(
+        "destination_name", source="route.destination.name"
+    )
+    airplane = AnnotatedField("airplane_name", source="airplane.name")
     tickets_available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Flight
-        fields = ("id", "route", "airplane", "departure_time", "arrival_time", "tickets_available")
+        fields = (
+            "id",
+            "route",
+            "source_name",
+            "destination_name",
+            "airplane",
+            "departure_time",
+            "arrival_time",
+            "tickets_available",
+        )
 
 
-class TicketSerializer(serializers.ModelSerializer):
+class TicketSerializer(BulkRelatedMixin, serializers.ModelSerializer):
+    flight = BulkPrimaryKeyRelatedField(
+        queryset=Flight.objects.select_related("airplane")
+    )
 
     def validate(self, attrs):
         data = super(TicketSerializer, self).validate(attrs=attrs)
@@ -83,6 +258,9 @@ class TicketSerializer(serializers.ModelSerializer):
     class Meta:
         model = Ticket
         fields = ("id", "row", "seat", "flight")
+        # Seats are checked for the whole order at once in
+        # OrderSerializer.validate_tickets.
+        validators = []
 
 
 class TicketListSerializer(TicketSerializer):
@@ -95,32 +273,88 @@ class TicketSeatsSerializer(TicketSerializer):
         fields = ("row", "seat")
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(BulkRelatedMixin, serializers.ModelSerializer):
     tickets = TicketSerializer(many=True, read_only=False, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ("id", "tickets", "created_at")
 
+    def validate_tickets(self, tickets):
+        seats = [(ticket["flight"].id, ticket["row"], ticket["seat"]) for ticket in tickets]
+        if len(set(seats)) != len(seats):
+            raise ValidationError("The same seat is ordered more than once")
+        taken = Ticket.objects.filter(
+            reduce(or_, (Q(flight_id=flight, row=row, seat=seat) for flight, row, seat in seats))
+        ).values_list("flight_id", "row", "seat")
+        errors = [
+            f"Seat {seat} in row {row} of flight {flight} is already taken"
+            for flight, row, seat in taken
+        ]
+        if errors:
+            raise ValidationError(errors)
+        return tickets
+
     def create(self, validated_data):
         with transaction.atomic():
             tickets_data = validated_data.pop("tickets")
             order = Order.objects.create(**validated_data)
             for ticket_data in tickets_data:
-                Ticket.objects.create(order=order, **ticket_data)
+                try:
+                    Ticket.objects.create(order=order, **ticket_data)
+                except DjangoValidationError as error:
+                    # A seat taken since validate_tickets ran.
+                    raise ValidationError({"tickets": error.messages}) from error
             return order
 
 
+class ArchivedFlightSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedFlight
+        fields = ("id", "route", "airplane", "departure_time", "arrival_time")
+
+
+class ArchivedTicketSerializer(serializers.ModelSerializer):
+    flight = ArchivedFlightSerializer(read_only=True)
+
+    class Meta:
+        model = ArchivedTicket
+        fields = ("id", "row", "seat", "flight")
+
+
 class OrderListSerializer(OrderSerializer):
     tickets = TicketListSerializer(many=True, read_only=True)
 
+    def to_representation(self, instance):
+        data = super(OrderListSerializer, self).to_representation(instance)
+        data["tickets"] += ArchivedTicketSerializer(
+            instance.archived_tickets.all(), many=True
+        ).data
+        return data
+
 
 class FlightDetailSerializer(FlightSerializer):
     route = RouteListSerializer(read_only=True)
     airplane = AirplaneListSerializer(read_only=True)
     crews = serializers.SlugRelatedField(slug_field="full_name", read_only=True, many=True)
-    taken_place = TicketSeatsSerializer(read_only=True, many=True)
+    taken_place = TicketSeatsSerializer(source="tickets", read_only=True, many=True)
 
     class Meta:
         model = Flight
         fields = ("id", "route", "airplane", "crews", "taken_place")
+
+
+class ChangeSerializer(serializers.ModelSerializer):
+    cursor = serializers.IntegerField(source="position")
+    id = serializers.IntegerField(source="object_id")
+    changed_at = serializers.DateTimeField(source="created_at")
+
+    class Meta:
+        model = Change
+        fields = ("cursor", "kind", "id", "action", "data", "changed_at")
+
+
+class ChangeFeedSerializer(serializers.Serializer):
+    cursor = serializers.IntegerField()
+    has_more = serializers.BooleanField()
+    changes = ChangeSerializer(many=True)
@@ -0,0 +1,45 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from airport import autocomplete, changes
+from airport.availability import invalidate
+from airport.models import Airplane, Airport, Change, Flight, Route, Ticket
+
+
+def invalidate_on_commit(flight_ids):
+    flight_ids = list(flight_ids)
+    transaction.on_commit(lambda: invalidate(flight_ids))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def ticket_changed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.flight_id])
+    changes.record(Change.AVAILABILITY, [instance.flight_id])
+
+
+@receiver(post_save, sender=Flight)
+@receiver(post_delete, sender=Flight)
+def flight_changed(sender, instance, **kwargs):
+    invalidate_on_commit([instance.id])
+    changes.record(Change.FLIGHT, [instance.id])
+    changes.record(Change.AVAILABILITY, [instance.id])
+
+
+@receiver(post_save, sender=Airplane)
+def airplane_changed(sender, instance, created, **kwargs):
+    if not created:
+        flight_ids = list(instance.flights.values_list("id", flat=True))
+        invalidate_on_commit(flight_ids)
+        changes.record(Change.AVAILABILITY, flight_ids)
+
+
+@receiver(post_save, sender=Airport)
+@receiver(post_delete, sender=Airport)
+@receiver(post_save, sender=Route)
+@receiver(post_delete, sender=Route)
+def airport_index_changed(sender, instance, **kwargs):
+    transaction.on_commit(autocomplete.invalidate)
+    kind = Change.AIRPORT if sender is Airport else Change.ROUTE
+    changes.record(kind, [instance.id])
@@ -0,0 +1,28 @@
+"""Background work for ``manage.py run_worker``, see ``ops.jobs``."""
+from datetime import timedelta
+
+from django.apps import apps
+from django.utils import timezone
+
+from airport import changes
+from airport.archive import archive_before
+from airport.deletion import delete_in_chunks
+from ops.jobs import task
+
+
+@task(queue="maintenance", max_attempts=3)
+def archive_flights(days=365, batch_size=200):
+    archive_before(timezone.now() - timedelta(days=days), batch_size=batch_size)
+
+
+@task(queue="maintenance", max_attempts=3)
+def compact_changes():
+    changes.compact()
+
+
+@task(queue="maintenance", max_attempts=3)
+def delete_with_dependents(model, pk, chunk_size=500):
+    """The admin's chunked delete; a retry carries on where the last run stopped."""
+    obj = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    if obj is not None:
+        delete_in_chunks(obj, chunk_size=chunk_size)
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from airport.admin import TicketInLine
+from airport.models import Crew, Flight, Order, Ticket
+from airport.tests.test_views import (
+    get_airport,
+    get_route,
+    get_airplane,
+    get_airplane_type,
+)
+from ops.counting import EstimatedCountPaginator, estimated_count
+
+ROWS = 7
+
+
+class AdminScaleTests(TestCase):
+    """Admin pages must not run a query per row (the test runner raises on N+1)."""
+
+    def setUp(self):
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="password"
+        )
+        self.client.force_login(admin)
+        airplane_type = get_airplane_type()
+        crew = Crew.objects.create(first_name="John", last_name="Hard")
+        self.order = Order.objects.create(user=admin)
+        for i in range(ROWS):
+            flight = Flight.objects.create(
+                route=get_route(
+                    source=get_airport(name=f"src{i}"),
+                    destination=get_airport(name=f"dst{i}"),
+                ),
+                airplane=get_airplane(name=f"plane{i}", airplane_type=airplane_type),
+                departure_time=timezone.now() + timedelta(days=i),
+                arrival_time=timezone.now() + timedelta(days=i, hours=2),
+            )
+            flight.crews.add(crew)
+            Ticket.objects.create(row=1, seat=1, flight=flight, order=self.order)
+
+    def test_changelists(self):
+        for model in ("flight", "ticket", "route", "order", "airplane"):
+            response = self.client.get(reverse(f"admin:airport_{model}_changelist"))
+            self.assertEqual(response.status_code, 200, model)
+
+    def test_flight_autocomplete(self):
+        response = self.client.get(
+            reverse("admin:autocomplete"),
+            {
+                "term": "src",
+                "app_label": "airport",
+                "model_name": "ticket",
+                "field_name": "flight",
+            },
+        )
+        self.assertEqual(len(response.json()["results"]), ROWS)
+
+    def test_order_tickets_are_paginated(self):
+        url = reverse("admin:airport_order_change", args=(self.order.id,))
+        per_page = TicketInLine.per_page
+        TicketInLine.per_page = 5
+        try:
+            first = self.client.get(url)
+            second = self.client.get(url, {"tickets_page": 2})
+        finally:
+            TicketInLine.per_page = per_page
+        self.assertEqual(first.context["inline_admin_formsets"][0].formset.total_form_count(), 5)
+        self.assertEqual(second.context["inline_admin_formsets"][0].formset.total_form_count(), 2)
+        self.assertContains(first, "?tickets_page=2")
+
+
+class EstimatedCountTests(TestCase):
+    def test_filtered_querysets_are_not_estimated(self):
+        self.assertIsNone(estimated_count(Order.objects.filter(id=1)))
+
+    def test_small_tables_are_counted_exactly(self):
+        Order.objects.create(user=get_user_model().objects.create_user(
+            email="user@test.com", password="password"
+        ))
+        self.assertEqual(EstimatedCountPaginator(Order.objects.all(), 10).count, 1)
@@ -0,0 +1,73 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from airport.models import ArchivedFlight, ArchivedTicket, Crew, Flight, Order, Ticket
+from airport.tests.test_views import get_simple_user, get_route, get_airplane
+
+
+class ArchiveFlightsTests(TestCase):
+    def setUp(self):
+        self.user = get_simple_user()
+        self.route = get_route()
+        now = timezone.now()
+        self.old_flight = Flight.objects.create(
+            route=self.route,
+            airplane=get_airplane(name="old"),
+            departure_time=now - timedelta(days=400, hours=2),
+            arrival_time=now - timedelta(days=400),
+        )
+        self.old_flight.crews.add(
+            Crew.objects.create(first_name="John", last_name="Hard")
+        )
+        self.new_flight = Flight.objects.create(
+            route=self.route,
+            airplane=get_airplane(name="new"),
+            departure_time=now + timedelta(days=1),
+            arrival_time=now + timedelta(days=1, hours=2),
+        )
+        self.order = Order.objects.create(user=self.user)
+        self.old_ticket = Ticket.objects.create(
+            row=1, seat=2, flight=self.old_flight, order=self.order
+        )
+        Ticket.objects.create(row=1, seat=1, flight=self.new_flight, order=self.order)
+
+    def test_dry_run_moves_nothing(self):
+        out = StringIO()
+        call_command("archive_flights", dry_run=True, stdout=out)
+        self.assertIn("Would archive 1 flights and 1 tickets", out.getvalue())
+        self.assertTrue(Flight.objects.filter(id=self.old_flight.id).exists())
+
+    def test_archive_moves_old_flights_and_tickets(self):
+        call_command("archive_flights", stdout=StringIO())
+
+        self.assertEqual(list(Flight.objects.all()), [self.new_flight])
+        self.assertEqual(Ticket.objects.count(), 1)
+        archived = ArchivedFlight.objects.get(id=self.old_flight.id)
+        self.assertEqual(archived.route, str(self.route))
+        self.assertEqual(archived.airplane, "old")
+        ticket = ArchivedTicket.objects.get(id=self.old_ticket.id)
+        self.assertEqual((ticket.row, ticket.seat), (1, 2))
+        self.assertEqual(ticket.departure_time, self.old_flight.departure_time)
+
+    def test_order_history_includes_archived_tickets(self):
+        call_command("archive_flights", stdout=StringIO())
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse("airport:orders-list"))
+        tickets = response.data["results"][0]["tickets"]
+        self.assertEqual(len(tickets), 2)
+        archived = tickets[1]
+        self.assertEqual(archived["id"], self.old_ticket.id)
+        self.assertEqual(archived["flight"]["route"], str(self.route))
+        self.assertEqual(archived["flight"]["airplane"], "old")
+
+    def test_create_partitions_is_noop_without_postgresql(self):
+        out = StringIO()
+        call_command("create_archive_partitions", stdout=out)
+        self.assertIn("nothing to do", out.getvalue())
@@ -0,0 +1,95 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import autocomplete
+from airport.autocomplete import AirportIndex, get_index
+from airport.models import Airport
+from airport.tests.test_views import get_simple_user, get_airport, get_route
+
+AUTOCOMPLETE_URL = reverse("airport:airports-autocomplete")
+
+
+class AirportIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = AirportIndex([
+            (1, "Berlin Brandenburg", "Berlin", 3),
+            (2, "Bergamo Orio al Serio", "Milan", 7),
+            (3, "Zürich", "Zurich", 1),
+        ])
+
+    def test_prefix_matches_are_ranked_by_route_count(self):
+        self.assertEqual(
+            [airport["id"] for airport in self.index.search("ber")], [2, 1]
+        )
+
+    def test_matches_words_and_city_ignoring_case_and_accents(self):
+        self.assertEqual(self.index.search("MIL")[0]["id"], 2)
+        self.assertEqual(self.index.search("brand")[0]["id"], 1)
+        self.assertEqual(self.index.search("zur")[0]["id"], 3)
+
+    def test_limit_and_empty_query(self):
+        self.assertEqual(len(self.index.search("b", limit=1)), 1)
+        self.assertEqual(self.index.search("  "), [])
+
+
+class AirportAutocompleteViewTests(TestCase):
+    databases = {"default", "replica_test"}
+
+    def setUp(self):
+        autocomplete._index = None
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_simple_user())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quiet = get_airport(name="Berlin Tegel", closest_big_city="Berlin")
+            self.busy = get_airport(name="Berlin Brandenburg", closest_big_city="Berlin")
+            get_route(source=self.busy, destination=get_airport(name="Oslo"))
+
+    def test_results_come_from_the_index(self):
+        get_index()
+        with self.assertNumQueries(0):
+            response = self.client.get(AUTOCOMPLETE_URL, {"q": "berl"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [airport["id"] for airport in response.data],
+            [self.busy.id, self.quiet.id],
+        )
+
+    def test_index_is_rebuilt_after_airport_changes(self):
+        get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            airport = get_airport(name="Bremen", closest_big_city="Bremen")
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "brem"})
+        self.assertEqual(response.data[0]["id"], airport.id)
+
+    @override_settings(AUTOCOMPLETE_CHECK_SECONDS=0)
+    def test_changes_from_other_processes_are_picked_up(self):
+        get_index()
+        # Another process commits: this one's invalidate() never runs.
+        with mock.patch("airport.autocomplete.invalidate"):
+            with self.captureOnCommitCallbacks(execute=True):
+                airport = get_airport(name="Bremen", closest_big_city="Bremen")
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "brem"})
+        self.assertEqual(response.data[0]["id"], airport.id)
+
+    @override_settings(AUTOCOMPLETE_CHECK_SECONDS=0, AUTOCOMPLETE_INDEX_TTL_SECONDS=0)
+    def test_index_expires(self):
+        get_index()
+        # Written behind the change feed's back.
+        Airport.objects.filter(id=self.quiet.id).update(name="Bremen")
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "brem"})
+        self.assertEqual(response.data[0]["id"], self.quiet.id)
+
+    @override_settings(DATABASE_REPLICAS=["replica_test"])
+    def test_index_is_built_from_the_primary(self):
+        Airport.objects.using("replica_test").create(name="Bergen", closest_big_city="Bergen")
+        response = self.client.get(AUTOCOMPLETE_URL, {"q": "ber"})
+        self.assertEqual(
+            [airport["id"] for airport in response.data],
+            [self.busy.id, self.quiet.id],
+        )
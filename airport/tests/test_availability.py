@@ -0,0 +1,117 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import availability
+from airport.models import Flight, Order, Ticket
+from airport.tests.test_views import (
+    get_simple_user,
+    get_airport,
+    get_route,
+    get_airplane,
+    get_airplane_type,
+)
+
+AVAILABILITY_URL = reverse("airport:flights-availability")
+
+
+class FlightAvailabilityTests(TestCase):
+    databases = {"default", "replica_test"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_simple_user()
+        self.client.force_authenticate(user=self.user)
+        route = get_route(
+            source=get_airport(name="src"), destination=get_airport(name="dst")
+        )
+        airplane_type = get_airplane_type()
+        self.flights = [
+            Flight.objects.create(
+                route=route,
+                airplane=get_airplane(name=f"plane{i}", airplane_type=airplane_type),
+                departure_time=timezone.now() + timedelta(days=i),
+                arrival_time=timezone.now() + timedelta(days=i, hours=2),
+            )
+            for i in range(3)
+        ]
+        self.order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flights[0], order=self.order)
+        self.capacity = self.flights[0].airplane.rows * self.flights[0].airplane.seats_in_row
+
+    def test_get_returns_requested_flights_in_order(self):
+        ids = [self.flights[1].id, self.flights[0].id, 999999]
+        response = self.client.get(
+            AVAILABILITY_URL, {"ids": ",".join(map(str, ids))}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            response.data,
+            [
+                {
+                    "id": self.flights[1].id,
+                    "capacity": self.capacity,
+                    "tickets_available": self.capacity,
+                },
+                {
+                    "id": self.flights[0].id,
+                    "capacity": self.capacity,
+                    "tickets_available": self.capacity - 1,
+                },
+            ],
+        )
+
+    def test_post_uses_one_query_then_cache(self):
+        ids = [flight.id for flight in self.flights]
+        with self.assertNumQueries(1):
+            response = self.client.post(AVAILABILITY_URL, {"ids": ids}, format="json")
+        self.assertEqual(len(response.data), 3)
+        with self.assertNumQueries(0):
+            cached = self.client.post(AVAILABILITY_URL, {"ids": ids}, format="json")
+        self.assertEqual(cached.data, response.data)
+
+    def test_new_ticket_invalidates_cache(self):
+        params = {"ids": str(self.flights[0].id)}
+        self.client.get(AVAILABILITY_URL, params)
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(
+                row=1, seat=2, flight=self.flights[0], order=self.order
+            )
+        response = self.client.get(AVAILABILITY_URL, params)
+        self.assertEqual(response.data[0]["tickets_available"], self.capacity - 2)
+
+    def test_count_taken_before_invalidation_is_not_served(self):
+        flight = self.flights[0]
+        version = availability.versions([flight.id])[flight.id]
+        stale = availability.count_availability([flight.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(row=1, seat=2, flight=flight, order=self.order)
+        # A slow request stores the count it took before the booking.
+        cache.set(availability.cache_key(flight.id, version), stale[flight.id])
+        self.assertEqual(
+            availability.flight_availability([flight.id])[flight.id],
+            (self.capacity, self.capacity - 2),
+        )
+
+    @override_settings(DATABASE_REPLICAS=["replica_test"])
+    def test_cache_misses_are_counted_on_the_primary(self):
+        # The replica database has no flights at all, like one lagging behind.
+        response = self.client.get(AVAILABILITY_URL, {"ids": str(self.flights[0].id)})
+        self.assertEqual(response.data[0]["tickets_available"], self.capacity - 1)
+
+    def test_invalid_ids(self):
+        response = self.client.get(AVAILABILITY_URL, {"ids": "1,abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(AVAILABILITY_URL, {"ids": []}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_authentication_required(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(AVAILABILITY_URL, {"ids": "1"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
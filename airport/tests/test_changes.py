@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport import changes
+from airport.deletion import delete_in_chunks
+from airport.models import Change, Flight, Order, Ticket
+from airport.tests.test_views import get_airplane, get_route, get_simple_user
+
+CHANGES_URL = reverse("airport:changes-list")
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        self.user = get_simple_user()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.route = get_route()
+        self.flight = Flight.objects.create(
+            route=self.route,
+            airplane=get_airplane(),
+            departure_time=timezone.now(),
+            arrival_time=timezone.now() + timedelta(hours=2),
+        )
+
+    def feed(self, since):
+        return self.client.get(CHANGES_URL, {"since": since})
+
+    def test_writes_are_recorded_and_sequenced(self):
+        self.assertFalse(Change.objects.filter(position__isnull=False).exists())
+        changes.sequence()
+        kinds = list(Change.objects.values_list("kind", "action"))
+        self.assertIn((Change.FLIGHT, Change.UPSERT), kinds)
+        self.assertIn((Change.ROUTE, Change.UPSERT), kinds)
+        self.assertEqual(kinds.count((Change.AIRPORT, Change.UPSERT)), 2)
+
+        cursor = changes.head()
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=1)
+        Ticket.objects.create(order=order, flight=self.flight, row=1, seat=2)
+        self.assertEqual(changes.sequence(), 1)
+        entry = Change.objects.get(position__gt=cursor)
+        self.assertEqual(entry.kind, Change.AVAILABILITY)
+        self.assertEqual(entry.object_id, self.flight.id)
+        self.assertEqual(entry.data["tickets_available"], entry.data["capacity"] - 2)
+
+    def test_rolled_back_transaction_drops_its_entries(self):
+        cursor = changes.head()
+        try:
+            with transaction.atomic():
+                changes.record(Change.AIRPORT, [424242])
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        with transaction.atomic():
+            changes.record(Change.ROUTE, [self.route.id])
+        self.assertEqual(
+            [(change["kind"], change["id"]) for change in self.feed(cursor).data["changes"]],
+            [(Change.ROUTE, self.route.id)],
+        )
+
+    def test_rolled_back_savepoint_does_not_lose_later_writes(self):
+        cursor = changes.head()
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    changes.record(Change.ROUTE, [self.route.id])
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            changes.record(Change.FLIGHT, [self.flight.id])
+        self.assertEqual(
+            [(change["kind"], change["id"]) for change in self.feed(cursor).data["changes"]],
+            [(Change.FLIGHT, self.flight.id)],
+        )
+
+    def test_entries_committed_late_are_not_skipped(self):
+        cursor = changes.head()
+        changes.record(Change.FLIGHT, [self.flight.id])
+        response = self.feed(cursor)
+        self.assertEqual(len(response.data["changes"]), 1)
+        # Written with a lower id by a transaction that committed afterwards.
+        Change.objects.create(id=0, kind=Change.ROUTE, object_id=self.route.id)
+        response = self.feed(response.data["cursor"])
+        self.assertEqual(
+            [(change["kind"], change["id"]) for change in response.data["changes"]],
+            [(Change.ROUTE, self.route.id)],
+        )
+
+    def test_feed_returns_deltas_after_cursor(self):
+        response = self.client.get(CHANGES_URL)
+        cursor = response.data["cursor"]
+        self.assertEqual(response.data["changes"], [])
+
+        self.flight.arrival_time += timedelta(hours=1)
+        self.flight.save()
+        response = self.feed(cursor)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted((change["kind"], change["id"]) for change in response.data["changes"]),
+            [(Change.AVAILABILITY, self.flight.id), (Change.FLIGHT, self.flight.id)],
+        )
+        self.assertFalse(response.data["has_more"])
+        self.assertEqual(self.feed(response.data["cursor"]).data["changes"], [])
+
+    def test_deletions(self):
+        cursor = changes.head()
+        delete_in_chunks(self.route)
+        deleted = {
+            (change["kind"], change["id"])
+            for change in self.feed(cursor).data["changes"]
+            if change["action"] == Change.DELETE
+        }
+        self.assertEqual(
+            deleted,
+            {
+                (Change.FLIGHT, self.flight.id),
+                (Change.AVAILABILITY, self.flight.id),
+                (Change.ROUTE, self.route.id),
+            },
+        )
+
+    def test_marking_an_object_again_before_sequencing_keeps_one_entry(self):
+        cursor = changes.head()
+        self.flight.save()
+        self.flight.save()
+        changes.sequence()
+        self.assertEqual(
+            Change.objects.filter(kind=Change.FLIGHT, position__gt=cursor).count(), 1
+        )
+        self.assertFalse(Change.objects.filter(position__isnull=True).exists())
+
+    def test_compaction(self):
+        changes.sequence()
+        self.flight.save()
+        compaction = changes.compact()
+        self.assertEqual(compaction.superseded, 2)
+        self.assertEqual(
+            Change.objects.filter(kind=Change.FLIGHT, object_id=self.flight.id).count(), 1
+        )
+        self.assertEqual(self.feed(0).status_code, status.HTTP_200_OK)
+
+        Change.objects.update(created_at=timezone.now() - timedelta(days=30))
+        cursor = changes.head()
+        compaction = changes.compact()
+        self.assertEqual(compaction.horizon, cursor)
+        self.assertFalse(Change.objects.exists())
+        response = self.feed(0)
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+        self.assertEqual(response.data["cursor"], cursor)
+        self.assertEqual(self.feed(cursor).status_code, status.HTTP_200_OK)
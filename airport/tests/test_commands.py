@@ -0,0 +1,32 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command, CommandError
+from django.db.utils import OperationalError
+from django.test import SimpleTestCase
+
+CHECK_DATABASE = (
+    "airport.management.commands.wait_for_db.Command.check_database"
+)
+
+
+@patch("airport.management.commands.wait_for_db.time.sleep")
+class WaitForDbTests(SimpleTestCase):
+    @patch(CHECK_DATABASE)
+    def test_database_ready(self, check_database, sleep):
+        call_command("wait_for_db", stdout=StringIO())
+        check_database.assert_called_once_with("default")
+        sleep.assert_not_called()
+
+    @patch(CHECK_DATABASE)
+    def test_retries_with_backoff(self, check_database, sleep):
+        check_database.side_effect = [OperationalError] * 3 + [None]
+        call_command("wait_for_db", stdout=StringIO())
+        self.assertEqual(check_database.call_count, 4)
+        delays = [call.args[0] for call in sleep.call_args_list]
+        self.assertEqual(delays, [0.1, 0.2, 0.4])
+
+    @patch(CHECK_DATABASE, side_effect=OperationalError)
+    def test_timeout(self, check_database, sleep):
+        with self.assertRaises(CommandError):
+            call_command("wait_for_db", timeout=0, stdout=StringIO())
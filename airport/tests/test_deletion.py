@@ -0,0 +1,124 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from airport.deletion import count_dependents, delete_in_chunks
+from airport.models import Airport, Crew, Flight, Order, Route, Ticket
+from ops import jobs
+from ops.models import Job
+from airport.tests.test_views import (
+    get_airport,
+    get_route,
+    get_airplane,
+    get_airplane_type,
+)
+
+
+class ChunkedDeletionTests(TestCase):
+    def setUp(self):
+        self.hub = get_airport(name="hub")
+        self.other = get_airport(name="other")
+        self.kept = get_airport(name="kept")
+        routes = [
+            get_route(source=self.hub, destination=self.other),
+            get_route(source=self.other, destination=self.hub),
+        ]
+        self.kept_route = get_route(source=self.other, destination=self.kept)
+        airplane_type = get_airplane_type()
+        crew = Crew.objects.create(first_name="John", last_name="Hard")
+        self.order = Order.objects.create(
+            user=get_user_model().objects.create_user(
+                email="test@test.com", password="password"
+            )
+        )
+        for i, route in enumerate(routes * 2 + [self.kept_route]):
+            flight = Flight.objects.create(
+                route=route,
+                airplane=get_airplane(name=f"plane{i}", airplane_type=airplane_type),
+                departure_time=timezone.now() + timedelta(days=i),
+                arrival_time=timezone.now() + timedelta(days=i, hours=2),
+            )
+            flight.crews.add(crew)
+            Ticket.objects.create(row=1, seat=1, flight=flight, order=self.order)
+
+    def test_dry_run_counts(self):
+        self.assertEqual(
+            count_dependents(self.hub),
+            {
+                "airport.Ticket": 4,
+                "airport.Flight_crews": 4,
+                "airport.Flight": 4,
+                "airport.Route": 2,
+                "airport.Airport": 1,
+            },
+        )
+
+    def test_delete_in_chunks(self):
+        chunks = []
+        totals = delete_in_chunks(
+            self.hub, chunk_size=3, progress=lambda counts: chunks.append(dict(counts))
+        )
+        self.assertEqual(
+            totals,
+            {
+                "airport.Ticket": 4,
+                "airport.Flight_crews": 4,
+                "airport.Flight": 4,
+                "airport.Route": 2,
+                "airport.Airport": 1,
+            },
+        )
+        self.assertEqual(chunks[0]["airport.Ticket"], 3)
+        self.assertEqual(chunks[0]["airport.Flight"], 0)
+        self.assertEqual(chunks[2]["airport.Flight"], 3)
+        self.assertFalse(Airport.objects.filter(id=self.hub.id).exists())
+        self.assertEqual(list(Route.objects.all()), [self.kept_route])
+        self.assertEqual(Flight.objects.get().route, self.kept_route)
+        self.assertEqual(self.order.tickets.count(), 1)
+
+    def test_command_and_admin_action(self):
+        out = StringIO()
+        call_command("delete_in_chunks", "route", str(self.kept_route.id), "--dry-run", stdout=out)
+        self.assertIn("airport.Flight: 1", out.getvalue())
+        self.assertTrue(Route.objects.filter(id=self.kept_route.id).exists())
+
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="password"
+        )
+        self.client.force_login(admin)
+        self.client.post(
+            reverse("admin:airport_airport_changelist"),
+            {"action": "chunked_delete", "_selected_action": [self.hub.id]},
+        )
+        self.assertTrue(Airport.objects.filter(id=self.hub.id).exists())
+        [job] = jobs.claim("maintenance", "test", 1)
+        self.assertEqual(job.kwargs, {"model": "airport.Airport", "pk": self.hub.id})
+        self.assertEqual(jobs.run_job(job), Job.DONE)
+        self.assertFalse(Airport.objects.filter(id=self.hub.id).exists())
+        self.assertEqual(Flight.objects.count(), 1)
+
+    def test_rows_added_during_deletion_are_deleted_too(self):
+        route = Route.objects.filter(source=self.hub).first()
+        added = []
+
+        def add_flight(counts):
+            # A flight booked on a hub route after its flights were deleted.
+            if not added and counts["airport.Flight"] == 4:
+                added.append(Flight.objects.create(
+                    route=route,
+                    airplane=get_airplane(name="late", airplane_type=get_airplane_type()),
+                    departure_time=timezone.now(),
+                    arrival_time=timezone.now() + timedelta(hours=2),
+                ))
+                Ticket.objects.create(row=1, seat=2, flight=added[0], order=self.order)
+
+        totals = delete_in_chunks(self.hub, chunk_size=10, progress=add_flight)
+        self.assertEqual(totals["airport.Flight"], 5)
+        self.assertEqual(totals["airport.Ticket"], 5)
+        self.assertFalse(Airport.objects.filter(id=self.hub.id).exists())
+        self.assertEqual(Flight.objects.get().route, self.kept_route)
@@ -0,0 +1,119 @@
+import asyncio
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport import live
+from airport.models import Change, Flight, Order, Ticket
+from airport.tests.test_views import get_airplane, get_route, get_simple_user
+
+
+def stream_url(flight_id):
+    return reverse("airport:flight-seats-stream", args=(flight_id,))
+
+
+@override_settings(LIVE_POLL_SECONDS=0.01)
+class FlightSeatsStreamTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_simple_user()
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.flight = Flight.objects.create(
+                route=get_route(),
+                airplane=get_airplane(),
+                departure_time=timezone.now(),
+                arrival_time=timezone.now() + timedelta(hours=2),
+            )
+
+    def sell(self, row, seat):
+        with self.captureOnCommitCallbacks(execute=True):
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(order=order, flight=self.flight, row=row, seat=seat)
+
+    async def test_seat_map_is_pushed_on_commit(self):
+        response = await self.async_client.get(
+            stream_url(self.flight.id), headers=self.headers
+        )
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+        self.assertEqual(await anext(events), b"retry: 3000\n\n")
+        first = await anext(events)
+        self.assertIn(b'"taken_place": []', first)
+
+        await sync_to_async(self.sell)(row=2, seat=3)
+        second = await asyncio.wait_for(anext(events), 1)
+        self.assertTrue(second.startswith(b"event: seats\ndata: "))
+        self.assertIn(b'"taken_place": [{"row": 2, "seat": 3}]', second)
+        await events.aclose()
+        response.close()
+
+    async def test_changes_committed_elsewhere_are_pushed(self):
+        response = await self.async_client.get(
+            stream_url(self.flight.id), headers=self.headers
+        )
+        events = aiter(response.streaming_content)
+        await anext(events)
+        await anext(events)
+
+        def sell_in_another_process():
+            # Only the change feed entry, as another server process writes it.
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(order=order, flight=self.flight, row=4, seat=1)
+            Change.objects.create(kind=Change.AVAILABILITY, object_id=self.flight.id)
+
+        await sync_to_async(sell_in_another_process)()
+        message = await asyncio.wait_for(anext(events), 1)
+        self.assertIn(b'"taken_place": [{"row": 4, "seat": 1}]', message)
+        await events.aclose()
+        response.close()
+
+    @override_settings(LIVE_MAX_STREAMS_PER_USER=1, LIVE_MAX_STREAM_SECONDS=0.2)
+    async def test_streams_per_user_are_capped(self):
+        first = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        # Runs until LIVE_MAX_STREAM_SECONDS.
+        [event async for event in first.streaming_content]
+        self.assertNotIn(self.user.pk, live._user_streams)
+
+        first = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        events = aiter(first.streaming_content)
+        await anext(events)
+        second = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        self.assertEqual(second.status_code, 429)
+        await events.aclose()
+        first.close()
+
+    @override_settings(LIVE_MAX_STREAMS_PER_USER=1)
+    async def test_slots_are_reserved_before_streaming(self):
+        first = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        second = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 429)
+
+        # Never iterated, e.g. the client went away before streaming began.
+        first.close()
+        first.close()
+        self.assertNotIn(self.user.pk, live._user_streams)
+        third = await self.async_client.get(stream_url(self.flight.id), headers=self.headers)
+        self.assertEqual(third.status_code, 200)
+        third.close()
+
+    @override_settings(THROTTLE_BUCKETS={"live_stream": {"user": {"rate": "1/min", "burst": 1}}})
+    async def test_opening_streams_is_throttled(self):
+        await self.async_client.get(stream_url(0), headers=self.headers)
+        response = await self.async_client.get(stream_url(0), headers=self.headers)
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+
+    async def test_requires_authentication(self):
+        response = await self.async_client.get(stream_url(self.flight.id))
+        self.assertEqual(response.status_code, 401)
+
+    async def test_unknown_flight(self):
+        response = await self.async_client.get(stream_url(0), headers=self.headers)
+        self.assertEqual(response.status_code, 404)
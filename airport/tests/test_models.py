@@ -1,8 +1,10 @@
 from datetime import timedelta
+from types import SimpleNamespace
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.db import IntegrityError, connection
+from django.test import SimpleTestCase, TestCase
 from django.utils import timezone
 
 from airport.models import (
@@ -14,6 +16,7 @@ from airport.models import (
     Flight,
     Order,
     Ticket,
+    is_unique_violation,
 )
 
 
@@ -135,3 +138,83 @@ class ModelsTests(TestCase):
                 flight=self.airplane,
                 error_to_raise=ValidationError,
             )
+
+
+class DatabaseValidationTests(TestCase):
+    """Ticket and Route rules enforced by the database on save."""
+
+    setUp = ModelsTests.setUp
+
+    def test_ticket_insert_is_a_single_statement(self):
+        # The second one is the change feed entry of the flight's availability.
+        with self.assertNumQueries(2):
+            self.ticket.save()
+
+    def test_ticket_out_of_range_has_validate_ticket_message(self):
+        ticket = Ticket(row=1, seat=7, flight=self.flight, order=self.order)
+        with self.assertRaises(ValidationError) as saved:
+            ticket.save()
+        with self.assertRaises(ValidationError) as validated:
+            Ticket.validate_ticket(ticket.row, ticket.seat, self.airplane, ValidationError)
+        self.assertEqual(saved.exception.message_dict, validated.exception.message_dict)
+
+    def test_duplicate_ticket(self):
+        self.ticket.save()
+        duplicate = Ticket(row=1, seat=1, flight=self.flight, order=self.order)
+        with self.assertRaises(ValidationError) as context:
+            duplicate.save()
+        self.assertIn("already exists", str(context.exception))
+
+    def test_route_with_same_source_and_destination(self):
+        with self.assertRaises(ValidationError) as context:
+            Route.objects.create(
+                source=self.airport1, destination=self.airport1, distance=100
+            )
+        self.assertIn("should be difference", str(context.exception))
+
+    def test_duplicate_route(self):
+        with self.assertRaises(ValidationError) as context:
+            Route.objects.create(
+                source=self.airport1, destination=self.airport2, distance=100
+            )
+        self.assertIn("already exists", str(context.exception))
+
+
+def integrity_error(message, cause=None):
+    error = IntegrityError(message)
+    error.__cause__ = cause
+    return error
+
+
+class UniqueViolationTests(SimpleTestCase):
+    fields = ("flight", "row", "seat")
+
+    def test_sqlite_message_names_the_columns(self):
+        error = integrity_error(
+            "UNIQUE constraint failed: "
+            "airport_ticket.flight_id, airport_ticket.row, airport_ticket.seat"
+        )
+        self.assertTrue(is_unique_violation(error, Ticket, self.fields))
+        other = integrity_error("UNIQUE constraint failed: airport_route.source_id")
+        self.assertFalse(is_unique_violation(other, Ticket, self.fields))
+        self.assertFalse(
+            is_unique_violation(integrity_error("unique-ish trigger"), Ticket, self.fields)
+        )
+
+    def test_postgresql_error_is_matched_by_code_and_constraint(self):
+        editor = connection.SchemaEditorClass(connection)
+        name = editor._create_index_name(
+            "airport_ticket", ["flight_id", "row", "seat"], suffix="_uniq"
+        )
+
+        def pg_error(pgcode, constraint_name):
+            cause = Exception("duplicate key")
+            cause.pgcode = pgcode
+            cause.diag = SimpleNamespace(constraint_name=constraint_name)
+            return integrity_error("duplicate key", cause)
+
+        self.assertTrue(is_unique_violation(pg_error("23505", name), Ticket, self.fields))
+        self.assertFalse(
+            is_unique_violation(pg_error("23505", "airport_other_uniq"), Ticket, self.fields)
+        )
+        self.assertFalse(is_unique_violation(pg_error("23514", name), Ticket, self.fields))
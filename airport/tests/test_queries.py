@@ -0,0 +1,107 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Route, Flight, Order, Ticket
+from airport.serializers import RouteListSerializer
+from airport.tests.test_views import (
+    get_simple_user,
+    get_airport,
+    get_route,
+    get_airplane,
+    get_airplane_type,
+)
+from ops.nplusone import NPlusOneError, detect_nplusone, fingerprint
+
+ROWS = 7
+
+
+class FingerprintTests(TestCase):
+    def test_literals_and_in_lists_are_stripped(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 1 AND name = 'x'"),
+            fingerprint("SELECT * FROM t WHERE id = 22 AND name = 'y'"),
+        )
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s)"),
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)"),
+        )
+
+    def test_lazy_relation_is_reported(self):
+        for i in range(ROWS):
+            get_route(
+                source=get_airport(name=f"src{i}"),
+                destination=get_airport(name=f"dst{i}"),
+            )
+        with self.assertRaises(NPlusOneError) as context:
+            with detect_nplusone(threshold=5):
+                RouteListSerializer(Route.objects.all(), many=True).data
+        self.assertIn("test_lazy_relation_is_reported", str(context.exception))
+
+
+class ListQueryShapeTests(TestCase):
+    """Listings with more rows than NPLUSONE_THRESHOLD must not lazy-load."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_simple_user()
+        self.client.force_authenticate(user=self.user)
+        airplane_type = get_airplane_type()
+        crew = Crew.objects.create(first_name="John", last_name="Hard")
+        for i in range(ROWS):
+            route = get_route(
+                source=get_airport(name=f"src{i}"),
+                destination=get_airport(name=f"dst{i}"),
+            )
+            airplane = get_airplane(
+                name=f"plane{i}", airplane_type=airplane_type
+            )
+            flight = Flight.objects.create(
+                route=route,
+                airplane=airplane,
+                departure_time=timezone.now() + timedelta(days=i),
+                arrival_time=timezone.now() + timedelta(days=i, hours=2),
+            )
+            flight.crews.add(crew)
+            order = Order.objects.create(user=self.user)
+            Ticket.objects.create(row=1, seat=1, flight=flight, order=order)
+
+    def assert_list_ok(self, url_name):
+        response = self.client.get(reverse(url_name))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), ROWS)
+
+    def test_routes(self):
+        self.assert_list_ok("airport:routes-list")
+
+    def test_airplanes(self):
+        self.assert_list_ok("airport:airplanes-list")
+
+    def test_flights(self):
+        self.assert_list_ok("airport:flights-list")
+
+    def test_orders(self):
+        self.assert_list_ok("airport:orders-list")
+
+    def test_flight_and_route_pages_are_single_queries(self):
+        # One COUNT for the paginator and one SELECT for the page; PostgreSQL
+        # first asks the planner for an estimate.
+        expected = 3 if connection.vendor == "postgresql" else 2
+        for url_name in ("airport:flights-list", "airport:routes-list"):
+            with self.assertNumQueries(expected):
+                self.assert_list_ok(url_name)
+
+    def test_flight_labels_are_computed_in_sql(self):
+        response = self.client.get(reverse("airport:flights-list"))
+        flight = Flight.objects.select_related(
+            "route__source", "route__destination"
+        ).get(id=response.data["results"][0]["id"])
+        self.assertEqual(response.data["results"][0]["route"], str(flight.route))
+        self.assertEqual(
+            response.data["results"][0]["source_name"], flight.route.source.name
+        )
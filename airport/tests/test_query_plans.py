@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from airport.models import Crew, Flight, Order, Ticket
+from airport.tests.test_views import (
+    get_simple_user,
+    get_airport,
+    get_route,
+    get_airplane,
+)
+from airport.views import (
+    RouteViewSet,
+    AirplaneViewSet,
+    FlightViewSet,
+    OrderViewSet,
+)
+
+
+class QueryPlanTests(TestCase):
+    """Every action's queryset fetches what its serializer reads, and no more."""
+
+    def setUp(self):
+        self.user = get_simple_user()
+        crew = Crew.objects.create(first_name="John", last_name="Hard")
+        self.flight = Flight.objects.create(
+            route=get_route(
+                source=get_airport(name="src"), destination=get_airport(name="dst")
+            ),
+            airplane=get_airplane(),
+            departure_time=timezone.now(),
+            arrival_time=timezone.now() + timedelta(hours=2),
+        )
+        self.flight.crews.add(crew)
+        order = Order.objects.create(user=self.user)
+        Ticket.objects.create(row=1, seat=1, flight=self.flight, order=order)
+
+    def get_view(self, viewset, action):
+        request = Request(APIRequestFactory().get("/"))
+        request.user = self.user
+        return viewset(action=action, request=request, format_kwarg=None, kwargs={})
+
+    def assert_serialized_without_queries(self, viewset, action):
+        view = self.get_view(viewset, action)
+        objects = list(view.get_queryset())
+        self.assertTrue(objects)
+        serializer = view.get_serializer(objects, many=True)
+        with self.assertNumQueries(0):
+            serializer.data
+
+    def test_read_actions_load_everything_up_front(self):
+        for viewset, action in (
+            (RouteViewSet, "list"),
+            (AirplaneViewSet, "list"),
+            (FlightViewSet, "list"),
+            (FlightViewSet, "retrieve"),
+            (OrderViewSet, "list"),
+        ):
+            with self.subTest(viewset=viewset.__name__, action=action):
+                self.assert_serialized_without_queries(viewset, action)
+
+    def test_flight_list_skips_crews_and_unused_columns(self):
+        queryset = self.get_view(FlightViewSet, "list").get_queryset()
+        self.assertFalse(queryset._prefetch_related_lookups)
+        self.assertNotIn("crews", str(queryset.query))
+        self.assertEqual(
+            queryset.query.deferred_loading,
+            ({"id", "departure_time", "arrival_time"}, False),
+        )
+
+    def test_flight_detail_shows_taken_places(self):
+        view = self.get_view(FlightViewSet, "retrieve")
+        flight = view.get_queryset().get(id=self.flight.id)
+        data = view.get_serializer(flight).data
+        self.assertEqual(data["taken_place"], [{"row": 1, "seat": 1}])
+
+    def test_write_actions_fetch_bare_rows(self):
+        for action in ("update", "partial_update", "destroy"):
+            with self.subTest(action=action):
+                queryset = self.get_view(FlightViewSet, action).get_queryset()
+                self.assertFalse(queryset._prefetch_related_lookups)
+                self.assertFalse(queryset.query.annotations)
+                self.assertFalse(queryset.query.select_related)
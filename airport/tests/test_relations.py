@@ -0,0 +1,115 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models.sql.query import Query
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight
+from airport.tests.test_views import (
+    get_airport,
+    get_route,
+    get_airplane,
+    get_airplane_type,
+)
+
+FLIGHT_URL = reverse("airport:flights-list")
+ORDERS_URL = reverse("airport:orders-list")
+
+
+class BulkRelatedFieldTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_superuser(
+                email="admin@test.com", password="password"
+            )
+        )
+        self.route = get_route(
+            source=get_airport(name="src"), destination=get_airport(name="dst")
+        )
+        self.airplane_type = get_airplane_type()
+        self.crews = [
+            Crew.objects.create(first_name=f"first{i}", last_name=f"last{i}")
+            for i in range(12)
+        ]
+        self.flights = [
+            Flight.objects.create(
+                route=self.route,
+                airplane=get_airplane(name=f"plane{i}", airplane_type=self.airplane_type),
+                departure_time=timezone.now() + timedelta(days=i),
+                arrival_time=timezone.now() + timedelta(days=i, hours=2),
+            )
+            for i in range(5)
+        ]
+
+    def count_queries(self, url, payload):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        return len(queries)
+
+    def flight_payload(self, day, crews):
+        airplane = get_airplane(name=f"new{day}", airplane_type=self.airplane_type)
+        return {
+            "route": self.route.id,
+            "airplane": airplane.id,
+            "departure_time": timezone.now() + timedelta(days=day),
+            "arrival_time": timezone.now() + timedelta(days=day, hours=2),
+            "crews": [crew.id for crew in crews],
+        }
+
+    def test_flight_crews_are_resolved_in_one_query(self):
+        one = self.count_queries(FLIGHT_URL, self.flight_payload(10, self.crews[:1]))
+        twelve = self.count_queries(FLIGHT_URL, self.flight_payload(20, self.crews))
+        self.assertEqual(one, twelve)
+
+    def test_ticket_flights_are_resolved_in_one_query(self):
+        def order(flights):
+            return {
+                "tickets": [
+                    {"row": 1, "seat": 1, "flight": flight.id} for flight in flights
+                ]
+            }
+
+        one = self.count_queries(ORDERS_URL, order(self.flights[:1]))
+        five = self.count_queries(ORDERS_URL, order(self.flights[1:]))
+        # Only the ticket INSERTs and their change feed entries scale with
+        # the payload.
+        self.assertEqual(five - one, 3 * 2)
+
+    def test_taken_seats_are_rejected(self):
+        payload = {"tickets": [{"row": 1, "seat": 1, "flight": self.flights[0].id}]}
+        self.client.post(ORDERS_URL, payload, format="json")
+        response = self.client.post(ORDERS_URL, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("already taken", str(response.data["tickets"]))
+
+        ticket = {"row": 1, "seat": 1, "flight": self.flights[1].id}
+        payload = {"tickets": [ticket, ticket]}
+        response = self.client.post(ORDERS_URL, payload, format="json")
+        self.assertIn("more than once", str(response.data["tickets"]))
+
+    def test_unknown_and_malformed_keys(self):
+        payload = self.flight_payload(30, self.crews[:1])
+        for crews, message in (([self.crews[0].id, 999999], "999999"), (["abc"], "Incorrect type")):
+            payload["crews"] = crews
+            response = self.client.post(FLIGHT_URL, payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(message, str(response.data["crews"]))
+
+    def test_lookups_are_grouped_without_compiling_sql(self):
+        payload = {
+            "tickets": [
+                {"row": 1, "seat": seat, "flight": flight.id}
+                for seat, flight in enumerate(self.flights, start=1)
+            ]
+        }
+        with mock.patch.object(Query, "__str__", side_effect=AssertionError):
+            self.count_queries(ORDERS_URL, payload)
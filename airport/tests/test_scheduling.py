@@ -0,0 +1,249 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Crew, Flight
+from airport.scheduling import crew_conflicts
+from airport.serializers import FlightSerializer
+from airport.tests.test_views import get_simple_user, get_route, get_airplane
+
+
+class CrewScheduleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.route = get_route()
+        self.crew = Crew.objects.create(first_name="John", last_name="Hard")
+        self.flight = self.get_flight(hours=0)
+        self.flight.crews.add(self.crew)
+
+    def get_flight(self, hours, duration=2):
+        return Flight.objects.create(
+            route=self.route,
+            airplane=get_airplane(name=f"plane{hours}"),
+            departure_time=self.start + timedelta(hours=hours),
+            arrival_time=self.start + timedelta(hours=hours + duration),
+        )
+
+    def test_database_rejects_overlapping_assignment(self):
+        overlapping = self.get_flight(hours=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            overlapping.crews.add(self.crew)
+
+    def test_back_to_back_flights_are_allowed(self):
+        self.get_flight(hours=2).crews.add(self.crew)
+        self.assertEqual(self.crew.flights.count(), 2)
+
+    def test_database_rejects_moving_flight_into_conflict(self):
+        later = self.get_flight(hours=5)
+        later.crews.add(self.crew)
+        later.departure_time = self.start + timedelta(hours=1)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            later.save()
+
+    def test_crew_conflicts_single_query(self):
+        other = Crew.objects.create(first_name="Jane", last_name="Doe")
+        with self.assertNumQueries(1):
+            conflicts = list(
+                crew_conflicts(
+                    [self.crew.id, other.id],
+                    self.start + timedelta(hours=1),
+                    self.start + timedelta(hours=3),
+                )
+            )
+        self.assertEqual(
+            [(c.crew_id, c.flight_id) for c in conflicts],
+            [(self.crew.id, self.flight.id)],
+        )
+
+    def test_create_flight_with_busy_crew_returns_400(self):
+        self.client.force_authenticate(get_simple_user(is_staff=True))
+        response = self.client.post(
+            reverse("airport:flights-list"),
+            {
+                "route": self.route.id,
+                "airplane": get_airplane(name="free").id,
+                "departure_time": self.start + timedelta(hours=1),
+                "arrival_time": self.start + timedelta(hours=4),
+                "crews": [self.crew.id],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crews", response.data)
+
+    @patch.object(FlightSerializer, "validate", lambda self, attrs: attrs)
+    def test_database_conflict_returns_400(self):
+        # Without validate() the trigger is what catches the overlap, as when
+        # a concurrent request assigned the crew member first.
+        self.client.force_authenticate(get_simple_user(is_staff=True))
+        response = self.client.post(
+            reverse("airport:flights-list"),
+            {
+                "route": self.route.id,
+                "airplane": get_airplane(name="free").id,
+                "departure_time": self.start + timedelta(hours=1),
+                "arrival_time": self.start + timedelta(hours=4),
+                "crews": [self.crew.id],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["crews"],
+            [f"{self.crew} is already assigned to flight {self.flight.id}"],
+        )
+        self.assertEqual(Flight.objects.count(), 1)
+
+        later = self.get_flight(hours=5)
+        later.crews.add(self.crew)
+        response = self.client.patch(
+            reverse("airport:flights-detail", args=(later.id,)),
+            {"departure_time": self.start + timedelta(hours=1)},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("crews", response.data)
+
+    def test_conflicts_endpoint(self):
+        # Conflicts can only predate the trigger, so switch it off to make one.
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(
+                    "ALTER TABLE airport_flight_crews "
+                    "DISABLE TRIGGER airport_flight_crews_no_overlap"
+                )
+            else:
+                cursor.execute("DROP TRIGGER airport_flight_crews_no_overlap")
+        overlapping = self.get_flight(hours=1)
+        overlapping.crews.add(self.crew)
+        self.get_flight(hours=3).crews.add(self.crew)
+
+        self.client.force_authenticate(get_simple_user())
+        response = self.client.get(
+            reverse("airport:crews-conflicts"),
+            {"from": self.start.date().isoformat()},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        conflict = response.data["results"][0]
+        self.assertEqual(conflict["crew"], self.crew.id)
+        self.assertEqual(conflict["flight"], self.flight.id)
+        self.assertEqual(conflict["conflicting_flight"], overlapping.id)
+
+        response = self.client.get(
+            reverse("airport:crews-conflicts"),
+            {"from": (self.start + timedelta(days=1)).isoformat()},
+        )
+        self.assertEqual(response.data["results"], [])
+
+    def test_conflicts_endpoint_rejects_bad_window(self):
+        self.client.force_authenticate(get_simple_user())
+        response = self.client.get(
+            reverse("airport:crews-conflicts"), {"from": "yesterday"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AirplaneScheduleTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.start = timezone.now().replace(microsecond=0) + timedelta(days=1)
+        self.route = get_route()
+        self.airplane = get_airplane()
+        self.crew = Crew.objects.create(first_name="John", last_name="Hard")
+        self.flight = self.get_flight(hours=0)
+
+    def get_flight(self, hours, duration=2):
+        return Flight.objects.create(
+            route=self.route,
+            airplane=self.airplane,
+            departure_time=self.start + timedelta(hours=hours),
+            arrival_time=self.start + timedelta(hours=hours + duration),
+        )
+
+    def test_database_rejects_overlapping_use_of_airplane(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.get_flight(hours=1)
+
+    def test_database_rejects_arrival_before_departure(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.get_flight(hours=10, duration=-1)
+
+    def test_create_flight_with_busy_airplane_returns_400(self):
+        self.client.force_authenticate(get_simple_user(is_staff=True))
+        response = self.client.post(
+            reverse("airport:flights-list"),
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": self.start + timedelta(hours=1),
+                "arrival_time": self.start + timedelta(hours=4),
+                "crews": [self.crew.id],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("airplane", response.data)
+
+    @patch.object(FlightSerializer, "validate", lambda self, attrs: attrs)
+    def test_database_conflict_returns_400(self):
+        self.client.force_authenticate(get_simple_user(is_staff=True))
+        response = self.client.post(
+            reverse("airport:flights-list"),
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": self.start + timedelta(hours=1),
+                "arrival_time": self.start + timedelta(hours=4),
+                "crews": [self.crew.id],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["airplane"],
+            [f"{self.airplane} is already scheduled for an overlapping flight"],
+        )
+
+    def test_create_flight_arriving_before_departure_returns_400(self):
+        self.client.force_authenticate(get_simple_user(is_staff=True))
+        response = self.client.post(
+            reverse("airport:flights-list"),
+            {
+                "route": self.route.id,
+                "airplane": self.airplane.id,
+                "departure_time": self.start + timedelta(hours=8),
+                "arrival_time": self.start + timedelta(hours=7),
+                "crews": [self.crew.id],
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("arrival_time", response.data)
+
+    def test_timeline(self):
+        second = self.get_flight(hours=3)
+        self.get_flight(hours=48)
+        get_airplane(name="other")
+        self.client.force_authenticate(get_simple_user())
+        response = self.client.get(
+            reverse("airport:airplanes-timeline", args=(self.airplane.id,)),
+            {
+                "from": self.start.isoformat(),
+                "to": (self.start + timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [flight["id"] for flight in response.data["results"]],
+            [self.flight.id, second.id],
+        )
+        self.assertEqual(response.data["results"][0]["route"], str(self.route))
+
+        response = self.client.get(
+            reverse("airport:airplanes-timeline", args=(self.airplane.id,)),
+            {"from": self.start.isoformat(), "to": "2100-01-01", "limit": 2},
+        )
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
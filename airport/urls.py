@@ -1,6 +1,7 @@
 from django.urls import path, include
 from rest_framework import routers
 
+from airport.live import flight_seats_stream
 from airport.views import (
     CrewViewSet,
     AirportViewSet,
@@ -9,6 +10,7 @@ from airport.views import (
     AirplaneViewSet,
     FlightViewSet,
     OrderViewSet,
+    ChangeViewSet,
 )
 
 router = routers.DefaultRouter()
@@ -19,9 +21,15 @@ router.register(r"airplane_types", AirplaneTypeViewSet, basename="airplane_types
 router.register(r"airplanes", AirplaneViewSet, basename="airplanes")
 router.register(r"flights", FlightViewSet, basename="flights")
 router.register(r"orders", OrderViewSet, basename="orders")
+router.register(r"changes", ChangeViewSet, basename="changes")
 
 
 urlpatterns = [
+    path(
+        "flights/<int:pk>/seats/stream/",
+        flight_seats_stream,
+        name="flight-seats-stream",
+    ),
     path("", include(router.urls)),
 ]
 
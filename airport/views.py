@@ -1,13 +1,25 @@
-from datetime import datetime
+from datetime import datetime, time, timedelta
 
-from django.db.models import F, Count
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiParameter
-from rest_framework import viewsets, mixins
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet
 
+from airport.autocomplete import search_airports
+from airport.availability import flight_availability
 from airport.permissions import IsAdminOrIfAuthenticatedReadOnly
+from airport import changes, query_plans
+from airport.query_plans import QueryPlanMixin
+from ops.idempotency import IDEMPOTENCY_KEY_PARAMETER, IdempotentCreateMixin
+from ops.instrumentation import ServerTimingMixin
+from ops.routers import ReplicaReadMixin
 from airport.models import (
     Crew,
     Airport,
@@ -17,9 +29,12 @@ from airport.models import (
     Flight,
     Order,
 )
+from airport.scheduling import airplane_timeline, crew_conflicts_in_window
 from airport.serializers import (
     CrewSerializer,
+    CrewConflictSerializer,
     AirportSerializer,
+    AirportAutocompleteSerializer,
     RouteSerializer,
     RouteListSerializer,
     AirplaneTypeSerializer,
@@ -28,27 +43,108 @@ from airport.serializers import (
     FlightSerializer,
     FlightListSerializer,
     FlightDetailSerializer,
+    FlightTimelineSerializer,
+    FlightAvailabilitySerializer,
+    FlightAvailabilityQuerySerializer,
+    ChangeFeedSerializer,
     OrderSerializer,
     OrderListSerializer,
 )
 
 
-class CrewViewSet(viewsets.ModelViewSet):
+def parse_moment(name, value):
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValidationError({name: "Expected a date or datetime (ex. 2022-10-23)"})
+        moment = datetime.combine(day, time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def parse_window(query_params, default_days=7):
+    start = query_params.get("from")
+    end = query_params.get("to")
+    start = parse_moment("from", start) if start else timezone.now()
+    end = parse_moment("to", end) if end else start + timedelta(days=default_days)
+    if end <= start:
+        raise ValidationError({"to": "Must be later than from"})
+    return start, end
+
+
+WINDOW_PARAMETERS = [
+    OpenApiParameter(
+        "from",
+        type=OpenApiTypes.DATETIME,
+        description="Start of the window, defaults to now (ex. ?from=2022-10-23)",
+    ),
+    OpenApiParameter(
+        "to",
+        type=OpenApiTypes.DATETIME,
+        description="End of the window, defaults to a week after from (ex. ?to=2022-10-30)",
+    ),
+]
+
+
+class CrewViewSet(ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet):
     queryset = Crew.objects.all()
     serializer_class = CrewSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    @extend_schema(
+        parameters=WINDOW_PARAMETERS,
+        responses=CrewConflictSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def conflicts(self, request):
+        """Crew members assigned to overlapping flights within a window"""
+        start, end = parse_window(request.query_params)
+        conflicts = crew_conflicts_in_window(start, end)
+        page = self.paginate_queryset(conflicts)
+        serializer = CrewConflictSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
 
-class AirportViewSet(viewsets.ModelViewSet):
+class AirportViewSet(ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet):
     queryset = Airport.objects.all()
     serializer_class = AirportSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "q",
+                type=OpenApiTypes.STR,
+                description="Prefix of an airport name or city (ex. ?q=ber)",
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum number of results, 10 by default",
+            ),
+        ],
+        responses=AirportAutocompleteSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"])
+    def autocomplete(self, request):
+        """Airports whose name or city starts with q, busiest first"""
+        try:
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer"})
+        limit = max(1, min(limit, settings.AUTOCOMPLETE_MAX_LIMIT))
+        return Response(search_airports(request.query_params.get("q", ""), limit))
+
 
-class RouteViewSet(viewsets.ModelViewSet):
-    queryset = Route.objects.select_related("source", "destination")
+class RouteViewSet(
+    QueryPlanMixin, ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet
+):
+    queryset = Route.objects.all()
     serializer_class = RouteSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_plans = {"list": query_plans.route_list}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -56,7 +152,7 @@ class RouteViewSet(viewsets.ModelViewSet):
         return self.serializer_class
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
         if source:
@@ -87,16 +183,19 @@ class RouteViewSet(viewsets.ModelViewSet):
         return super().list(request, *args, **kwargs)
 
 
-class AirplaneTypeViewSet(viewsets.ModelViewSet):
+class AirplaneTypeViewSet(ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet):
     queryset = AirplaneType.objects.all()
     serializer_class = AirplaneTypeSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
 
 
-class AirplaneViewSet(viewsets.ModelViewSet):
-    queryset = Airplane.objects.select_related("airplane_type")
+class AirplaneViewSet(
+    QueryPlanMixin, ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet
+):
+    queryset = Airplane.objects.all()
     serializer_class = AirplaneSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    query_plans = {"list": query_plans.airplane_list}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -104,7 +203,7 @@ class AirplaneViewSet(viewsets.ModelViewSet):
         return self.serializer_class
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
         airplane_type = self.request.query_params.get("airplane_type")
         if airplane_type:
             queryset = queryset.filter(
@@ -124,21 +223,33 @@ class AirplaneViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
-
-class FlightViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Flight.objects.
-        select_related("route", "airplane").
-        prefetch_related("crews").
-        annotate(
-            tickets_available=(
-                    F("airplane__rows") * F("airplane__seats_in_row")
-                    - Count("tickets")
-            )
-        )
+    @extend_schema(
+        parameters=WINDOW_PARAMETERS,
+        responses=FlightTimelineSerializer(many=True),
     )
+    @action(detail=True, methods=["get"])
+    def timeline(self, request, pk=None):
+        """Flights of the airplane within a window, in departure order"""
+        airplane = self.get_object()
+        start, end = parse_window(request.query_params)
+        flights = airplane_timeline(airplane.id, start, end).with_labels()
+        page = self.paginate_queryset(flights)
+        serializer = FlightTimelineSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+
+class FlightViewSet(
+    QueryPlanMixin, ReplicaReadMixin, ServerTimingMixin, viewsets.ModelViewSet
+):
+    queryset = Flight.objects.all()
+    query_plans = {
+        "list": query_plans.flight_list,
+        "retrieve": query_plans.flight_detail,
+    }
     serializer_class = FlightSerializer
     permission_classes = (IsAdminOrIfAuthenticatedReadOnly,)
+    read_only_actions = ("availability",)
+    throttle_scopes = {"list": "flight_search"}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -148,7 +259,7 @@ class FlightViewSet(viewsets.ModelViewSet):
         return self.serializer_class
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
         date = self.request.query_params.get("date")
         source = self.request.query_params.get("source")
         destination = self.request.query_params.get("destination")
@@ -190,15 +301,63 @@ class FlightViewSet(viewsets.ModelViewSet):
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @extend_schema(
+        methods=["GET"],
+        parameters=[
+            OpenApiParameter(
+                "ids",
+                type=OpenApiTypes.STR,
+                description="Comma-separated flight ids (ex. ?ids=1,2,3)",
+                required=True,
+            ),
+        ],
+        responses=FlightAvailabilitySerializer(many=True),
+    )
+    @extend_schema(
+        methods=["POST"],
+        request=FlightAvailabilityQuerySerializer,
+        responses=FlightAvailabilitySerializer(many=True),
+    )
+    @action(
+        detail=False,
+        methods=["get", "post"],
+        permission_classes=(IsAuthenticated,),
+    )
+    def availability(self, request):
+        """Capacity and free seats of many flights, for long lists use POST"""
+        if request.method == "GET":
+            data = {"ids": request.query_params.get("ids", "").split(",")}
+        else:
+            data = request.data
+        query = FlightAvailabilityQuerySerializer(data=data)
+        query.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(query.validated_data["ids"]))
+        availability = flight_availability(ids)
+        return Response([
+            {
+                "id": flight_id,
+                "capacity": availability[flight_id][0],
+                "tickets_available": availability[flight_id][1],
+            }
+            for flight_id in ids
+            if flight_id in availability
+        ])
+
 
 class OrderViewSet(
+    QueryPlanMixin,
+    ReplicaReadMixin,
+    ServerTimingMixin,
+    IdempotentCreateMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     GenericViewSet,
 ):
-    queryset = Order.objects.prefetch_related("tickets")
+    queryset = Order.objects.all()
+    query_plans = {"list": query_plans.order_list}
     serializer_class = OrderSerializer
     permission_classes = (IsAuthenticated,)
+    throttle_scopes = {"create": "order_create"}
 
     def get_serializer_class(self):
         if self.action == "list":
@@ -206,7 +365,66 @@ class OrderViewSet(
         return self.serializer_class
 
     def get_queryset(self):
-        return Order.objects.filter(user=self.request.user)
+        return super().get_queryset().filter(user=self.request.user)
+
+    @extend_schema(parameters=[IDEMPOTENCY_KEY_PARAMETER])
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+class ChangeViewSet(ReplicaReadMixin, ServerTimingMixin, GenericViewSet):
+    permission_classes = (IsAuthenticated,)
+    serializer_class = ChangeFeedSerializer
+    pagination_class = None
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(
+                "since",
+                type=OpenApiTypes.INT,
+                description=(
+                    "Cursor of the last change already applied; leave out to "
+                    "get the cursor to start from after a full download"
+                ),
+            ),
+            OpenApiParameter(
+                "limit",
+                type=OpenApiTypes.INT,
+                description="Maximum number of changes, 500 by default",
+            ),
+        ],
+    )
+    def list(self, request):
+        """
+        Flights, routes, airports and seat availability changed after a
+        cursor, oldest first. 410 means the cursor expired: download
+        everything again and continue from the cursor in the response.
+        """
+        since = request.query_params.get("since")
+        if since is None:
+            return Response({"cursor": changes.head(), "has_more": False, "changes": []})
+        try:
+            since = int(since)
+        except ValueError:
+            raise ValidationError({"since": "Expected an integer"})
+        try:
+            limit = int(request.query_params.get("limit", 500))
+        except ValueError:
+            raise ValidationError({"limit": "Expected an integer"})
+        limit = max(1, min(limit, settings.CHANGE_FEED_MAX_LIMIT))
+        try:
+            entries, has_more = changes.changes_since(since, limit)
+        except changes.CursorExpired:
+            return Response(
+                {"detail": "Cursor expired, resync", "cursor": changes.head()},
+                status=status.HTTP_410_GONE,
+            )
+        serializer = self.get_serializer({
+            "cursor": entries[-1].position if entries else since,
+            "has_more": has_more,
+            "changes": entries,
+        })
+        return Response(serializer.data)
@@ -0,0 +1,100 @@
+from django.contrib import admin
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.html import format_html
+
+from ops.models import Job, Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        "created_at",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "user",
+    )
+    list_filter = ("method", "status_code")
+    list_select_related = ("user",)
+    search_fields = ("path",)
+    fields = (
+        "created_at",
+        "user",
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "query_count",
+        "download",
+        "stats_text",
+        "sql_log_text",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "<int:pk>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="ops_profile_download",
+            ),
+        ] + super().get_urls()
+
+    def download_view(self, request, pk):
+        profile = get_object_or_404(Profile, pk=pk)
+        response = HttpResponse(
+            f"{profile.stats}\n\nSQL ({profile.query_count} queries)\n"
+            f"{profile.sql_log}",
+            content_type="text/plain; charset=utf-8",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="profile-{profile.pk}.txt"'
+        )
+        return response
+
+    @admin.display(description="Download")
+    def download(self, obj):
+        url = reverse("admin:ops_profile_download", args=(obj.pk,))
+        return format_html('<a href="{}">profile-{}.txt</a>', url, obj.pk)
+
+    @admin.display(description="Stats")
+    def stats_text(self, obj):
+        return format_html("<pre>{}</pre>", obj.stats)
+
+    @admin.display(description="SQL")
+    def sql_log_text(self, obj):
+        return format_html("<pre>{}</pre>", obj.sql_log)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "task", "queue", "status", "attempts", "run_at", "finished_at")
+    list_filter = ("status", "queue")
+    search_fields = ("task",)
+    readonly_fields = (
+        "created_at",
+        "started_at",
+        "finished_at",
+        "worker",
+        "attempts",
+        "last_error",
+    )
+    actions = ("retry",)
+
+    @admin.action(description="Run selected jobs again")
+    def retry(self, request, queryset):
+        count = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now()
+        )
+        self.message_user(request, f"Queued {count} jobs")
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class OpsConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "ops"
+
+    def ready(self):
+        from ops import jobs  # noqa: F401
+
+        autodiscover_modules("tasks")
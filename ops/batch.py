@@ -0,0 +1,165 @@
+"""
+``POST /api/batch/``: several API calls in one round trip.
+
+The batch request is authenticated once; every sub-request is dispatched
+in-process to the view its path resolves to, with the batch's user forced
+on it, so the JWT is not decoded again and no middleware runs per call.
+With ``"transaction": true`` the sub-requests, which must then all be GETs,
+share one read-only transaction on the primary, so they see the same
+snapshot of the data (``REPEATABLE READ`` on PostgreSQL).
+"""
+import io
+import json
+from inspect import iscoroutinefunction
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, transaction
+from django.urls import Resolver404, resolve
+from drf_spectacular.utils import extend_schema
+from rest_framework import serializers
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ops.routers import primary_only
+
+# Parent request headers that must not reach the sub-requests.
+DROPPED_HEADERS = ("HTTP_AUTHORIZATION", "HTTP_IDEMPOTENCY_KEY", "HTTP_CONTENT_LENGTH")
+RETURNED_HEADERS = ("Content-Type", "Location", "Retry-After", "Idempotent-Replayed")
+
+
+class SubRequestSerializer(serializers.Serializer):
+    method = serializers.ChoiceField(
+        choices=("GET", "POST", "PUT", "PATCH", "DELETE"), default="GET"
+    )
+    path = serializers.CharField()
+    headers = serializers.DictField(child=serializers.CharField(), required=False)
+    body = serializers.JSONField(required=False)
+
+    def validate_path(self, value):
+        if not urlsplit(value).path.startswith(settings.BATCH_PATH_PREFIXES):
+            raise serializers.ValidationError(
+                f"Only paths under {', '.join(settings.BATCH_PATH_PREFIXES)} can be batched"
+            )
+        return value
+
+
+class BatchSerializer(serializers.Serializer):
+    requests = serializers.ListField(
+        child=SubRequestSerializer(),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_REQUESTS,
+    )
+    transaction = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["transaction"] and any(
+            sub["method"] != "GET" for sub in data["requests"]
+        ):
+            raise serializers.ValidationError(
+                {"transaction": "Only batches of GET requests can share a transaction"}
+            )
+        return data
+
+
+class SubResponseSerializer(serializers.Serializer):
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField()
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = SubResponseSerializer(many=True)
+
+
+def build_request(parent, sub):
+    """A ``WSGIRequest`` for ``sub`` carrying the parent's user and client."""
+    url = urlsplit(sub["path"])
+    body = b"" if "body" not in sub else json.dumps(sub["body"]).encode()
+    environ = {
+        key: value
+        for key, value in parent.META.items()
+        if key.startswith("HTTP_") and key not in DROPPED_HEADERS
+    }
+    for name in ("REMOTE_ADDR", "SERVER_NAME", "SERVER_PORT", "SERVER_PROTOCOL"):
+        if name in parent.META:
+            environ[name] = parent.META[name]
+    for name, value in sub.get("headers", {}).items():
+        environ[f"HTTP_{name.upper().replace('-', '_')}"] = value
+    # Sub-responses are embedded in the JSON batch response.
+    environ.update({
+        "REQUEST_METHOD": sub["method"],
+        "PATH_INFO": url.path,
+        "SCRIPT_NAME": "",
+        "QUERY_STRING": url.query,
+        "CONTENT_TYPE": "application/json",
+        "HTTP_ACCEPT": "application/json",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.url_scheme": parent.scheme,
+    })
+    request = WSGIRequest(environ)
+    request.user = parent.user
+    request._force_auth_user = parent.user
+    request._force_auth_token = parent.auth
+    return request
+
+
+def error(status, detail):
+    return {"status": status, "headers": {}, "body": {"detail": detail}}
+
+
+def dispatch(parent, sub):
+    request = build_request(parent, sub)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return error(404, "Not found.")
+    if iscoroutinefunction(match.func):
+        return error(400, "This endpoint cannot be batched.")
+    request.resolver_match = match
+    response = match.func(request, *match.args, **match.kwargs)
+    if hasattr(response, "render"):
+        response.render()
+    if response.streaming:
+        return error(400, "Streaming responses cannot be batched.")
+    body = response.content.decode(response.charset) or None
+    if body and response.get("Content-Type", "").startswith("application/json"):
+        body = json.loads(body)
+    return {
+        "status": response.status_code,
+        "headers": {
+            name: response[name] for name in RETURNED_HEADERS if response.has_header(name)
+        },
+        "body": body,
+    }
+
+
+class BatchView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    @extend_schema(request=BatchSerializer, responses=BatchResponseSerializer)
+    def post(self, request):
+        """
+        Run up to BATCH_MAX_REQUESTS calls to /api/airport/ and /api/user/
+        and return their responses in order
+        """
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        subs = serializer.validated_data["requests"]
+        if not serializer.validated_data["transaction"]:
+            return Response({"responses": [dispatch(request, sub) for sub in subs]})
+        outermost = not connection.in_atomic_block
+        with primary_only(), transaction.atomic():
+            if outermost and connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"
+                    )
+            responses = [dispatch(request, sub) for sub in subs]
+        return Response({"responses": responses})
+
+
+batch_view = BatchView.as_view()
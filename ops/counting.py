@@ -0,0 +1,56 @@
+"""
+Row counts that stay cheap on large tables.
+
+``COUNT(*)`` scans the whole table on PostgreSQL. For an unfiltered queryset
+the planner's estimate in ``pg_class.reltuples`` is good enough to size a
+paginator once the table is past ``ESTIMATED_COUNT_THRESHOLD`` rows; for a
+filtered one ``planner_estimate`` asks ``EXPLAIN`` instead.
+"""
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_count(queryset):
+    """The planner's row estimate for an unfiltered queryset, else ``None``."""
+    query = queryset.query
+    if query.has_filters() or query.is_sliced or query.distinct or query.combinator:
+        return None
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+            [connection.ops.quote_name(queryset.model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    # reltuples is -1 for tables that were never vacuumed or analyzed.
+    if row is None or row[0] < 0:
+        return None
+    return row[0]
+
+
+def planner_estimate(queryset):
+    """
+    The planner's row estimate for any queryset on PostgreSQL, else ``None``.
+    """
+    estimate = estimated_count(queryset)
+    if estimate is not None or connections[queryset.db].vendor != "postgresql":
+        return estimate
+    plan = json.loads(queryset.explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Uses ``estimated_count`` for big unfiltered lists, an exact count otherwise."""
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is not None and estimate >= settings.ESTIMATED_COUNT_THRESHOLD:
+            return estimate
+        return super().count
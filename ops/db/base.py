@@ -0,0 +1,212 @@
+"""
+PostgreSQL backend that counts connections and can pool them in-process.
+
+Enable it with ``"ENGINE": "ops.db"``. Pooling is switched on by
+``OPTIONS["pool"] = {"min_size": ..., "max_size": ..., "timeout": ...}``;
+``min_size`` idle connections are kept open between requests, up to
+``max_size`` are handed out concurrently, and a request that finds them all in
+use waits up to ``timeout`` seconds for one to be returned. With
+``CONN_HEALTH_CHECKS`` an idle connection is pinged before it is handed out,
+and one the server dropped is discarded.
+"""
+import threading
+import time
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgresDatabaseWrapper
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+import psycopg2
+from psycopg2 import extensions, extras
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+
+class ConnectionStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+        self.failed = 0
+
+    def incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "opened": self.opened,
+                "reused": self.reused,
+                "failed": self.failed,
+            }
+
+
+class ConnectionPool(ThreadedConnectionPool):
+    def __init__(self, minconn, maxconn, factory, timeout=10, health_checks=False):
+        self._factory = factory
+        self.timeout = timeout
+        self.health_checks = health_checks
+        super().__init__(minconn, maxconn)
+        self._returned = threading.Condition(self._lock)
+
+    def _connect(self, key=None):
+        conn = self._factory()
+        if key is not None:
+            self._used[key] = conn
+            self._rused[id(conn)] = key
+        else:
+            self._pool.append(conn)
+        return conn
+
+    def checkout(self):
+        """
+        Return a live connection and whether it was taken from the idle set.
+        Raises ``PoolError`` if none is free within ``timeout`` seconds.
+        """
+        deadline = time.monotonic() + self.timeout
+        while True:
+            with self._returned:
+                while not self._pool and len(self._used) >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0 or not self._returned.wait(remaining):
+                        raise PoolError(
+                            f"connection pool exhausted after waiting {self.timeout}s"
+                        )
+                reused = bool(self._pool)
+                conn = self._getconn()
+            if not reused or self.is_usable(conn):
+                return conn, reused
+            self.putconn(conn, close=True)
+
+    def is_usable(self, conn):
+        if conn.closed:
+            return False
+        if not self.health_checks:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def putconn(self, conn=None, key=None, close=False):
+        with self._returned:
+            self._putconn(conn, key, close)
+            self._returned.notify()
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                "idle": len(self._pool),
+                "in_use": len(self._used),
+                "max_size": self.maxconn,
+            }
+
+
+_stats = {}
+_pools = {}
+_registry_lock = threading.Lock()
+
+
+def get_stats(alias):
+    with _registry_lock:
+        return _stats.setdefault(alias, ConnectionStats())
+
+
+def connection_stats():
+    """Counters for every database alias served by this backend."""
+    with _registry_lock:
+        aliases = dict(_stats)
+        pools = dict(_pools)
+    result = {}
+    for alias, stats in aliases.items():
+        result[alias] = stats.as_dict()
+        if alias in pools:
+            result[alias]["pool"] = pools[alias].as_dict()
+    return result
+
+
+class DatabaseWrapper(PostgresDatabaseWrapper):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = get_stats(self.alias)
+        self._kept_alive = False
+
+    def get_connection_params(self):
+        options = self.settings_dict["OPTIONS"]
+        pool_options = options.pop("pool", None)
+        try:
+            return super().get_connection_params()
+        finally:
+            if pool_options is not None:
+                options["pool"] = pool_options
+
+    def _open(self, conn_params):
+        try:
+            connection = self.Database.connect(**conn_params)
+        except self.Database.Error:
+            self.stats.incr("failed")
+            raise
+        self.stats.incr("opened")
+        extras.register_default_jsonb(conn_or_curs=connection, loads=lambda x: x)
+        return connection
+
+    def get_pool(self, conn_params):
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if not pool_options:
+            return None
+        with _registry_lock:
+            pool = _pools.get(self.alias)
+            if pool is None:
+                pool = _pools[self.alias] = ConnectionPool(
+                    pool_options.get("min_size", 1),
+                    pool_options.get("max_size", 10),
+                    factory=lambda: self._open(conn_params),
+                    timeout=pool_options.get("timeout", 10),
+                    health_checks=self.settings_dict["CONN_HEALTH_CHECKS"],
+                )
+        return pool
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool(conn_params)
+        if pool is None:
+            try:
+                connection = super().get_new_connection(conn_params)
+            except self.Database.Error:
+                self.stats.incr("failed")
+                raise
+            self.stats.incr("opened")
+            return connection
+
+        try:
+            connection, reused = pool.checkout()
+        except PoolError:
+            self.stats.incr("failed")
+            raise
+        if reused:
+            self.stats.incr("reused")
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        pool = _pools.get(self.alias)
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection, close=self.connection.closed != 0)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        self._kept_alive = self.connection is not None
+
+    def ensure_connection(self):
+        if self._kept_alive and self.connection is not None:
+            self.stats.incr("reused")
+        self._kept_alive = False
+        super().ensure_connection()
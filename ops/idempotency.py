@@ -0,0 +1,139 @@
+"""
+``Idempotency-Key`` support for DRF create actions.
+
+The first request with a given key runs normally and its response is kept
+in the ``IdempotencyKey`` table for ``IDEMPOTENCY_TTL_SECONDS``, per user.
+Retries with the same key and body get that response back (marked
+``Idempotent-Replayed``) without running the action again.
+
+The first request claims the key by inserting its row, so the unique
+constraint on (user, key) decides between concurrent requests in every
+process. The row carries a random token; only the request holding it stores
+the response or releases the row, and a request that has not finished after
+``IDEMPOTENCY_LOCK_SECONDS`` (e.g. its process died) can be taken over by
+moving the token. A retry that arrives while the first request is still
+running waits up to ``IDEMPOTENCY_WAIT_SECONDS`` for its result, then gives
+up with 409.
+"""
+import hashlib
+import json
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from ops.models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.05
+
+IDEMPOTENCY_KEY_PARAMETER = OpenApiParameter(
+    HEADER,
+    type=OpenApiTypes.STR,
+    location=OpenApiParameter.HEADER,
+    description="Unique key per logical request; retries with it are not repeated",
+)
+
+
+def request_fingerprint(request):
+    return hashlib.sha256(request.body).hexdigest()
+
+
+def claim(user, key, fingerprint, token):
+    """
+    Take ``key`` for the request holding ``token``. Returns ``None`` when
+    claimed, otherwise the row of the request that has it.
+    """
+    now = timezone.now()
+    claimed = {
+        "fingerprint": fingerprint,
+        "token": token,
+        "locked_until": now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_SECONDS),
+        "created_at": now,
+        "status_code": None,
+        "response": None,
+        "location": "",
+    }
+    try:
+        with transaction.atomic():
+            IdempotencyKey.objects.create(user=user, key=key, **claimed)
+        return None
+    except IntegrityError:
+        pass
+    row = IdempotencyKey.objects.filter(user=user, key=key).first()
+    if row is None:
+        # Released or pruned meanwhile.
+        return claim(user, key, fingerprint, token)
+    expired = row.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+    abandoned = row.status_code is None and row.locked_until < now
+    if (expired or abandoned) and IdempotencyKey.objects.filter(
+        id=row.id, token=row.token
+    ).update(**claimed):
+        return None
+    return row
+
+
+class IdempotentCreateMixin:
+    def create(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return super().create(request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({HEADER: f"At most {MAX_KEY_LENGTH} characters"})
+
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        fingerprint = request_fingerprint(request)
+        token = uuid.uuid4().hex
+
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        while (row := claim(request.user, digest, fingerprint, token)) is not None:
+            if row.fingerprint != fingerprint:
+                return self.mismatch()
+            if row.status_code is not None:
+                return self.replay(row)
+            if time.monotonic() >= deadline:
+                return Response(
+                    {"detail": "A request with this Idempotency-Key is in progress."},
+                    status=status.HTTP_409_CONFLICT,
+                    headers={"Retry-After": "1"},
+                )
+            time.sleep(POLL_INTERVAL)
+
+        mine = IdempotencyKey.objects.filter(
+            user=request.user, key=digest, token=token, status_code__isnull=True
+        )
+        response = None
+        try:
+            response = super().create(request, *args, **kwargs)
+        finally:
+            if response is not None and response.status_code < 500:
+                mine.update(
+                    status_code=response.status_code,
+                    response=json.loads(JSONRenderer().render(response.data)),
+                    location=response.get("Location") or "",
+                )
+            else:
+                mine.delete()
+        return response
+
+    def mismatch(self):
+        return Response(
+            {"detail": "This Idempotency-Key was used with a different request."},
+            status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    def replay(self, row):
+        headers = {"Idempotent-Replayed": "true"}
+        if row.location:
+            headers["Location"] = row.location
+        return Response(row.response, status=row.status_code, headers=headers)
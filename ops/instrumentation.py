@@ -0,0 +1,73 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+        self.query_count = 0
+
+    def add(self, name, seconds):
+        self.durations[name] = self.durations.get(name, 0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.add("db", time.perf_counter() - start)
+
+    def server_timing(self):
+        entries = [
+            f'db;dur={self.durations.get("db", 0) * 1000:.1f};'
+            f'desc="{self.query_count} queries"'
+        ]
+        for name in ("view", "serialize", "render", "total"):
+            if name in self.durations:
+                entries.append(f"{name};dur={self.durations[name] * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def current_timings():
+    return _current.get()
+
+
+def activate(timings):
+    return _current.set(timings)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - start)
+
+
+class ServerTimingMixin:
+    """Reports the time the outermost serializer spends building its output."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            with span("serialize"):
+                return to_representation(instance)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
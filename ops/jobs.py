@@ -0,0 +1,326 @@
+"""
+A database-backed job queue.
+
+Functions decorated with ``@task`` are enqueued as ``Job`` rows, in the same
+transaction as the write that caused them, and run by ``manage.py
+run_worker``. Workers claim ready jobs with ``SELECT ... FOR UPDATE SKIP
+LOCKED`` where the database supports it, and with a conditional ``UPDATE``
+per job elsewhere, so several workers never run the same job. A failing job
+is retried with exponential backoff until ``max_attempts``. Workers update
+``heartbeat_at`` of their running jobs every ``JOB_HEARTBEAT_SECONDS``; a
+job without a heartbeat for ``JOB_TIMEOUT_SECONDS`` belongs to a dead worker
+and is queued again. ``JOB_QUEUES`` caps how many jobs of each queue run at
+once across all workers: counting the running jobs and claiming happen under
+a per-queue advisory lock on PostgreSQL and in a single ``UPDATE`` per job
+elsewhere. A worker that loses the database backs off and carries on.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from ops.metrics import _format_labels, registry
+from ops.models import Job
+
+logger = logging.getLogger(__name__)
+
+tasks = {}
+
+
+class Task:
+    def __init__(self, func, queue, max_attempts):
+        self.func = func
+        self.name = f"{func.__module__}.{func.__name__}"
+        self.queue = queue
+        self.max_attempts = max_attempts
+
+    def __call__(self, **kwargs):
+        return self.func(**kwargs)
+
+    def enqueue(self, delay=0, **kwargs):
+        return Job.objects.create(
+            queue=self.queue,
+            task=self.name,
+            kwargs=kwargs,
+            max_attempts=self.max_attempts,
+            run_at=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(queue="default", max_attempts=5):
+    """Register a function taking JSON-serializable keyword arguments."""
+
+    def decorator(func):
+        registered = Task(func, queue, max_attempts)
+        tasks[registered.name] = registered
+        return registered
+
+    return decorator
+
+
+def backoff(attempts):
+    """Seconds before retrying a job that failed ``attempts`` times."""
+    delay = min(
+        settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_SECONDS,
+    )
+    return delay * random.uniform(0.5, 1)
+
+
+def running(queue):
+    return Job.objects.filter(queue=queue, status=Job.RUNNING)
+
+
+def free_slots(queue, wanted):
+    limit = settings.JOB_QUEUES.get(queue)
+    if limit is None:
+        return wanted
+    return max(0, min(wanted, limit - running(queue).count()))
+
+
+def lock_queue(queue):
+    """Serialize claims on ``queue`` until the transaction ends (PostgreSQL)."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [f"ops_job:{queue}"])
+
+
+def claim(queue, worker, limit):
+    """Mark up to ``limit`` ready jobs of ``queue`` as running by ``worker``."""
+    now = timezone.now()
+    ready = Job.objects.filter(
+        queue=queue, status=Job.QUEUED, run_at__lte=now
+    ).order_by("run_at", "id")
+    started = {
+        "status": Job.RUNNING,
+        "worker": worker,
+        "started_at": now,
+        "heartbeat_at": now,
+        "attempts": F("attempts") + 1,
+    }
+    queue_limit = settings.JOB_QUEUES.get(queue)
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            if queue_limit is not None and connection.vendor == "postgresql":
+                lock_queue(queue)
+            limit = free_slots(queue, limit)
+            ids = list(
+                ready.select_for_update(skip_locked=True).values_list("id", flat=True)[:limit]
+            )
+            Job.objects.filter(id__in=ids).update(**started)
+    else:
+        claimable = Job.objects.filter(status=Job.QUEUED)
+        if queue_limit is not None:
+            # Checked by the UPDATE itself, so two workers cannot both take
+            # the last slot.
+            count = running(queue).order_by().values("queue").annotate(count=Count("id"))
+            claimable = claimable.alias(
+                running=Coalesce(Subquery(count.values("count")), 0)
+            ).filter(running__lt=queue_limit)
+        ids = [
+            job_id
+            for job_id in ready.values_list("id", flat=True)[:free_slots(queue, limit)]
+            if claimable.filter(id=job_id).update(**started)
+        ]
+    return list(Job.objects.filter(id__in=ids).order_by("run_at", "id"))
+
+
+def run_job(job):
+    """Run a claimed job and record the outcome. Returns the new status."""
+    try:
+        tasks[job.task](**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("Job %s failed (attempt %s)", job, job.attempts, exc_info=True)
+        if job.task in tasks and job.attempts < job.max_attempts:
+            status = Job.QUEUED
+            run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+        else:
+            status = Job.FAILED
+            run_at = job.run_at
+        Job.objects.filter(id=job.id).update(
+            status=status, run_at=run_at, last_error=error, finished_at=timezone.now()
+        )
+        return status
+    Job.objects.filter(id=job.id).update(
+        status=Job.DONE, last_error="", finished_at=timezone.now()
+    )
+    return Job.DONE
+
+
+def requeue_stale():
+    """Put jobs whose worker stopped sending heartbeats back in the queue."""
+    stale = Job.objects.filter(
+        status=Job.RUNNING,
+        heartbeat_at__lt=timezone.now() - timedelta(seconds=settings.JOB_TIMEOUT_SECONDS),
+    )
+    failed = stale.filter(attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, last_error="Timed out", finished_at=timezone.now()
+    )
+    return failed + stale.update(status=Job.QUEUED, last_error="Timed out")
+
+
+def enqueue_scheduled():
+    """Enqueue each ``JOB_SCHEDULE`` task that has not run within its interval."""
+    now = timezone.now()
+    for name, entry in settings.JOB_SCHEDULE.items():
+        since = now - timedelta(seconds=entry["every"])
+        if not Job.objects.filter(task=name, created_at__gte=since).exists():
+            tasks[name].enqueue(**entry.get("kwargs", {}))
+
+
+def prune_finished():
+    cutoff = timezone.now() - timedelta(seconds=settings.JOB_KEEP_DONE_SECONDS)
+    return Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()[0]
+
+
+class Worker:
+    """
+    Runs jobs of ``queues`` on ``concurrency`` threads until ``stop()``.
+    Housekeeping (stale jobs, the schedule, pruning) runs every
+    ``JOB_HOUSEKEEPING_SECONDS``, heartbeats every ``JOB_HEARTBEAT_SECONDS``.
+    """
+
+    def __init__(self, queues, concurrency=1, name=None):
+        self.queues = list(queues)
+        self.concurrency = concurrency
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.running = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._housekept_at = None
+        self._heartbeat_at = None
+
+    def stop(self):
+        self._stopping.set()
+
+    def housekeeping(self):
+        now = time.monotonic()
+        if (
+            self._housekept_at is not None
+            and now - self._housekept_at < settings.JOB_HOUSEKEEPING_SECONDS
+        ):
+            return
+        self._housekept_at = now
+        requeue_stale()
+        enqueue_scheduled()
+        prune_finished()
+
+    def heartbeat(self):
+        now = time.monotonic()
+        if (
+            self._heartbeat_at is not None
+            and now - self._heartbeat_at < settings.JOB_HEARTBEAT_SECONDS
+        ):
+            return
+        self._heartbeat_at = now
+        Job.objects.filter(worker=self.name, status=Job.RUNNING).update(
+            heartbeat_at=timezone.now()
+        )
+
+    def claim(self):
+        jobs = []
+        for queue in self.queues:
+            with self._lock:
+                free = self.concurrency - self.running - len(jobs)
+            if free <= 0:
+                break
+            jobs.extend(claim(queue, self.name, free))
+        return jobs
+
+    def _run(self, job):
+        try:
+            run_job(job)
+        finally:
+            with self._lock:
+                self.running -= 1
+
+    def _run_in_thread(self, job):
+        try:
+            self._run(job)
+        finally:
+            close_old_connections()
+
+    def run_pending(self, executor=None):
+        """Claim and run what is ready now. Returns the number of jobs started."""
+        self.heartbeat()
+        self.housekeeping()
+        jobs = self.claim()
+        for job in jobs:
+            with self._lock:
+                self.running += 1
+            if executor is None:
+                self._run(job)
+            else:
+                executor.submit(self._run_in_thread, job)
+        return len(jobs)
+
+    def run(self, burst=False):
+        """Poll every ``JOB_POLL_SECONDS``; with ``burst`` stop once idle."""
+        failures = 0
+        with ThreadPoolExecutor(self.concurrency, "job-worker") as executor:
+            while not self._stopping.is_set():
+                try:
+                    started = self.run_pending(executor)
+                except DatabaseError:
+                    failures += 1
+                    logger.exception("Job worker %s lost the database", self.name)
+                    close_old_connections()
+                    self._stopping.wait(backoff(failures))
+                    continue
+                failures = 0
+                if burst and not started and not self.running:
+                    break
+                if not started:
+                    self._stopping.wait(settings.JOB_POLL_SECONDS)
+
+
+@registry.register_collector
+def job_queue():
+    try:
+        return job_queue_lines()
+    except DatabaseError:
+        return []
+
+
+def job_queue_lines():
+    depth = "airport_job_queue_depth"
+    age = "airport_job_oldest_ready_seconds"
+    lines = [
+        f"# HELP {depth} Jobs by queue and status, finished jobs excluded.",
+        f"# TYPE {depth} gauge",
+    ]
+    counts = (
+        Job.objects.exclude(status=Job.DONE)
+        .values_list("queue", "status")
+        .annotate(count=Count("id"))
+        .order_by("queue", "status")
+    )
+    for queue, status, count in counts:
+        labels = _format_labels((("queue", queue), ("status", status)))
+        lines.append(f"{depth}{{{labels}}} {count}")
+    lines += [
+        f"# HELP {age} Time the oldest ready job of each queue has been waiting.",
+        f"# TYPE {age} gauge",
+    ]
+    now = timezone.now()
+    oldest = (
+        Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+        .values_list("queue")
+        .annotate(run_at=Min("run_at"))
+        .order_by("queue")
+    )
+    for queue, run_at in oldest:
+        labels = _format_labels((("queue", queue),))
+        lines.append(f"{age}{{{labels}}} {(now - run_at).total_seconds():.3f}")
+    return lines
@@ -0,0 +1,41 @@
+import signal
+
+from django.conf import settings
+from django.core.management import BaseCommand
+
+from ops.jobs import Worker
+
+
+class Command(BaseCommand):
+    """Run background jobs from the database queue until stopped"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--queue",
+            action="append",
+            dest="queues",
+            help="Queue to work on, may be repeated. Defaults to every JOB_QUEUES entry.",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=4,
+            help="Jobs run at once by this worker.",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="Exit once no job is ready instead of polling.",
+        )
+
+    def handle(self, *args, **options):
+        queues = options["queues"] or list(settings.JOB_QUEUES)
+        worker = Worker(queues, concurrency=options["concurrency"])
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *args: worker.stop())
+        self.stdout.write(
+            f"Worker {worker.name} on {', '.join(queues)} "
+            f"with concurrency {worker.concurrency}"
+        )
+        worker.run(burst=options["burst"])
+        self.stdout.write(self.style.SUCCESS("Worker stopped"))
@@ -0,0 +1,89 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+# Run in a fresh interpreter: what a server process does before it can
+# answer its first request.
+BOOT = """
+import json, resource, sys, time
+start = time.perf_counter()
+from {wsgi} import application
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "modules": sorted(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(stderr):
+    """Microseconds spent importing each top-level package, its own code only."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_time, _, name = line[len("import time:"):].split("|")
+        if self_time.strip().isdigit():
+            package = name.strip().split(".")[0]
+            packages[package] = packages.get(package, 0) + int(self_time)
+    return packages
+
+
+class Command(BaseCommand):
+    """Measure process startup: import time, memory and the slowest imports"""
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs", type=int, default=5, help="Fresh processes to start."
+        )
+        parser.add_argument(
+            "--top", type=int, default=15, help="Slowest packages to list."
+        )
+        parser.add_argument(
+            "--module",
+            action="append",
+            dest="modules",
+            default=[],
+            help="Report whether this module was imported, may be repeated.",
+        )
+
+    def boot(self):
+        script = BOOT.format(wsgi=settings.WSGI_APPLICATION.rsplit(".", 1)[0])
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            env=env,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        return json.loads(result.stdout), parse_importtime(result.stderr)
+
+    def handle(self, *args, **options):
+        if options["runs"] < 1:
+            raise CommandError("--runs must be at least 1")
+        runs = [self.boot() for _ in range(options["runs"])]
+        seconds = [stats["seconds"] for stats, _ in runs]
+        stats, packages = runs[seconds.index(statistics.median_low(seconds))]
+
+        self.stdout.write(
+            f"Startup over {len(runs)} runs: median {statistics.median(seconds) * 1000:.0f} ms, "
+            f"min {min(seconds) * 1000:.0f} ms, max {max(seconds) * 1000:.0f} ms"
+        )
+        self.stdout.write(f"Peak RSS: {stats['max_rss_kb'] / 1024:.1f} MiB")
+        self.stdout.write(f"Modules imported: {len(stats['modules'])}")
+        for module in options["modules"]:
+            loaded = "yes" if module in stats["modules"] else "no"
+            self.stdout.write(f"  {module}: {loaded}")
+        self.stdout.write("Import time by package (median run):")
+        slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)
+        for package, microseconds in slowest[:options["top"]]:
+            self.stdout.write(f"  {microseconds / 1000:8.1f} ms  {package}")
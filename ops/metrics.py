@@ -0,0 +1,183 @@
+import threading
+from bisect import bisect_left
+
+from ops.db.base import connection_stats
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+FAST_DURATION_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01)
+
+
+def _format_labels(labels):
+    return ",".join(f'{name}="{value}"' for name, value in labels)
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(zip(self.label_names, labels))
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, label_names=()):
+        super().__init__(name, help_text, label_names)
+        self._series = {}
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            series = dict(self._series)
+        lines = self.header()
+        for key, value in sorted(series.items()):
+            lines.append(f"{self.name}{{{_format_labels(key)}}} {_format_value(value)}")
+        return lines
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, label_names=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        with self._lock:
+            series = {
+                key: (list(counts), total, count)
+                for key, (counts, total, count) in self._series.items()
+            }
+        lines = self.header()
+        for key, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                labels = _format_labels(key + (("le", bound),))
+                lines.append(f"{self.name}_bucket{{{labels}}} {cumulative}")
+            labels = _format_labels(key)
+            lines.append(f"{self.name}_sum{{{labels}}} {_format_value(total)}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        """``collector`` is called on every scrape and returns metric lines."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    "airport_request_duration_seconds",
+    "Total time spent handling a request.",
+    ("route",),
+))
+view_duration = registry.register(Histogram(
+    "airport_view_duration_seconds",
+    "Time spent inside the view, serialization included.",
+    ("route",),
+))
+serialize_duration = registry.register(Histogram(
+    "airport_serialize_duration_seconds",
+    "Time spent in serializer to_representation.",
+    ("route",),
+))
+db_duration = registry.register(Histogram(
+    "airport_db_duration_seconds",
+    "Time spent executing SQL per request.",
+    ("route",),
+))
+db_queries = registry.register(Histogram(
+    "airport_db_queries",
+    "Number of SQL statements per request.",
+    ("route",),
+    buckets=QUERY_COUNT_BUCKETS,
+))
+response_size = registry.register(Histogram(
+    "airport_response_size_bytes",
+    "Size of the response body.",
+    ("route",),
+    buckets=SIZE_BUCKETS,
+))
+
+throttle_decisions = registry.register(Counter(
+    "airport_throttle_decisions_total",
+    "Token bucket checks by scope, bucket kind and outcome.",
+    ("scope", "kind", "outcome"),
+))
+
+throttle_duration = registry.register(Histogram(
+    "airport_throttle_check_seconds",
+    "Time spent checking one token bucket in the cache.",
+    ("scope", "kind"),
+    buckets=FAST_DURATION_BUCKETS,
+))
+
+
+@registry.register_collector
+def database_connections():
+    name = "airport_db_connections_total"
+    lines = [
+        f"# HELP {name} Database connections by outcome.",
+        f"# TYPE {name} counter",
+    ]
+    for alias, stats in sorted(connection_stats().items()):
+        for outcome in ("opened", "reused", "failed"):
+            labels = _format_labels((("alias", alias), ("outcome", outcome)))
+            lines.append(f"{name}{{{labels}}} {stats[outcome]}")
+    return lines
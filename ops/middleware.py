@@ -0,0 +1,79 @@
+import time
+from contextlib import ExitStack
+
+from django.db import connections
+
+from ops import metrics
+from ops.instrumentation import RequestTimings, activate, deactivate
+
+
+def route_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unmatched"
+    return match.view_name or match._func_path
+
+
+class ServerTimingMiddleware:
+    """
+    Records SQL, view, serializer and render time of every request, sends
+    them back in a ``Server-Timing`` header and feeds the ``/metrics``
+    histograms.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        request._timings = timings
+        token = activate(timings)
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(
+                        connections[alias].execute_wrapper(timings.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            deactivate(token)
+
+        now = time.perf_counter()
+        view_started = getattr(request, "_view_started", None)
+        view_finished = getattr(request, "_view_finished", None)
+        if view_finished is not None:
+            timings.add("render", now - view_finished)
+        elif view_started is not None:
+            timings.add("view", now - view_started)
+        timings.add("total", now - timings.started)
+
+        size = None if response.streaming else len(response.content)
+        header = timings.server_timing()
+        if size is not None:
+            header += f', size;desc="{size} bytes"'
+        response["Server-Timing"] = header
+        self.observe(request, timings, size)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        started = getattr(request, "_view_started", None)
+        if started is not None:
+            request._view_finished = time.perf_counter()
+            request._timings.add("view", request._view_finished - started)
+        return response
+
+    def observe(self, request, timings, size):
+        route = route_name(request)
+        durations = timings.durations
+        metrics.request_duration.observe(durations["total"], route)
+        metrics.db_duration.observe(durations.get("db", 0), route)
+        metrics.db_queries.observe(timings.query_count, route)
+        if "view" in durations:
+            metrics.view_duration.observe(durations["view"], route)
+        if "serialize" in durations:
+            metrics.serialize_duration.observe(durations["serialize"], route)
+        if size is not None:
+            metrics.response_size.observe(size, route)
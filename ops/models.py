@@ -0,0 +1,118 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class Profile(models.Model):
+    created_at = models.DateTimeField(auto_now_add=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="profiles",
+        on_delete=models.SET_NULL,
+        null=True,
+    )
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2048)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    stats = models.TextField()
+    sql_log = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
+
+    @classmethod
+    def trim(cls, keep):
+        """Drop everything but the ``keep`` most recent profiles."""
+        oldest_kept = cls.objects.order_by("-id").values_list("id", flat=True)[
+            keep - 1:keep
+        ]
+        if oldest_kept:
+            cls.objects.filter(id__lt=oldest_kept[0]).delete()
+
+
+class Job(models.Model):
+    """A unit of background work, picked up by ``manage.py run_worker``."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUSES = (
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    )
+
+    queue = models.CharField(max_length=50, default="default")
+    task = models.CharField(max_length=200)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUSES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+        indexes = [
+            models.Index(
+                fields=("queue", "run_at"),
+                condition=models.Q(status="queued"),
+                name="ops_job_ready_idx",
+            ),
+            models.Index(fields=("task", "created_at"), name="ops_job_task_idx"),
+            models.Index(fields=("status", "finished_at"), name="ops_job_finished_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    """
+    An ``Idempotency-Key`` seen from a user, see ``ops.idempotency``. Rows
+    without a ``status_code`` are requests still in progress, owned by the
+    request holding ``token``.
+    """
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, related_name="+", on_delete=models.CASCADE
+    )
+    key = models.CharField(max_length=64)
+    fingerprint = models.CharField(max_length=64)
+    token = models.CharField(max_length=32)
+    locked_until = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response = models.JSONField(null=True, blank=True)
+    location = models.CharField(max_length=2048, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=("user", "key"), name="ops_idempotency_key_unique"),
+        ]
+        indexes = [
+            models.Index(fields=("created_at",), name="ops_idempotency_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.status_code or 'in progress'})"
+
+    @classmethod
+    def prune(cls, ttl):
+        """Drop keys older than ``ttl`` seconds."""
+        cutoff = timezone.now() - timedelta(seconds=ttl)
+        return cls.objects.filter(created_at__lt=cutoff).delete()[0]
@@ -0,0 +1,134 @@
+"""
+Detection of repeated query shapes ("N+1" queries) within one unit of work.
+
+Every statement is reduced to a fingerprint with literals and placeholder
+lists stripped, so ``... WHERE id = 1`` and ``... WHERE id = 2`` share a
+shape. When a shape runs more than ``threshold`` times the Python stack of
+the offending execution is kept for the report.
+"""
+import logging
+import os
+import re
+import sysconfig
+import traceback
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+import django
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+_IGNORED = ("SAVEPOINT", "RELEASE SAVEPOINT", "ROLLBACK TO SAVEPOINT")
+
+_SKIPPED_PATHS = (
+    os.path.dirname(django.__file__),
+    os.path.dirname(__file__),
+)
+_STDLIB = sysconfig.get_paths()["stdlib"]
+
+
+class NPlusOneError(AssertionError):
+    pass
+
+
+def fingerprint(sql):
+    sql = _STRING.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def _is_reported(filename):
+    if filename.startswith(_SKIPPED_PATHS):
+        return False
+    return not filename.startswith(_STDLIB) or "-packages" in filename
+
+
+def caller_stack():
+    return [
+        frame for frame in traceback.extract_stack()
+        if _is_reported(frame.filename)
+    ]
+
+
+class QueryShapeCounter:
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.counts = Counter()
+        self.stacks = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(_IGNORED):
+            shape = fingerprint(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == self.threshold + 1:
+                self.stacks[shape] = caller_stack()
+        return execute(sql, params, many, context)
+
+    def offenders(self):
+        return [
+            (shape, self.counts[shape], stack)
+            for shape, stack in self.stacks.items()
+        ]
+
+    def report(self):
+        lines = []
+        for shape, count, stack in self.offenders():
+            lines.append(
+                f"Query shape ran {count} times (threshold {self.threshold}):"
+            )
+            lines.append(f"    {shape}")
+            lines.extend(
+                "  " + line.rstrip("\n")
+                for line in traceback.format_list(stack)
+            )
+        return "\n".join(lines)
+
+    def check(self, mode="raise"):
+        if not self.stacks:
+            return
+        if mode == "raise":
+            raise NPlusOneError(self.report())
+        logger.warning(self.report())
+
+
+@contextmanager
+def detect_nplusone(threshold=None, mode="raise"):
+    """
+    Count query shapes on every connection inside the block and complain
+    about the ones that ran more than ``threshold`` times::
+
+        with detect_nplusone(threshold=3):
+            RouteListSerializer(Route.objects.all(), many=True).data
+    """
+    if threshold is None:
+        threshold = settings.NPLUSONE_THRESHOLD
+    counter = QueryShapeCounter(threshold)
+    with ExitStack() as stack:
+        for alias in connections:
+            stack.enter_context(connections[alias].execute_wrapper(counter))
+        yield counter
+    counter.check(mode)
+
+
+class NPlusOneMiddleware:
+    """
+    Runs every request under ``detect_nplusone`` when ``NPLUSONE_MODE`` is
+    ``"warn"`` or ``"raise"``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = getattr(settings, "NPLUSONE_MODE", "off")
+        if mode == "off":
+            return self.get_response(request)
+        with detect_nplusone(mode=mode):
+            return self.get_response(request)
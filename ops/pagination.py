@@ -0,0 +1,105 @@
+"""
+Limit/offset pagination without a ``COUNT(*)`` on every page.
+
+``count`` comes from the first of: a recently cached count of the same
+query, the planner's estimate once it passes ``ESTIMATED_COUNT_THRESHOLD``
+rows, or an exact count. Only large counts are cached, for
+``PAGINATION_COUNT_CACHE_SECONDS``, so small listings stay exact. Clients
+that do not need a total send ``?count=false``. ``count_exact`` tells
+whether ``count`` was just counted. The next link never depends on the
+count: each page fetches one extra row to find out whether more follow.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from ops.counting import planner_estimate
+
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def count_cache_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    digest = hashlib.sha1(repr((queryset.db, sql, params)).encode()).hexdigest()
+    return f"count:{digest}"
+
+
+class ApproximateCountPagination(LimitOffsetPagination):
+    count_query_param = "count"
+    count_query_description = "Set to false to skip the total count."
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count, self.count_exact = self.get_count_info(queryset)
+        if self.count is not None and self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        return rows[:self.limit]
+
+    def get_count_info(self, queryset):
+        """``(count, exact)``; the count is ``None`` when the client opted out."""
+        wanted = self.request.query_params.get(self.count_query_param, "")
+        if wanted.lower() in FALSE_VALUES:
+            return None, False
+        key = count_cache_key(queryset)
+        count = cache.get(key)
+        if count is not None:
+            return count, False
+
+        threshold = settings.ESTIMATED_COUNT_THRESHOLD
+        estimate = planner_estimate(queryset)
+        if estimate is not None and estimate >= threshold:
+            cache.set(key, estimate, settings.PAGINATION_COUNT_CACHE_SECONDS)
+            return estimate, False
+        count = self.get_count(queryset)
+        if count >= threshold:
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_SECONDS)
+        return count, True
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "count": self.count,
+            "count_exact": self.count_exact,
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        properties = response_schema["properties"]
+        properties["count"]["nullable"] = True
+        response_schema["properties"] = {
+            "count": properties.pop("count"),
+            "count_exact": {"type": "boolean", "example": True},
+            **properties,
+        }
+        return response_schema
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.count_query_param,
+                "required": False,
+                "in": "query",
+                "description": self.count_query_description,
+                "schema": {"type": "boolean"},
+            },
+        ]
@@ -0,0 +1,112 @@
+import cProfile
+import io
+import pstats
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from ops.models import Profile
+
+SORT_KEYS = ("cumulative", "tottime", "calls", "ncalls")
+
+
+class SQLLog:
+    def __init__(self):
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            alias = context["connection"].alias
+            self.entries.append(f"{duration:8.2f} ms  [{alias}] {sql}")
+
+    def __str__(self):
+        return "\n".join(self.entries)
+
+
+def requested_profile(request):
+    return request.GET.get("_profile") or request.headers.get("X-Profile")
+
+
+def staff_user(request):
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return user if user.is_staff else None
+    try:
+        result = JWTAuthentication().authenticate(request)
+    except AuthenticationFailed:
+        return None
+    if result is None or not result[0].is_staff:
+        return None
+    return result[0]
+
+
+class ProfilerMiddleware:
+    """
+    Runs a request under cProfile when a staff user asks for it with
+    ``?_profile=1`` or an ``X-Profile: 1`` header. The sorted stats and the
+    SQL log are stored as a ``Profile`` (see the admin) and its id is sent
+    back in ``X-Profile-Id``; ``?_profile=inline`` returns the stats instead
+    of the response body.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        flag = requested_profile(request)
+        if not flag or not request.path.startswith(settings.PROFILER_PATH_PREFIXES):
+            return self.get_response(request)
+        user = staff_user(request)
+        if user is None:
+            return self.get_response(request)
+
+        sql_log = SQLLog()
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            # Reads may go to a replica alias, see ops.routers.
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(sql_log))
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        duration = (time.perf_counter() - start) * 1000
+
+        sort = request.GET.get("_profile_sort", "cumulative")
+        if sort not in SORT_KEYS:
+            sort = "cumulative"
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats(sort).print_stats(
+            settings.PROFILER_STATS_LIMIT
+        )
+        profile = Profile.objects.create(
+            user=user,
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            duration_ms=duration,
+            query_count=len(sql_log.entries),
+            stats=output.getvalue(),
+            sql_log=str(sql_log),
+        )
+        Profile.trim(settings.PROFILER_BUFFER_SIZE)
+
+        if flag == "inline":
+            response = HttpResponse(
+                f"{profile.stats}\n\nSQL ({profile.query_count} queries)\n"
+                f"{profile.sql_log}",
+                content_type="text/plain; charset=utf-8",
+            )
+        response["X-Profile-Id"] = str(profile.id)
+        return response
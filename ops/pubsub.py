@@ -0,0 +1,142 @@
+"""
+Publish/subscribe between the code that commits writes and async views that
+stream them to clients.
+
+``get_broker()`` returns the ``PUBSUB_BROKER`` instance. Any thread may
+``publish()``; subscribers are async iterators living on an event loop.
+``InProcessBroker`` only reaches subscribers of the same process: each
+process has to publish what its own subscribers need, as ``airport.live``
+does by polling the change feed, or a broker backed by a shared service
+with the same three methods has to be plugged in.
+
+A subscription keeps only the latest message of its channel: a client that
+falls behind gets the current state instead of every intermediate one, and
+an idle subscriber costs one small object.
+"""
+import asyncio
+import threading
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from ops.metrics import registry
+
+CLOSED = object()
+
+
+class Subscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self._latest = None
+        self._ready = asyncio.Event()
+
+    def deliver(self, message):
+        """Called on the subscription's loop."""
+        if self._latest is not CLOSED:
+            self._latest = message
+        self._ready.set()
+
+    async def get(self):
+        """The next message, or ``CLOSED`` once the broker shuts down."""
+        await self._ready.wait()
+        self._ready.clear()
+        message, self._latest = self._latest, None
+        if message is CLOSED:
+            # Every later get() returns CLOSED right away.
+            self._latest = CLOSED
+            self._ready.set()
+        return message
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class Broker:
+    def subscribe(self, channel):
+        """Return a ``Subscription`` to ``channel``; call from a coroutine."""
+        raise NotImplementedError
+
+    def unsubscribe(self, subscription):
+        raise NotImplementedError
+
+    def publish(self, channel, message):
+        raise NotImplementedError
+
+    def has_subscribers(self, channel):
+        """Lets publishers skip building messages nobody listens to."""
+        return True
+
+    def close(self):
+        """End every subscription, e.g. when the server shuts down."""
+
+
+class InProcessBroker(Broker):
+    def __init__(self):
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(self, channel)
+        with self._lock:
+            self._channels.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.deliver, message)
+            except RuntimeError:
+                # The subscriber's loop is closed.
+                self.unsubscribe(subscription)
+        return len(subscribers)
+
+    def has_subscribers(self, channel):
+        return channel in self._channels
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def close(self):
+        with self._lock:
+            channels = list(self._channels)
+        for channel in channels:
+            self.publish(channel, CLOSED)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(settings.PUBSUB_BROKER)()
+    return _broker
+
+
+@registry.register_collector
+def subscribers():
+    name = "airport_pubsub_subscribers"
+    count = getattr(_broker, "subscriber_count", None)
+    if count is None:
+        return []
+    return [
+        f"# HELP {name} Open subscriptions to the in-process broker.",
+        f"# TYPE {name} gauge",
+        f"{name} {count()}",
+    ]
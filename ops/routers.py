@@ -0,0 +1,106 @@
+"""
+Primary/replica routing.
+
+Reads of ``REPLICA_APPS`` models go to a replica only while a view wrapped
+in ``ReplicaReadMixin`` handles a safe request, so anything outside those
+views keeps reading from the primary. The replica is picked from
+``DATABASE_REPLICAS`` once per request, so a page and its count, and objects
+loaded through relations, come from the same replica. A user who just wrote
+something is pinned to the primary for ``REPLICA_PIN_SECONDS`` so they read
+their own writes despite replication lag.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+_replica = ContextVar("replica", default=None)
+_primary_only = ContextVar("primary_only", default=False)
+
+
+def pin_key(user_id):
+    return f"replica-pin:{user_id}"
+
+
+def pin_to_primary(user):
+    if user is not None and user.is_authenticated:
+        cache.set(pin_key(user.pk), True, settings.REPLICA_PIN_SECONDS)
+
+
+def is_pinned(user):
+    if user is None or not user.is_authenticated:
+        return False
+    return bool(cache.get(pin_key(user.pk)))
+
+
+@contextmanager
+def primary_only():
+    """Read from the primary inside the block, even in replica-read views."""
+    token = _primary_only.set(True)
+    try:
+        yield
+    finally:
+        _primary_only.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            # Related objects come from where the instance was read.
+            return instance._state.db
+        replica = _replica.get()
+        if (
+            replica is not None
+            and not _primary_only.get()
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return replica
+        return None
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaReadMixin:
+    """
+    Serve safe requests of a DRF view from the replicas. Actions listed in
+    ``read_only_actions`` are treated as safe whatever their method.
+    """
+
+    read_only_actions = ()
+    _replica_token = None
+
+    def is_read_only(self, request):
+        return (
+            request.method in SAFE_METHODS
+            or getattr(self, "action", None) in self.read_only_actions
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._replica_token is not None:
+                _replica.reset(self._replica_token)
+                self._replica_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        replicas = settings.DATABASE_REPLICAS
+        if replicas and self.is_read_only(request) and not is_pinned(request.user):
+            self._replica_token = _replica.set(random.choice(replicas))
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if not self.is_read_only(request) and response.status_code < 400:
+            pin_to_primary(getattr(request, "user", None))
+        return super().finalize_response(request, response, *args, **kwargs)
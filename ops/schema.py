@@ -0,0 +1,80 @@
+"""
+The OpenAPI schema and its documentation pages, kept out of process startup.
+
+The schema is generated once at image build::
+
+    python manage.py spectacular --format openapi-json --file openapi-schema.json
+
+and ``schema_view`` serves that file (``OPENAPI_SCHEMA_FILE``) from memory
+with an ``ETag``, so clients revalidate instead of downloading it again.
+Without the file, e.g. in development, the schema is generated on the first
+request and kept for the life of the process.
+
+drf_spectacular's views, generator and YAML support are only imported when
+the schema has to be generated or a documentation page is opened; API
+workers that never serve them do not load them.
+"""
+import hashlib
+import threading
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_safe
+
+CONTENT_TYPE = "application/vnd.oai.openapi+json"
+
+_schemas = {}
+_lock = threading.Lock()
+
+
+def generate_schema():
+    """The public schema rendered as JSON, like ``manage.py spectacular``."""
+    from drf_spectacular.renderers import OpenApiJsonRenderer
+    from drf_spectacular.settings import spectacular_settings
+
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiJsonRenderer().render(schema, renderer_context={})
+
+
+def get_schema():
+    """The schema as bytes and its ETag, read or generated once per process."""
+    path = Path(settings.OPENAPI_SCHEMA_FILE)
+    if path not in _schemas:
+        with _lock:
+            if path not in _schemas:
+                try:
+                    body = path.read_bytes()
+                except FileNotFoundError:
+                    body = generate_schema()
+                _schemas[path] = (body, hashlib.sha256(body).hexdigest()[:32])
+    return _schemas[path]
+
+
+@require_safe
+@cache_control(public=True, no_cache=True)
+@condition(etag_func=lambda request: get_schema()[1])
+def schema_view(request):
+    return HttpResponse(get_schema()[0], content_type=CONTENT_TYPE)
+
+
+def lazy_view(view_class, **initkwargs):
+    """``view_class.as_view(**initkwargs)``, imported on the first request."""
+    view = None
+
+    @csrf_exempt
+    def wrapper(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(view_class).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+
+    return wrapper
+
+
+swagger_view = lazy_view("drf_spectacular.views.SpectacularSwaggerView", url_name="schema")
+redoc_view = lazy_view("drf_spectacular.views.SpectacularRedocView", url_name="schema")
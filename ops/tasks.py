@@ -0,0 +1,10 @@
+"""Background work of the ``ops`` app, see ``ops.jobs``."""
+from django.conf import settings
+
+from ops.jobs import task
+from ops.models import IdempotencyKey
+
+
+@task(queue="maintenance", max_attempts=3)
+def prune_idempotency_keys():
+    IdempotencyKey.prune(settings.IDEMPOTENCY_TTL_SECONDS)
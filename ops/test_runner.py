@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+
+# A replica alias with its own test database rather than a mirror of the
+# primary, so tests can check that routed reads really leave the primary
+# (see ops.tests.test_routers). It is not in DATABASE_REPLICAS.
+TEST_REPLICA = "replica_test"
+
+
+def add_test_replica():
+    if TEST_REPLICA in connections.settings:
+        return
+    primary = settings.DATABASES["default"]
+    test = {}
+    if connections["default"].vendor != "sqlite":
+        test["NAME"] = f"test_{primary['NAME']}_replica"
+    database = {**primary, "OPTIONS": dict(primary.get("OPTIONS", {})), "TEST": test}
+    settings.DATABASES[TEST_REPLICA] = database
+    # Fills in the defaults Django adds to every configured database.
+    configured = connections.configure_settings(
+        {"default": dict(primary), TEST_REPLICA: dict(database)}
+    )
+    connections.settings[TEST_REPLICA] = configured[TEST_REPLICA]
+
+
+class NPlusOneDiscoverRunner(DiscoverRunner):
+    """
+    Test runner that turns repeated query shapes into test failures and adds
+    the ``replica_test`` database.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.NPLUSONE_MODE = "raise"
+
+    def setup_databases(self, **kwargs):
+        add_test_replica()
+        return super().setup_databases(**kwargs)
@@ -0,0 +1,98 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken
+
+from airport.models import Flight, Order
+from airport.tests.test_views import get_airplane, get_route, get_simple_user
+
+BATCH_URL = reverse("batch")
+
+
+class BatchTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_simple_user()
+        self.client = APIClient()
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+        self.flight = Flight.objects.create(
+            route=get_route(),
+            airplane=get_airplane(),
+            departure_time=timezone.now(),
+            arrival_time=timezone.now() + timedelta(hours=2),
+        )
+
+    def batch(self, requests, **options):
+        return self.client.post(
+            BATCH_URL, {"requests": requests, **options}, format="json"
+        )
+
+    def test_sub_requests_share_one_authentication(self):
+        requests = [
+            {"path": f"/api/airport/flights/{self.flight.id}/"},
+            {"path": f"/api/airport/routes/?source={self.flight.route.source.closest_big_city}"},
+            {"path": "/api/airport/orders/"},
+            {"path": "/api/user/me/"},
+        ]
+        with mock.patch.object(
+            JWTAuthentication, "authenticate", wraps=JWTAuthentication().authenticate
+        ) as authenticate:
+            response = self.batch(requests)
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        responses = response.data["responses"]
+        self.assertEqual([sub["status"] for sub in responses], [200] * 4)
+        self.assertEqual(responses[0]["body"]["id"], self.flight.id)
+        self.assertEqual(responses[1]["body"]["count"], 1)
+        self.assertEqual(responses[3]["body"]["email"], self.user.email)
+
+    def test_writes_and_errors_are_reported_per_request(self):
+        response = self.batch([
+            {
+                "method": "POST",
+                "path": "/api/airport/orders/",
+                "body": {"tickets": [{"row": 1, "seat": 1, "flight": self.flight.id}]},
+            },
+            {"method": "DELETE", "path": f"/api/airport/flights/{self.flight.id}/"},
+            {"path": "/api/airport/nowhere/"},
+        ])
+        self.assertEqual(
+            [sub["status"] for sub in response.data["responses"]], [201, 403, 404]
+        )
+        self.assertEqual(Order.objects.filter(user=self.user).count(), 1)
+
+    def test_read_transaction(self):
+        response = self.batch(
+            [{"path": "/api/airport/flights/"}, {"path": "/api/airport/orders/"}],
+            transaction=True,
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.batch(
+            [{"method": "POST", "path": "/api/airport/orders/", "body": {}}],
+            transaction=True,
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_only_api_paths(self):
+        for path in ("/admin/", "/api/batch/", "/metrics"):
+            response = self.batch([{"path": path}])
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        stream = reverse("airport:flight-seats-stream", args=(self.flight.id,))
+        response = self.batch([{"path": stream}])
+        self.assertEqual(response.data["responses"][0]["status"], 400)
+
+    def test_requires_authentication(self):
+        response = APIClient().post(
+            BATCH_URL, {"requests": [{"path": "/api/airport/flights/"}]}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,122 @@
+import threading
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+from psycopg2 import OperationalError, extensions
+from psycopg2.pool import PoolError
+
+from ops.db.base import ConnectionPool, ConnectionStats
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def execute(self, sql):
+        if self.conn.dropped:
+            raise OperationalError("server closed the connection unexpectedly")
+        self.conn.pings += 1
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.dropped = False
+        self.pings = 0
+        self.info = SimpleNamespace(
+            transaction_status=extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.opened = []
+
+        def factory():
+            conn = FakeConnection()
+            self.opened.append(conn)
+            return conn
+
+        self.factory = factory
+        self.pool = ConnectionPool(1, 2, factory=factory, timeout=0)
+
+    def test_idle_connection_is_reused(self):
+        conn, reused = self.pool.checkout()
+        self.assertTrue(reused)
+        self.pool.putconn(conn)
+
+        again, reused = self.pool.checkout()
+        self.assertIs(again, conn)
+        self.assertTrue(reused)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_pool_grows_up_to_max_size(self):
+        self.pool.checkout()
+        conn, reused = self.pool.checkout()
+        self.assertFalse(reused)
+        self.assertEqual(len(self.opened), 2)
+        with self.assertRaises(PoolError):
+            self.pool.checkout()
+
+    def test_exhausted_pool_waits_for_a_returned_connection(self):
+        pool = ConnectionPool(1, 1, factory=self.factory, timeout=5)
+        conn, _ = pool.checkout()
+        threading.Timer(0.05, pool.putconn, (conn,)).start()
+        again, reused = pool.checkout()
+        self.assertIs(again, conn)
+        self.assertTrue(reused)
+
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool(0, 1, factory=self.factory, timeout=0.05)
+        pool.checkout()
+        with self.assertRaisesMessage(PoolError, "after waiting"):
+            pool.checkout()
+
+    def test_closed_idle_connection_is_replaced(self):
+        self.opened[0].closed = 1
+        conn, reused = self.pool.checkout()
+        self.assertIsNot(conn, self.opened[0])
+        self.assertFalse(reused)
+        self.assertEqual(self.pool.as_dict()["in_use"], 1)
+
+    def test_health_check_discards_dropped_connection(self):
+        pool = ConnectionPool(1, 1, factory=self.factory, health_checks=True)
+        conn, reused = pool.checkout()
+        self.assertEqual(conn.pings, 1)
+        self.assertTrue(reused)
+        pool.putconn(conn)
+
+        conn.dropped = True
+        fresh, reused = pool.checkout()
+        self.assertIsNot(fresh, conn)
+        self.assertFalse(reused)
+        self.assertEqual(conn.closed, 1)
+
+    def test_as_dict(self):
+        self.pool.checkout()
+        self.assertEqual(
+            self.pool.as_dict(), {"idle": 0, "in_use": 1, "max_size": 2}
+        )
+
+
+class ConnectionStatsTests(SimpleTestCase):
+    def test_incr(self):
+        stats = ConnectionStats()
+        stats.incr("opened")
+        stats.incr("reused")
+        stats.incr("reused")
+        self.assertEqual(
+            stats.as_dict(), {"opened": 1, "reused": 2, "failed": 0}
+        )
@@ -0,0 +1,121 @@
+import hashlib
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from airport.models import Flight, Order
+from airport.tests.test_views import get_airplane, get_route
+from airport.views import OrderViewSet
+from ops.models import IdempotencyKey
+
+ORDERS_URL = reverse("airport:orders-list")
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.flight = Flight.objects.create(
+            route=get_route(),
+            airplane=get_airplane(),
+            departure_time=timezone.now(),
+            arrival_time=timezone.now() + timedelta(hours=2),
+        )
+
+    def order(self, key, seat=1):
+        return self.client.post(
+            ORDERS_URL,
+            {"tickets": [{"row": 1, "seat": seat, "flight": self.flight.id}]},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.order("abc")
+        retry = self.order("abc")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_with_another_body(self):
+        self.order("abc")
+        response = self.order("abc", seat=2)
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+
+    def test_keys_are_per_user(self):
+        self.order("abc")
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@test.com", password="password"
+            )
+        )
+        response = self.order("abc", seat=2)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Order.objects.count(), 2)
+
+    def in_progress(self, key, locked_for):
+        body = (
+            b'{"tickets":[{"row":1,"seat":1,"flight":%d}]}' % self.flight.id
+        )
+        return IdempotencyKey.objects.create(
+            user=self.user,
+            key=hashlib.sha256(key.encode()).hexdigest(),
+            fingerprint=hashlib.sha256(body).hexdigest(),
+            token="other",
+            locked_until=timezone.now() + timedelta(seconds=locked_for),
+        )
+
+    @override_settings(IDEMPOTENCY_WAIT_SECONDS=0)
+    def test_duplicate_waits_for_the_request_in_progress(self):
+        self.in_progress("abc", locked_for=30)
+        response = self.order("abc")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(Order.objects.exists())
+
+    def test_abandoned_request_is_taken_over(self):
+        row = self.in_progress("abc", locked_for=-1)
+        response = self.order("abc")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        row.refresh_from_db()
+        self.assertEqual(row.status_code, status.HTTP_201_CREATED)
+        self.assertNotEqual(row.token, "other")
+
+    def test_only_the_owner_stores_or_releases_the_key(self):
+        def taken_over(view, serializer):
+            # Another request took the key over while this one ran.
+            IdempotencyKey.objects.update(token="other")
+            raise RuntimeError("boom")
+
+        with mock.patch.object(OrderViewSet, "perform_create", taken_over):
+            with self.assertRaises(RuntimeError):
+                self.order("abc")
+        self.assertEqual(IdempotencyKey.objects.get().token, "other")
+
+    def test_failed_request_releases_the_key(self):
+        def fail(view, serializer):
+            raise RuntimeError("boom")
+
+        with mock.patch.object(OrderViewSet, "perform_create", fail):
+            with self.assertRaises(RuntimeError):
+                self.order("abc")
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.order("abc").status_code, status.HTTP_201_CREATED)
+
+    def test_expired_keys_are_pruned(self):
+        self.order("abc")
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(days=2))
+        self.assertEqual(IdempotencyKey.prune(24 * 60 * 60), 1)
@@ -0,0 +1,140 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from ops import jobs
+from ops.metrics import registry
+from ops.models import Job
+
+calls = []
+
+
+@jobs.task()
+def record(value):
+    calls.append(value)
+
+
+@jobs.task(max_attempts=2)
+def explode():
+    raise RuntimeError("boom")
+
+
+@jobs.task(queue="maintenance")
+def tidy():
+    calls.append("tidy")
+
+
+@override_settings(JOB_SCHEDULE={})
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_jobs_run_once(self):
+        record.enqueue(value=1)
+        record.enqueue(value=2)
+        worker = jobs.Worker(["default"], concurrency=4)
+        self.assertEqual(worker.run_pending(), 2)
+        self.assertEqual(worker.run_pending(), 0)
+        self.assertEqual(calls, [1, 2])
+        self.assertEqual(
+            set(Job.objects.values_list("status", flat=True)), {Job.DONE}
+        )
+
+    def test_claimed_jobs_are_not_claimed_again(self):
+        record.enqueue(value=1)
+        self.assertEqual(len(jobs.claim("default", "a", 10)), 1)
+        self.assertEqual(jobs.claim("default", "b", 10), [])
+
+    def test_delayed_jobs_wait(self):
+        record.enqueue(delay=60, value=1)
+        self.assertEqual(jobs.claim("default", "a", 10), [])
+
+    def test_failures_are_retried_with_backoff(self):
+        job = explode.enqueue()
+        worker = jobs.Worker(["default"])
+        with self.assertLogs("ops.jobs", "WARNING"):
+            worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn("RuntimeError: boom", job.last_error)
+
+        Job.objects.filter(id=job.id).update(run_at=timezone.now())
+        with self.assertLogs("ops.jobs", "WARNING"):
+            worker.run_pending()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    @override_settings(JOB_QUEUES={"maintenance": 1})
+    def test_queue_concurrency_limit(self):
+        tidy.enqueue()
+        tidy.enqueue()
+        self.assertEqual(len(jobs.claim("maintenance", "a", 10)), 1)
+        self.assertEqual(jobs.claim("maintenance", "b", 10), [])
+
+    @override_settings(JOB_QUEUES={"maintenance": 1})
+    def test_queue_limit_is_checked_when_claiming(self):
+        tidy.enqueue()
+        tidy.enqueue()
+        jobs.claim("maintenance", "a", 1)
+        # Both workers counted before either claimed.
+        with mock.patch("ops.jobs.free_slots", lambda queue, wanted: wanted):
+            self.assertEqual(jobs.claim("maintenance", "b", 10), [])
+
+    @override_settings(JOB_TIMEOUT_SECONDS=60)
+    def test_stale_jobs_are_queued_again(self):
+        job = record.enqueue(value=1)
+        jobs.claim("default", "dead", 1)
+        Job.objects.filter(id=job.id).update(
+            heartbeat_at=timezone.now() - timedelta(minutes=5)
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+
+    @override_settings(JOB_TIMEOUT_SECONDS=60, JOB_HEARTBEAT_SECONDS=0)
+    def test_long_jobs_of_live_workers_are_kept(self):
+        job = record.enqueue(value=1)
+        worker = jobs.Worker(["default"])
+        jobs.claim("default", worker.name, 1)
+        long_ago = timezone.now() - timedelta(minutes=5)
+        Job.objects.filter(id=job.id).update(started_at=long_ago, heartbeat_at=long_ago)
+        worker.heartbeat()
+        self.assertEqual(jobs.requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.RUNNING)
+
+    def test_worker_survives_database_errors(self):
+        worker = jobs.Worker(["default"])
+        outcomes = [OperationalError("server closed the connection"), 0]
+
+        def run_pending(executor=None):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with mock.patch.object(worker, "run_pending", run_pending), \
+                mock.patch("ops.jobs.close_old_connections") as close, \
+                mock.patch("ops.jobs.backoff", return_value=0), \
+                self.assertLogs("ops.jobs", "ERROR"):
+            worker.run(burst=True)
+        close.assert_called_once_with()
+        self.assertEqual(outcomes, [])
+
+    @override_settings(JOB_SCHEDULE={"ops.tests.test_jobs.tidy": {"every": 3600}})
+    def test_schedule_enqueues_once_per_interval(self):
+        jobs.enqueue_scheduled()
+        jobs.enqueue_scheduled()
+        self.assertEqual(Job.objects.filter(task="ops.tests.test_jobs.tidy").count(), 1)
+
+    def test_queue_depth_metrics(self):
+        record.enqueue(value=1)
+        metrics = registry.render()
+        self.assertIn('airport_job_queue_depth{queue="default",status="queued"} 1', metrics)
+        self.assertIn('airport_job_oldest_ready_seconds{queue="default"}', metrics)
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from ops.metrics import Histogram
+
+
+class ServerTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        user = get_user_model().objects.create_user(
+            email="test@test.com", password="password"
+        )
+        self.client.force_authenticate(user=user)
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse("airport:flights-list"))
+        header = response["Server-Timing"]
+        for entry in ("db;", "view;", "serialize;", "render;", "total;", "size;"):
+            self.assertIn(entry, header)
+        self.assertIn('queries"', header)
+
+    def test_metrics_endpoint_exposes_route_histograms(self):
+        self.client.get(reverse("airport:flights-list"))
+        response = self.client.get(reverse("ops:metrics"))
+        body = response.content.decode()
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            'airport_request_duration_seconds_count{route="airport:flights-list"}',
+            body,
+        )
+        self.assertIn("# TYPE airport_db_queries histogram", body)
+
+
+class HistogramTests(TestCase):
+    def test_render_is_cumulative(self):
+        histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(1, 5))
+        histogram.observe(0.5, "a")
+        histogram.observe(3, "a")
+        histogram.observe(10, "a")
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{route="a",le="1"} 1', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="5"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="a",le="+Inf"} 3', lines)
+        self.assertIn('test_seconds_sum{route="a"} 13.5', lines)
+        self.assertIn('test_seconds_count{route="a"} 3', lines)
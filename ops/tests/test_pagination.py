@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from airport.models import Crew
+
+CREW_URL = reverse("airport:crews-list")
+
+
+class ApproximateCountPaginationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="test@test.com", password="password"
+            )
+        )
+        for i in range(3):
+            Crew.objects.create(first_name=f"first{i}", last_name=f"last{i}")
+
+    def test_small_counts_are_exact(self):
+        response = self.client.get(CREW_URL, {"limit": 2})
+        self.assertEqual(response.data["count"], 3)
+        self.assertTrue(response.data["count_exact"])
+        self.assertIsNotNone(response.data["next"])
+
+    @override_settings(ESTIMATED_COUNT_THRESHOLD=2)
+    def test_large_counts_are_cached(self):
+        self.client.get(CREW_URL)
+        Crew.objects.create(first_name="new", last_name="crew")
+        response = self.client.get(CREW_URL)
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse(response.data["count_exact"])
+        self.assertEqual(len(response.data["results"]), 4)
+
+    def test_count_can_be_skipped(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(CREW_URL, {"limit": 2, "count": "false"})
+        self.assertIsNone(response.data["count"])
+        self.assertFalse(response.data["count_exact"])
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNotNone(response.data["next"])
+
+        last = self.client.get(response.data["next"])
+        self.assertEqual(len(last.data["results"]), 1)
+        self.assertIsNone(last.data["next"])
@@ -0,0 +1,82 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from ops.models import Profile
+
+FLIGHT_URL = reverse("airport:flights-list")
+
+
+def get_client(**params):
+    default = {"email": "test@test.com", "password": "password"}
+    default.update(params)
+    user = get_user_model().objects.create_user(**default)
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}"
+    )
+    return client
+
+
+class ProfilerMiddlewareTests(TestCase):
+    def test_staff_request_is_profiled(self):
+        client = get_client(is_staff=True)
+        response = client.get(FLIGHT_URL, {"_profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        profile = Profile.objects.get(id=response["X-Profile-Id"])
+        self.assertIn("function calls", profile.stats)
+        self.assertIn("airport_flight", profile.sql_log)
+        self.assertGreater(profile.query_count, 0)
+
+        admin = get_user_model().objects.create_superuser(
+            email="admin@test.com", password="password"
+        )
+        self.client.force_login(admin)
+        change = self.client.get(
+            reverse("admin:ops_profile_change", args=(profile.id,))
+        )
+        self.assertContains(change, "function calls")
+        download = self.client.get(
+            reverse("admin:ops_profile_download", args=(profile.id,))
+        )
+        self.assertIn("attachment", download["Content-Disposition"])
+
+    def test_header_flag_and_inline_output(self):
+        client = get_client(is_staff=True)
+        response = client.get(FLIGHT_URL, HTTP_X_PROFILE="inline")
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(b"function calls", response.content)
+
+    def test_non_staff_request_is_not_profiled(self):
+        client = get_client()
+        response = client.get(FLIGHT_URL, {"_profile": "1"})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(Profile.objects.exists())
+
+    @override_settings(PROFILER_BUFFER_SIZE=2)
+    def test_ring_buffer_keeps_latest_profiles(self):
+        client = get_client(is_staff=True)
+        ids = [
+            int(client.get(FLIGHT_URL, {"_profile": "1"})["X-Profile-Id"])
+            for _ in range(3)
+        ]
+        self.assertEqual(
+            list(Profile.objects.values_list("id", flat=True)), ids[:0:-1]
+        )
+
+
+@override_settings(DATABASE_REPLICAS=["replica_test"])
+class ReplicaProfileTests(TestCase):
+    databases = {"default", "replica_test"}
+
+    def test_replica_queries_are_logged(self):
+        cache.clear()
+        client = get_client(is_staff=True)
+        response = client.get(FLIGHT_URL, {"_profile": "1"})
+        profile = Profile.objects.get(id=response["X-Profile-Id"])
+        self.assertIn("[default] SELECT", profile.sql_log)
+        self.assertIn('[replica_test] SELECT COUNT(*)', profile.sql_log)
@@ -0,0 +1,42 @@
+import asyncio
+import threading
+
+from django.test import SimpleTestCase
+
+from ops.pubsub import CLOSED, InProcessBroker
+
+
+class InProcessBrokerTests(SimpleTestCase):
+    async def test_publish_from_another_thread(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe("flight:1")
+        thread = threading.Thread(target=broker.publish, args=("flight:1", {"seats": 3}))
+        thread.start()
+        message = await asyncio.wait_for(subscription.get(), 1)
+        thread.join()
+        self.assertEqual(message, {"seats": 3})
+
+    async def test_slow_subscribers_get_the_latest_message(self):
+        broker = InProcessBroker()
+        subscription = broker.subscribe("flight:1")
+        for seats in (3, 2, 1):
+            broker.publish("flight:1", {"seats": seats})
+        await asyncio.sleep(0)
+        self.assertEqual(await subscription.get(), {"seats": 1})
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(subscription.get(), 0.01)
+
+    async def test_unsubscribe_and_close(self):
+        broker = InProcessBroker()
+        first = broker.subscribe("flight:1")
+        second = broker.subscribe("flight:1")
+        first.close()
+        self.assertEqual(broker.subscriber_count(), 1)
+        self.assertEqual(broker.publish("flight:2", {}), 0)
+        self.assertFalse(broker.has_subscribers("flight:2"))
+
+        broker.close()
+        self.assertIs(await asyncio.wait_for(second.get(), 1), CLOSED)
+        self.assertIs(await asyncio.wait_for(second.get(), 1), CLOSED)
+        second.close()
+        self.assertEqual(broker.subscriber_count(), 0)
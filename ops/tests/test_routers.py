@@ -0,0 +1,123 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from airport.models import Crew, Flight
+from ops.routers import ReplicaReadMixin, ReplicaRouter, _replica, primary_only
+
+
+class ProbeView(ReplicaReadMixin, APIView):
+    def get(self, request):
+        if "fail" in request.GET:
+            raise ValidationError("fail")
+        if "many" in request.GET:
+            return Response({
+                "dbs": sorted({ReplicaRouter().db_for_read(Flight) for _ in range(20)})
+            })
+        return Response({"db": ReplicaRouter().db_for_read(Flight)})
+
+    def post(self, request):
+        return Response(status=201)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"])
+class ReplicaRouterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = APIRequestFactory()
+        self.user = get_user_model().objects.create_user(
+            email="reader@test.com", password="password"
+        )
+
+    def request(self, method, path="/"):
+        request = getattr(self.factory, method)(path)
+        force_authenticate(request, user=self.user)
+        return ProbeView.as_view()(request)
+
+    def test_reads_outside_views_use_primary(self):
+        self.assertIsNone(self.router.db_for_read(Flight))
+        self.assertEqual(self.router.db_for_write(Flight), "default")
+
+    def test_only_replica_apps_are_routed(self):
+        token = _replica.set("replica_0")
+        try:
+            self.assertEqual(self.router.db_for_read(Flight), "replica_0")
+            self.assertIsNone(self.router.db_for_read(get_user_model()))
+        finally:
+            _replica.reset(token)
+
+    def test_instance_hint_wins(self):
+        flight = Flight(id=1)
+        flight._state.db = "default"
+        token = _replica.set("replica_0")
+        try:
+            self.assertEqual(self.router.db_for_read(Flight, instance=flight), "default")
+        finally:
+            _replica.reset(token)
+
+    @override_settings(DATABASE_REPLICAS=[f"replica_{index}" for index in range(5)])
+    def test_one_replica_per_request(self):
+        for _ in range(5):
+            self.assertEqual(len(self.request("get", "/?many=1").data["dbs"]), 1)
+
+    def test_primary_only_overrides_replica_reads(self):
+        with primary_only():
+            self.assertEqual(self.request("get").data, {"db": None})
+        self.assertEqual(self.request("get").data, {"db": "replica_0"})
+
+    def test_replicas_are_not_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica_0", "airport"))
+        self.assertTrue(self.router.allow_migrate("default", "airport"))
+
+    def test_safe_request_reads_from_replica(self):
+        self.assertEqual(self.request("get").data, {"db": "replica_0"})
+        self.assertIsNone(_replica.get())
+
+    def test_write_pins_user_to_primary(self):
+        self.request("post")
+        self.assertEqual(self.request("get").data, {"db": None})
+
+    def test_routing_is_reset_after_errors(self):
+        self.assertEqual(self.request("get", "/?fail=1").status_code, 400)
+        self.assertIsNone(_replica.get())
+
+
+@override_settings(DATABASE_REPLICAS=["replica_test"])
+class ReplicaDatabaseTests(TestCase):
+    """``replica_test`` is a separate test database, not a mirror of default."""
+
+    databases = {"default", "replica_test"}
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            get_user_model().objects.create_user(
+                email="admin@test.com", password="password", is_staff=True
+            )
+        )
+
+    def test_reads_go_to_the_replica(self):
+        Crew.objects.create(first_name="On", last_name="Primary")
+        replica_crew = Crew.objects.using("replica_test").create(
+            first_name="On", last_name="Replica"
+        )
+        response = self.client.get(reverse("airport:crews-list"))
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(
+            [crew["id"] for crew in response.data["results"]], [replica_crew.id]
+        )
+        self.assertEqual(response.data["results"][0]["last_name"], "Replica")
+
+        # A write pins the user to the primary.
+        self.client.post(
+            reverse("airport:crews-list"), {"first_name": "New", "last_name": "Hire"}
+        )
+        response = self.client.get(reverse("airport:crews-list"))
+        self.assertEqual(response.data["count"], 2)
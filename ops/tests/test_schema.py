@@ -0,0 +1,85 @@
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+
+from ops import schema
+
+SCHEMA_URL = reverse("schema")
+
+
+class SchemaViewTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = Path(directory.name) / "openapi-schema.json"
+        self.path.write_text('{"openapi": "3.0.3"}')
+        self.addCleanup(schema._schemas.clear)
+
+    def test_serves_precomputed_file_with_etag(self):
+        with override_settings(OPENAPI_SCHEMA_FILE=self.path):
+            response = self.client.get(SCHEMA_URL)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), {"openapi": "3.0.3"})
+            self.assertIn("no-cache", response["Cache-Control"])
+
+            response = self.client.get(
+                SCHEMA_URL, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response.content, b"")
+
+    def test_generates_schema_once_without_file(self):
+        self.path.unlink()
+        # Generation warns about unannotated serializer methods.
+        with override_settings(OPENAPI_SCHEMA_FILE=self.path), redirect_stderr(io.StringIO()):
+            response = self.client.get(SCHEMA_URL)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertIn("/api/airport/flights/", json.loads(response.content)["paths"])
+            etag = response["ETag"]
+            self.assertEqual(self.client.get(SCHEMA_URL)["ETag"], etag)
+
+    def test_docs_pages(self):
+        for name in ("swagger-ui", "redoc"):
+            response = self.client.get(reverse(name))
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertContains(response, SCHEMA_URL)
+
+
+class StartupTests(SimpleTestCase):
+    def test_urls_do_not_import_documentation_views(self):
+        script = (
+            "import sys, django; django.setup(); "
+            "import Airport_API_Service.urls; "
+            "print('drf_spectacular.views' in sys.modules)"
+        )
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            capture_output=True,
+            text=True,
+            env=env,
+            cwd=settings.BASE_DIR,
+            check=True,
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_startup_benchmark(self):
+        stdout = io.StringIO()
+        call_command(
+            "startup_benchmark", runs=1, modules=["drf_spectacular.views"], stdout=stdout
+        )
+        output = stdout.getvalue()
+        self.assertIn("Startup over 1 runs", output)
+        self.assertIn("drf_spectacular.views: no", output)
+        self.assertIn("django", output)
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from ops import throttling
+from ops.metrics import registry
+
+FLIGHTS_URL = reverse("airport:flights-list")
+ORDERS_URL = reverse("airport:orders-list")
+
+BUCKETS = {
+    "flight_search": {
+        "user": {"rate": "1/s", "burst": 2},
+        "ip": {"rate": "1/s", "burst": 3},
+    },
+}
+
+
+class TakeTokenTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 1_000_000_000
+        patcher = mock.patch.object(throttling, "now_us", lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_refill(self):
+        interval = throttling.parse_rate("2/s")
+        self.assertEqual(interval, 500_000)
+        waits = [throttling.take_token("bucket", interval, 3) for _ in range(4)]
+        self.assertEqual(waits, [0, 0, 0, 500_000])
+
+        self.now += 500_000
+        self.assertEqual(throttling.take_token("bucket", interval, 3), 0)
+        self.assertEqual(throttling.take_token("bucket", interval, 3), 500_000)
+
+    def test_rejected_requests_do_not_use_tokens(self):
+        interval = throttling.parse_rate("1/s")
+        throttling.take_token("bucket", interval, 1)
+        for _ in range(5):
+            self.assertEqual(throttling.take_token("bucket", interval, 1), 1_000_000)
+        self.now += 1_000_000
+        self.assertEqual(throttling.take_token("bucket", interval, 1), 0)
+
+    def test_idle_bucket_refills_to_burst_only(self):
+        interval = throttling.parse_rate("1/s")
+        throttling.take_token("bucket", interval, 2)
+        self.now += 60 * 1_000_000
+        waits = [throttling.take_token("bucket", interval, 2) for _ in range(3)]
+        self.assertEqual(waits, [0, 0, 1_000_000])
+
+
+@override_settings(THROTTLE_BUCKETS=BUCKETS)
+class ThrottledViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email="test@test.com", password="password"
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_user_bucket(self):
+        codes = [self.client.get(FLIGHTS_URL).status_code for _ in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        response = self.client.get(FLIGHTS_URL)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_ip_bucket_is_shared_by_users(self):
+        other = APIClient()
+        other.force_authenticate(
+            get_user_model().objects.create_user(
+                email="other@test.com", password="password"
+            )
+        )
+        self.client.get(FLIGHTS_URL)
+        self.client.get(FLIGHTS_URL)
+        self.assertEqual(other.get(FLIGHTS_URL).status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            other.get(FLIGHTS_URL).status_code,
+            status.HTTP_429_TOO_MANY_REQUESTS,
+        )
+
+    def test_unscoped_actions_are_not_throttled(self):
+        for _ in range(5):
+            self.assertEqual(self.client.get(ORDERS_URL).status_code, status.HTTP_200_OK)
+
+    def test_decisions_are_counted(self):
+        for _ in range(3):
+            self.client.get(FLIGHTS_URL)
+        metrics = registry.render()
+        self.assertIn(
+            'airport_throttle_decisions_total{scope="flight_search",kind="user",outcome="throttled"}',
+            metrics,
+        )
+        self.assertIn("airport_throttle_check_seconds_count", metrics)
@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+
+from ops import views
+
+
+class HealthViewTests(TestCase):
+    def setUp(self):
+        views._migrations.update(applied=False, checked_at=None)
+
+    def test_healthz(self):
+        response = self.client.get(reverse("ops:healthz"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), {"status": "ok"})
+
+    def test_readyz_reports_latency_and_migrations(self):
+        response = self.client.get(reverse("ops:readyz"))
+        body = response.json()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(body["migrations"], "applied")
+        self.assertGreaterEqual(body["database"]["latency_ms"], 0)
+
+    def test_readyz_caches_applied_migrations(self):
+        self.client.get(reverse("ops:readyz"))
+        with self.assertNumQueries(1):
+            self.client.get(reverse("ops:readyz"))
+
+    @patch(
+        "ops.views.database_latency",
+        side_effect=OperationalError('could not connect to server "db-primary"'),
+    )
+    def test_readyz_database_unavailable(self, _):
+        with self.assertLogs("ops.views", "ERROR"):
+            response = self.client.get(reverse("ops:readyz"))
+        self.assertEqual(
+            response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE
+        )
+        self.assertEqual(
+            response.json(),
+            {"status": "unavailable", "database": {"status": "unavailable"}},
+        )
+        self.assertNotIn(b"db-primary", response.content)
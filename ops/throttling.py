@@ -0,0 +1,121 @@
+"""
+Token bucket throttles for DRF views.
+
+A view opts in per action with ``throttle_scopes = {"list": "flight_search"}``
+(or ``throttle_scope`` for every action) and ``THROTTLE_BUCKETS`` configures
+each scope with a refill ``rate`` and a ``burst`` size, separately for
+authenticated users (``"user"``) and client addresses (``"ip"``).
+
+Buckets are kept as a GCRA theoretical arrival time in the cache, in
+microseconds, and moved forward with ``cache.incr`` so concurrent requests
+from the same client cannot both take the last token. Only a client whose
+bucket has refilled completely is written with ``cache.set``. Rejected
+requests are answered with 429 and a ``Retry-After`` header.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+from ops.metrics import throttle_decisions, throttle_duration
+
+DURATIONS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+MICROSECONDS = 1_000_000
+# incr() keeps the expiry set by add()/set(), so a key under constant load
+# expires this long after its bucket was last full and starts a new burst.
+KEY_TIMEOUT = 60 * 60
+
+
+def now_us():
+    return int(time.time() * MICROSECONDS)
+
+
+def parse_rate(rate):
+    """``"5/s"``, ``"30/min"`` -> microseconds between two tokens."""
+    num, period = rate.split("/")
+    return DURATIONS[period[0]] * MICROSECONDS // int(num)
+
+
+def throttle_scope(view):
+    scopes = getattr(view, "throttle_scopes", None) or {}
+    return scopes.get(getattr(view, "action", None), getattr(view, "throttle_scope", None))
+
+
+def take_token(key, interval, burst):
+    """
+    Take a token from the bucket at ``key``. Returns 0 if one was left,
+    otherwise the microseconds until the next one.
+    """
+    now = now_us()
+    capacity = interval * burst
+    cache.add(key, now, KEY_TIMEOUT)
+    try:
+        arrival = cache.incr(key, interval)
+    except ValueError:
+        arrival = None
+    if arrival is None or arrival - interval < now:
+        cache.set(key, now + interval, KEY_TIMEOUT)
+        return 0
+    if arrival - now <= capacity:
+        return 0
+    cache.decr(key, interval)
+    return arrival - now - capacity
+
+
+def throttle_wait(scope, kind, ident):
+    """
+    Take a token from the ``scope`` bucket of ``ident`` (a user id for
+    ``kind="user"``, an address for ``"ip"``). Returns 0 if one was left or
+    the scope has no such bucket, otherwise the seconds until the next one.
+    """
+    bucket = settings.THROTTLE_BUCKETS.get(scope, {}).get(kind)
+    if bucket is None or ident is None:
+        return 0
+    start = time.perf_counter()
+    wait = take_token(
+        f"throttle:{scope}:{kind}:{ident}",
+        parse_rate(bucket["rate"]),
+        bucket["burst"],
+    )
+    throttle_duration.observe(time.perf_counter() - start, scope, kind)
+    throttle_decisions.inc(scope, kind, "throttled" if wait else "allowed")
+    return wait / MICROSECONDS
+
+
+class TokenBucketThrottle(BaseThrottle):
+    kind = None
+
+    def get_client_ident(self, request):
+        raise NotImplementedError(".get_client_ident() must be overridden")
+
+    def allow_request(self, request, view):
+        self.retry_after = None
+        scope = throttle_scope(view)
+        if settings.THROTTLE_BUCKETS.get(scope, {}).get(self.kind) is None:
+            return True
+        wait = throttle_wait(scope, self.kind, self.get_client_ident(request))
+        if wait:
+            self.retry_after = wait
+            return False
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class UserTokenBucketThrottle(TokenBucketThrottle):
+    kind = "user"
+
+    def get_client_ident(self, request):
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+
+class IPTokenBucketThrottle(TokenBucketThrottle):
+    kind = "ip"
+
+    def get_client_ident(self, request):
+        return self.get_ident(request)
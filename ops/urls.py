@@ -0,0 +1,11 @@
+from django.urls import path
+
+from ops.views import healthz, readyz, metrics
+
+urlpatterns = [
+    path("healthz", healthz, name="healthz"),
+    path("readyz", readyz, name="readyz"),
+    path("metrics", metrics, name="metrics"),
+]
+
+app_name = "ops"
@@ -0,0 +1,78 @@
+import logging
+import time
+
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.cache import never_cache
+
+from ops.db.base import connection_stats
+from ops.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_RECHECK_SECONDS = 30
+
+_migrations = {"applied": False, "checked_at": None}
+
+
+def database_latency():
+    start = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+    return time.perf_counter() - start
+
+
+def migrations_applied():
+    """
+    Loading the migration graph reads every migration file, so the result is
+    cached: once applied it stays applied for the life of the process.
+    """
+    now = time.monotonic()
+    checked_at = _migrations["checked_at"]
+    if _migrations["applied"] or (
+        checked_at is not None and now - checked_at < MIGRATIONS_RECHECK_SECONDS
+    ):
+        return _migrations["applied"]
+    executor = MigrationExecutor(connection)
+    plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+    _migrations.update(applied=not plan, checked_at=now)
+    return _migrations["applied"]
+
+
+@never_cache
+def healthz(request):
+    return JsonResponse({"status": "ok"})
+
+
+@never_cache
+def readyz(request):
+    try:
+        latency = database_latency()
+        applied = migrations_applied()
+    except DatabaseError:
+        # The error names hosts and databases; keep it out of the response.
+        logger.exception("Readiness check failed: database unavailable")
+        return JsonResponse(
+            {"status": "unavailable", "database": {"status": "unavailable"}},
+            status=503,
+        )
+    return JsonResponse(
+        {
+            "status": "ok" if applied else "migrating",
+            "database": {
+                "latency_ms": round(latency * 1000, 3),
+                "connections": connection_stats().get(connection.alias),
+            },
+            "migrations": "applied" if applied else "pending",
+        },
+        status=200 if applied else 503,
+    )
+
+
+@never_cache
+def metrics(request):
+    return HttpResponse(
+        registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8"
+    )